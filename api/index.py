@@ -9,6 +9,8 @@ sys.path.insert(0, str(project_root))
 # Set environment for Vercel
 os.environ.setdefault('VERCEL', '1')
 os.environ.setdefault('FLASK_ENV', 'production')
+# Tables come from `flask db upgrade` at deploy time, not from every cold start
+os.environ.setdefault('FAST_START', 'true')
 
 try:
     # Try to import and create the full app
@@ -1,27 +1,47 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_login import LoginManager
 from config import Config
+from app.metrics import QueryMetrics
+from app.pool import PoolMetrics, engine_options, describe
+from app.replicas import ReplicaRouter, RoutingSession, replica_binds
 from datetime import datetime
 import os
 
-db = SQLAlchemy()
-migrate = Migrate()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
+query_metrics = QueryMetrics()
+pool_metrics = PoolMetrics()
 
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
+    # Explicit SQLALCHEMY_ENGINE_OPTIONS take precedence over the pool settings
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        **engine_options(app.config), **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})
+    }
+    # Bind options aren't inherited from SQLALCHEMY_ENGINE_OPTIONS, so replicas get their own
+    app.config['SQLALCHEMY_BINDS'] = {
+        **replica_binds(app.config), **app.config.get('SQLALCHEMY_BINDS', {})
+    }
     
     db.init_app(app)
-    migrate.init_app(app, db)
     login_manager.init_app(app)
     login_manager.login_view = 'auth.login'
     login_manager.login_message = 'Please log in to access this page.'
+    query_metrics.init_app(app)
+    ReplicaRouter.init_app(app)
     
-    # Auto-create database tables for production deployment
-    if os.environ.get('VERCEL'):
+    pool_metrics.install()
+    with app.app_context():
+        app.logger.info('Database pool: %s', describe(db.engine))
+        for key in ReplicaRouter.replicas(app):
+            app.logger.info('Read replica %s: %s', key, describe(db.engines[key]))
+        query_metrics.add_collector(app, lambda: pool_metrics.render(db.engine))
+    
+    # Fast start (set by api/index.py) skips creating tables at boot: run
+    # `flask db upgrade` as a deploy step instead
+    if os.environ.get('VERCEL') and not app.config['FAST_START']:
         with app.app_context():
             try:
                 # Import models before creating tables
@@ -43,6 +63,25 @@ def create_app(config_class=Config):
                 return 0
         return 0
     
+    @app.template_filter('highlight')
+    def highlight_filter(snippet):
+        from app.services.search import ProjectSearch
+        return ProjectSearch.highlight(snippet)
+    
+    @app.template_global()
+    def cache_fragment(name, *vary, caller, scope=None):
+        """Cache the body of a {% call cache_fragment(name, ..., scope=...) %} block"""
+        from app.services.page_cache import PageCache
+        return PageCache.fragment(name, caller, *vary, scope=scope)
+    
+    @app.context_processor
+    def inject_unread_counts():
+        from flask_login import current_user
+        if not current_user.is_authenticated:
+            return {}
+        from app.services.message_service import MessageService
+        return {'unread_message_count': MessageService.get_unread_count(current_user.id)}
+    
     # Register blueprints
     try:
         from app.auth import bp as auth_bp
@@ -57,6 +96,22 @@ def create_app(config_class=Config):
         def error_route():
             return f"Blueprint Error: {str(e)}", 500
     
+    from app.services.page_cache import PageCache, project_scope
+    query_metrics.add_collector(app, PageCache.stats.render)
+    app.add_template_global(project_scope)
+    
+    from app.services.jobs import JobQueue
+    JobQueue.init_app(app)
+    
+    # Migrations and CLI commands aren't needed to serve requests, and
+    # importing Alembic is a large share of a cold start
+    if not app.config['FAST_START']:
+        from flask_migrate import Migrate
+        Migrate(app, db)
+        
+        from app.cli import register_commands
+        register_commands(app)
+    
     return app
 
 # Import models at the end to avoid circular imports
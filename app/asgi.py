@@ -0,0 +1,213 @@
+"""ASGI server for long-lived connections.
+
+    uvicorn app.asgi:application --host 0.0.0.0 --port 8000
+
+Serves the notification stream (/api/notifications/stream) and message
+thread long-polls (/api/messages/<partner_id>/wait) with asyncio, so an idle
+connection costs a coroutine and a socket instead of a whole WSGI worker.
+Every other URL stays on the WSGI app (gunicorn run:app); nginx sends these
+here (see nginx.asgi.conf and docker-compose.asgi.yml). Events are published
+by the WSGI processes, so run with NOTIFICATION_BROKER=postgres.
+"""
+
+import asyncio
+import json
+import logging
+import re
+from urllib.parse import parse_qs
+from flask_login import current_user
+from app import create_app, db
+from app.services.message_service import MessageService
+from app.services.notification_service import NotificationService
+from app.services.realtime import AsyncSubscription, format_event, get_broker
+
+logger = logging.getLogger(__name__)
+
+
+class StreamApp:
+    """Minimal ASGI application serving Server-Sent Events streams and long-polls.
+
+    Requests are authenticated with the Flask app's own session and
+    remember-me cookies, and the database work (loading the user, the
+    initial unread count, a page of messages) runs in a thread; in between
+    a connection only waits on the broker.
+    """
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        # Path patterns; named groups are passed to the handler as ints
+        self.routes = [
+            (re.compile(r'/api/notifications/stream'), self.notification_stream),
+            (re.compile(r'/api/messages/(?P<partner_id>\d+)/wait'), self.message_wait),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+        for pattern, handler in self.routes:
+            match = pattern.fullmatch(scope['path'])
+            if match:
+                break
+        else:
+            await self._respond(send, 404, b'Not Found')
+            return
+        if scope['method'] != 'GET':
+            await self._respond(send, 405, b'Method Not Allowed')
+            return
+        await handler(scope, receive, send, **{name: int(value) for name, value in match.groupdict().items()})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    async def _respond(send, status, body, headers=()):
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'text/plain'), *headers]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    def _request_context(self, scope):
+        # Flask-Login loads the user from the cookies in this context just
+        # as it would for a WSGI request
+        headers = {name.decode('latin-1'): value.decode('latin-1') for name, value in scope['headers']}
+        client = scope.get('client') or ('', 0)
+        return self.flask_app.test_request_context(scope['path'], headers=headers,
+                                                   environ_base={'REMOTE_ADDR': client[0]})
+
+    def _open_stream(self, scope):
+        # Runs in a thread
+        with self._request_context(scope):
+            if not current_user.is_authenticated:
+                return None, None, None
+            user_id = current_user.id
+            count = NotificationService.get_unread_count(user_id)
+            config = self.flask_app.config
+            settings = (config['NOTIFICATION_STREAM_TIMEOUT'], config['NOTIFICATION_STREAM_KEEPALIVE'])
+            db.session.close()
+            return user_id, count, settings
+
+    def _authenticate(self, scope):
+        # Runs in a thread
+        with self._request_context(scope):
+            user_id = current_user.id if current_user.is_authenticated else None
+            db.session.close()
+            return user_id
+
+    def _read_thread(self, user_id, partner_id, after_id, limit):
+        # Runs in a thread
+        with self.flask_app.app_context():
+            return MessageService.read_thread(user_id, partner_id, after_id=after_id, limit=limit)
+
+    async def notification_stream(self, scope, receive, send):
+        """Same events as the WSGI notification_stream view"""
+        user_id, count, settings = await asyncio.to_thread(self._open_stream, scope)
+        if user_id is None:
+            await self._respond(send, 401, b'Unauthorized')
+            return
+        timeout, keepalive = settings
+
+        with self.flask_app.app_context():
+            broker = get_broker()
+        subscription = broker.subscribe(user_id, AsyncSubscription(asyncio.get_running_loop()))
+        disconnected = asyncio.ensure_future(self._wait_for_disconnect(receive))
+        try:
+            await send({'type': 'http.response.start', 'status': 200, 'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ]})
+            await self._send(send, 'retry: 5000\n' + format_event({'type': 'unread-count', 'count': count}))
+
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            while not disconnected.done() and loop.time() < deadline:
+                next_event = asyncio.ensure_future(subscription.get())
+                done, _ = await asyncio.wait({next_event, disconnected},
+                                             timeout=min(keepalive, max(deadline - loop.time(), 0)),
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if next_event in done:
+                    await self._send(send, format_event(next_event.result()))
+                    continue
+                next_event.cancel()
+                if not disconnected.done():
+                    await self._send(send, ': keepalive\n\n')
+            if not disconnected.done():
+                await send({'type': 'http.response.body', 'body': b''})
+        except OSError:
+            # The client went away mid-write
+            pass
+        finally:
+            disconnected.cancel()
+            broker.unsubscribe(user_id, subscription)
+
+    async def message_wait(self, scope, receive, send, partner_id):
+        """Messages in the thread with ``partner_id`` newer than ``after_id``.
+
+        The same JSON as the WSGI ``/api/messages/<partner_id>?after_id=``,
+        answered as soon as there is a newer message, or with none after
+        MESSAGE_WAIT_TIMEOUT seconds; the client then asks again.
+        """
+        args = parse_qs(scope['query_string'].decode('latin-1'))
+        try:
+            after_id = int(args['after_id'][0])
+            limit = min(max(int(args.get('limit', ['50'])[0]), 1), 100)
+        except (KeyError, ValueError):
+            await self._respond(send, 400, b'after_id is required')
+            return
+        user_id = await asyncio.to_thread(self._authenticate, scope)
+        if user_id is None:
+            await self._respond(send, 401, b'Unauthorized')
+            return
+
+        loop = asyncio.get_running_loop()
+        with self.flask_app.app_context():
+            broker = get_broker()
+        # Subscribed before reading, so a message sent in between still wakes us
+        subscription = broker.subscribe(user_id, AsyncSubscription(loop))
+        disconnected = asyncio.ensure_future(self._wait_for_disconnect(receive))
+        try:
+            data = await asyncio.to_thread(self._read_thread, user_id, partner_id, after_id, limit)
+            deadline = loop.time() + self.flask_app.config['MESSAGE_WAIT_TIMEOUT']
+            while not data['messages'] and not disconnected.done() and loop.time() < deadline:
+                next_event = asyncio.ensure_future(subscription.get())
+                done, _ = await asyncio.wait({next_event, disconnected}, timeout=deadline - loop.time(),
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if next_event not in done:
+                    next_event.cancel()
+                    continue
+                event = next_event.result()
+                if event['type'] == 'new-message' and \
+                        partner_id in (event['sender_id'], event['recipient_id']):
+                    data = await asyncio.to_thread(self._read_thread, user_id, partner_id, after_id, limit)
+            if not disconnected.done():
+                await send({'type': 'http.response.start', 'status': 200, 'headers': [
+                    (b'content-type', b'application/json'),
+                    (b'cache-control', b'no-store'),
+                ]})
+                await send({'type': 'http.response.body', 'body': json.dumps(data).encode()})
+        except OSError:
+            # The client went away mid-write
+            pass
+        finally:
+            disconnected.cancel()
+            broker.unsubscribe(user_id, subscription)
+
+    @staticmethod
+    async def _send(send, text):
+        await send({'type': 'http.response.body', 'body': text.encode(), 'more_body': True})
+
+    @staticmethod
+    async def _wait_for_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+
+application = StreamApp(create_app())
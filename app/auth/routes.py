@@ -2,8 +2,8 @@ from flask import render_template, redirect, url_for, flash, request
 from flask_login import login_user, logout_user, current_user, login_required
 from app import db
 from app.auth import bp
-from app.auth.forms import LoginForm, RegistrationForm, CompanyProfileForm, DeveloperProfileForm
 from app.models import User, CompanyProfile, DeveloperProfile
+from app.services.match_service import MatchService
 import json
 
 @bp.route('/login', methods=['GET', 'POST'])
@@ -11,6 +11,7 @@ def login():
     if current_user.is_authenticated:
         return redirect(url_for('main.dashboard'))
     
+    from app.auth.forms import LoginForm
     form = LoginForm()
     if form.validate_on_submit():
         user = User.query.filter_by(email=form.email.data).first()
@@ -36,6 +37,7 @@ def register():
     if current_user.is_authenticated:
         return redirect(url_for('main.dashboard'))
     
+    from app.auth.forms import RegistrationForm
     form = RegistrationForm()
     if form.validate_on_submit():
         user = User(username=form.username.data, email=form.email.data, role=form.role.data)
@@ -60,6 +62,7 @@ def company_profile():
         flash('Access denied.', 'error')
         return redirect(url_for('main.dashboard'))
     
+    from app.auth.forms import CompanyProfileForm
     form = CompanyProfileForm()
     profile = current_user.company_profile
     
@@ -97,6 +100,7 @@ def developer_profile():
         flash('Access denied.', 'error')
         return redirect(url_for('main.dashboard'))
     
+    from app.auth.forms import DeveloperProfileForm
     form = DeveloperProfileForm()
     profile = current_user.developer_profile
     
@@ -113,6 +117,8 @@ def developer_profile():
         profile.linkedin_url = form.linkedin_url.data
         
         db.session.add(profile)
+        db.session.flush()
+        MatchService.refresh_developer(profile.id)
         db.session.commit()
         
         flash('Profile updated successfully!', 'success')
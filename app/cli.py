@@ -0,0 +1,282 @@
+import click
+from flask.cli import AppGroup, with_appcontext
+from flask_migrate.cli import db as db_group
+
+
+@db_group.command('index-audit')
+@click.option('--query', 'names', multiple=True,
+              help='Only audit the named hot query (repeatable).')
+@click.option('--allow-seqscan', is_flag=True,
+              help='Leave enable_seqscan on when auditing PostgreSQL.')
+@click.option('--verbose', '-v', is_flag=True, help='Print the full plan for every query.')
+@with_appcontext
+def index_audit(names, allow_seqscan, verbose):
+    """EXPLAIN hot queries and flag sequential scans."""
+    from app.services.index_audit import IndexAuditService
+
+    results = IndexAuditService.audit(names=names, disable_seqscan=not allow_seqscan)
+    flagged = 0
+    for result in results:
+        status = 'SEQ SCAN' if result['seq_scans'] else 'ok'
+        click.echo(f"{status:<9} {result['name']}")
+        lines = result['plan'] if verbose else result['seq_scans']
+        for line in lines:
+            click.echo(f'          {line}')
+        if result['seq_scans']:
+            flagged += 1
+
+    click.echo(f'{len(results)} queries audited, {flagged} with sequential scans.')
+    if flagged:
+        raise SystemExit(1)
+
+
+@db_group.command('pool')
+@with_appcontext
+def pool_status():
+    """Show the effective connection pool settings."""
+    from app import db
+    from app.pool import describe
+
+    click.echo(describe(db.engine))
+    click.echo(db.engine.pool.status())
+
+
+@db_group.command('replicas')
+@click.option('--copy', 'copy_primary', is_flag=True,
+              help='First copy a SQLite primary into SQLite replicas (local testing).')
+@with_appcontext
+def replica_status(copy_primary):
+    """Show the read replicas and their replication lag."""
+    from app import db
+    from app.pool import describe
+    from app.replicas import ReplicaRouter, copy_sqlite, replication_lag
+
+    replicas = ReplicaRouter.replicas()
+    if not replicas:
+        click.echo('No read replicas configured; set DATABASE_REPLICA_URLS.')
+        return
+    for key in replicas:
+        engine = db.engines[key]
+        if copy_primary:
+            try:
+                copy_sqlite(db.engine, engine)
+            except ValueError as e:
+                raise click.ClickException(str(e))
+        lag = replication_lag(engine)
+        click.echo(f'{key}: {describe(engine)}')
+        click.echo(f"  lag: {'unknown' if lag is None else f'{lag:.1f}s'}")
+
+
+counters_group = AppGroup('counters', help='Manage cached unread counters.')
+
+
+@counters_group.command('reconcile')
+def reconcile_counters():
+    """Correct cached unread counters that drifted from the database.
+
+    Run periodically (e.g. from cron) against the shared redis cache. The
+    memory backend is private to each worker and relies on its TTL instead.
+    """
+    from app.services.unread_counters import UnreadCounters
+
+    corrected = UnreadCounters.reconcile()
+    click.echo(f'{corrected} unread counters corrected.')
+
+
+skills_group = AppGroup('skills', help='Manage the skill taxonomy.')
+
+
+@skills_group.command('rebuild')
+def rebuild_skills():
+    """Re-link projects and developers to skills from their skill strings.
+
+    Needed only after writing skill strings without the ORM (bulk loads or
+    manual SQL); ORM writes keep the links current.
+    """
+    from app.services.skill_service import SkillService
+
+    links = SkillService.rebuild()
+    click.echo(f'{links} skill links written.')
+
+
+@skills_group.command('alias')
+@click.argument('skill')
+@click.argument('alias')
+def add_skill_alias(skill, alias):
+    """Make ALIAS resolve to SKILL in filters and profiles."""
+    from app import db
+    from app.services.skill_service import SkillService
+
+    SkillService.add_alias(skill, alias)
+    db.session.commit()
+    click.echo(f'"{alias}" now resolves to {skill}.')
+
+
+matches_group = AppGroup('matches', help='Manage precomputed developer/project matches.')
+
+
+@matches_group.command('refresh')
+def refresh_matches():
+    """Recompute all match scores.
+
+    Profile and project edits refresh their own matches as they are saved;
+    run this nightly (e.g. from cron) to pick up reputation changes and
+    rebalance every project's top matches.
+    """
+    from app import db
+    from app.services.match_service import MatchService
+
+    rows = MatchService.refresh_all()
+    db.session.commit()
+    click.echo(f'{rows} match scores stored.')
+
+
+analytics_group = AppGroup('analytics', help='Maintain the analytics rollup tables.')
+
+
+@analytics_group.command('rebuild')
+def rebuild_analytics():
+    """Recompute the company, project and daily rollups from scratch.
+
+    The rollups are kept up to date as changes are made and backfilled by
+    their migration; run this after loading rows without the application.
+    """
+    from app.services.analytics import Analytics
+
+    companies = Analytics.rebuild()
+    click.echo(f'Analytics rebuilt for {companies} companies.')
+
+
+@click.command('worker')
+@click.option('--burst', is_flag=True, help='Exit once no job is due instead of waiting for more.')
+@click.option('--max-jobs', type=int, help='Exit after processing this many jobs.')
+@click.option('--worker-id', help='Name recorded on claimed jobs (default: host:pid).')
+@with_appcontext
+def worker_command(burst, max_jobs, worker_id):
+    """Process background jobs until interrupted."""
+    import signal
+    import threading
+    from app.services.jobs import JobQueue
+
+    # Finish the current job on SIGTERM/Ctrl-C, then exit
+    stop = threading.Event()
+    handlers = {signum: signal.signal(signum, lambda *args: stop.set())
+                for signum in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        processed = JobQueue.work(worker_id=worker_id, burst=burst, max_jobs=max_jobs, stop=stop)
+    finally:
+        for signum, handler in handlers.items():
+            signal.signal(signum, handler)
+    click.echo(f'{processed} jobs processed.')
+
+
+jobs_group = AppGroup('jobs', help='Inspect and maintain the background job queue.')
+
+
+@jobs_group.command('status')
+def job_status():
+    """Show the number of jobs in each status."""
+    from app.services.jobs import JobQueue
+
+    counts = JobQueue.counts()
+    for status in ('pending', 'running', 'done', 'failed'):
+        click.echo(f'{status:<10}{counts.get(status, 0)}')
+
+
+@jobs_group.command('purge')
+@click.option('--days', default=7, show_default=True, help='Keep finished jobs this many days.')
+def purge_jobs(days):
+    """Delete finished and failed jobs older than --days."""
+    from app.services.jobs import JobQueue
+
+    deleted = JobQueue.purge(days)
+    click.echo(f'{deleted} jobs deleted.')
+
+
+digests_group = AppGroup('digests', help='Send notification digest emails.')
+
+
+@digests_group.command('send')
+@click.option('--enqueue', is_flag=True, help='Queue the run for a worker instead of sending now.')
+def send_digests(enqueue):
+    """Email users their unread notifications.
+
+    Run this every few minutes (e.g. from cron); each user gets at most one
+    digest per DIGEST_WINDOW_MINUTES.
+    """
+    from app import db
+    from app.services.digest_service import DigestService
+    from app.services.jobs import JobQueue
+
+    if enqueue:
+        JobQueue.enqueue('digests.send')
+        db.session.commit()
+        click.echo('Digest run queued.')
+        return
+    sent = DigestService.run()
+    click.echo(f'{sent} digests sent.')
+
+
+lifecycle_group = AppGroup('lifecycle', help='Expire overdue projects and send deadline reminders.')
+
+
+@lifecycle_group.command('run')
+@click.option('--enqueue', is_flag=True, help='Queue the run for a worker instead of running now.')
+def run_lifecycle(enqueue):
+    """Expire open projects past their deadline and send due reminders.
+
+    Run this every few minutes (e.g. from cron); each project is reminded
+    once, LIFECYCLE_REMINDER_HOURS before its deadline.
+    """
+    from app import db
+    from app.services.jobs import JobQueue
+    from app.services.lifecycle_service import ProjectLifecycle
+
+    if enqueue:
+        JobQueue.enqueue('lifecycle.run')
+        db.session.commit()
+        click.echo('Lifecycle run queued.')
+        return
+    record = ProjectLifecycle.run()
+    click.echo(f'{record.expired_count} projects expired, {record.reminded_count} reminded '
+               f'({record.notification_count} notifications).')
+
+
+@lifecycle_group.command('history')
+@click.option('--limit', default=10, show_default=True, help='Number of runs to show.')
+def lifecycle_history(limit):
+    """Show the most recent lifecycle runs."""
+    from app.services.lifecycle_service import ProjectLifecycle
+
+    for run in ProjectLifecycle.history(limit):
+        if run.error:
+            outcome = 'failed'
+        elif run.finished_at is None:
+            outcome = 'running'
+        else:
+            outcome = f'{(run.finished_at - run.started_at).total_seconds():.1f}s'
+        click.echo(f'{run.started_at:%Y-%m-%d %H:%M:%S}  {outcome:>8}  expired={run.expired_count} '
+                   f'reminded={run.reminded_count} notifications={run.notification_count}')
+
+
+@lifecycle_group.command('purge')
+@click.option('--days', default=30, show_default=True, help='Keep run records this many days.')
+def purge_lifecycle_runs(days):
+    """Delete lifecycle run records older than --days."""
+    from app.services.lifecycle_service import ProjectLifecycle
+
+    deleted = ProjectLifecycle.purge(days)
+    click.echo(f'{deleted} runs deleted.')
+
+
+def register_commands(app):
+    """Attach the application's CLI command groups"""
+    # Commands on the Flask-Migrate "db" group register when this module imports
+    app.cli.add_command(counters_group)
+    app.cli.add_command(skills_group)
+    app.cli.add_command(matches_group)
+    app.cli.add_command(analytics_group)
+    app.cli.add_command(worker_command)
+    app.cli.add_command(jobs_group)
+    app.cli.add_command(digests_group)
+    app.cli.add_command(lifecycle_group)
@@ -0,0 +1,193 @@
+import heapq
+import hmac
+import logging
+import threading
+import time
+from bisect import bisect_left
+from flask import current_app, g, request, has_request_context, Response, abort
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class RequestStats:
+    """SQL activity for one request"""
+
+    def __init__(self, keep_slowest):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_time = 0.0
+        self.keep_slowest = keep_slowest
+        self._slowest = []
+
+    def record(self, statement, duration):
+        self.query_count += 1
+        self.db_time += duration
+        entry = (duration, self.query_count, statement)
+        if len(self._slowest) < self.keep_slowest:
+            heapq.heappush(self._slowest, entry)
+        elif duration > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    @property
+    def slowest(self):
+        """(duration, statement) pairs, slowest first"""
+        return [(d, s) for d, _, s in sorted(self._slowest, reverse=True)]
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum:.6f}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+class QueryMetrics:
+    """Per-request SQL query counts and timings.
+
+    Adds a ``Server-Timing`` header to every response, logs requests slower
+    than QUERY_METRICS_SLOW_REQUEST_MS with their slowest statements, and
+    serves per-endpoint histograms in Prometheus text format at
+    QUERY_METRICS_PATH. Histograms are kept per worker process, so a scrape
+    reports only the worker that served it. Outside debug mode the endpoint
+    is only served with QUERY_METRICS_TOKEN set, to requests bearing it.
+
+    The cursor hooks only read a clock and append to a small heap, so the
+    extension is cheap enough to leave enabled in production.
+    """
+
+    METRICS = (
+        ('collab_request_duration_seconds', 'Request duration in seconds', 'duration'),
+        ('collab_request_db_seconds', 'Time spent in SQL per request in seconds', 'db_time'),
+        ('collab_request_queries', 'SQL statements executed per request', 'queries'),
+    )
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not app.config['QUERY_METRICS_ENABLED']:
+            return
+
+        app.extensions['query_metrics'] = self
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule(app.config['QUERY_METRICS_PATH'], 'metrics', self._metrics_view)
+
+        # Listeners are registered on the Engine class, so they cover every
+        # engine the app creates; register them once per process
+        if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    def add_collector(self, app, collector):
+        """Include the lines returned by ``collector()`` in the app's metrics output.
+
+        Collectors are kept per app, so each app built from the shared
+        extension renders its own once.
+        """
+        app.extensions.setdefault('query_metrics_collectors', []).append(collector)
+
+    def _before_request(self):
+        g.query_stats = RequestStats(current_app.config['QUERY_METRICS_SLOWEST'])
+
+    def _after_request(self, response):
+        stats = g.pop('query_stats', None)
+        if stats is None:
+            return response
+
+        duration = time.perf_counter() - stats.started
+        config = current_app.config
+        if config['QUERY_METRICS_SERVER_TIMING']:
+            response.headers.add(
+                'Server-Timing',
+                f'db;dur={stats.db_time * 1000:.1f};desc="{stats.query_count} queries", '
+                f'app;dur={duration * 1000:.1f}'
+            )
+
+        if duration * 1000 >= config['QUERY_METRICS_SLOW_REQUEST_MS']:
+            logger.warning(
+                'Slow request %s %s (%s): %.1fms, %d queries, %.1fms in SQL%s',
+                request.method, request.path, request.endpoint, duration * 1000,
+                stats.query_count, stats.db_time * 1000,
+                ''.join(f'\n  {d * 1000:.1f}ms {s[:500]}' for d, s in stats.slowest)
+            )
+
+        self._observe(request.endpoint or 'unmatched', duration, stats)
+        return response
+
+    def _observe(self, endpoint, duration, stats):
+        with self._lock:
+            histograms = self._histograms.get(endpoint)
+            if histograms is None:
+                histograms = self._histograms[endpoint] = {
+                    'duration': Histogram(DURATION_BUCKETS),
+                    'db_time': Histogram(DURATION_BUCKETS),
+                    'queries': Histogram(QUERY_COUNT_BUCKETS),
+                }
+            histograms['duration'].observe(duration)
+            histograms['db_time'].observe(stats.db_time)
+            histograms['queries'].observe(stats.query_count)
+
+    def render(self):
+        """Current histograms and the current app's collectors in Prometheus text exposition format"""
+        with self._lock:
+            lines = []
+            for name, help_text, key in self.METRICS:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for endpoint, histograms in sorted(self._histograms.items()):
+                    lines.extend(histograms[key].render(name, f'endpoint="{endpoint}"'))
+        for collector in current_app.extensions.get('query_metrics_collectors', ()):
+            lines.extend(collector())
+        return '\n'.join(lines) + '\n'
+
+    def _metrics_view(self):
+        token = current_app.config['QUERY_METRICS_TOKEN']
+        if not token:
+            # Never exposed without a token outside local development
+            if not current_app.debug:
+                abort(404)
+        elif not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            abort(403)
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # The start time lives on the execution context, so a failed statement
+    # leaves nothing behind for the next one to pick up
+    if context is not None and has_request_context() and 'query_stats' in g:
+        context._query_metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_query_metrics_start', None)
+    if started is None:
+        return
+    stats = g.get('query_stats')
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - started)
@@ -33,6 +33,10 @@ class User(UserMixin, db.Model):
         return f'<User {self.username}>'
 
 class CompanyProfile(db.Model):
+    __table_args__ = (
+        db.Index('ix_company_profile_user_id', 'user_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     company_name = db.Column(db.String(200), nullable=False)
@@ -44,6 +48,10 @@ class CompanyProfile(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class DeveloperProfile(db.Model):
+    __table_args__ = (
+        db.Index('ix_developer_profile_user_id', 'user_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     full_name = db.Column(db.String(200), nullable=False)
@@ -55,8 +63,22 @@ class DeveloperProfile(db.Model):
     linkedin_url = db.Column(db.String(200))
     reputation_score = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    # Parsed from `skills` by SkillService whenever it changes
+    skill_tags = db.relationship('Skill', secondary='developer_skill', order_by='Skill.name')
 
 class Project(db.Model):
+    __table_args__ = (
+        # Project listing and homepage: filter_by(status).order_by(created_at desc),
+        # with id as the keyset tie-breaker
+        db.Index('ix_project_status_created_at_id', 'status', 'created_at', 'id'),
+        # Company dashboard: company_id filter ordered by created_at
+        db.Index('ix_project_company_id_created_at', 'company_id', 'created_at'),
+        # Lifecycle runs: active projects past or nearing their deadline
+        db.Index('ix_project_status_deadline', 'status', 'deadline'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     company_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     title = db.Column(db.String(200), nullable=False)
@@ -66,27 +88,104 @@ class Project(db.Model):
     winner_reward = db.Column(db.Float, nullable=False)
     participation_reward = db.Column(db.Float, default=0)
     max_shortlist = db.Column(db.Integer, default=10)
-    status = db.Column(db.String(20), default='open')  # open, shortlisting, submission, completed, cancelled
+    status = db.Column(db.String(20), default='open')  # open, shortlisting, submission, completed, cancelled, expired
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Set once the deadline reminders for this project have been sent
+    reminded_at = db.Column(db.DateTime)
     
     # Relationships
     applications = db.relationship('Application', backref='project', lazy='dynamic', cascade='all, delete-orphan')
     submissions = db.relationship('Submission', backref='project', lazy='dynamic', cascade='all, delete-orphan')
     messages = db.relationship('Message', backref='project', lazy='dynamic', cascade='all, delete-orphan')
+    # Parsed from `required_skills` by SkillService whenever it changes
+    skill_tags = db.relationship('Skill', secondary='project_skill', order_by='Skill.name')
+    
+    # Relevance and highlighted excerpt, loaded by ProjectSearch.search()
+    search_rank = db.query_expression()
+    search_snippet = db.query_expression()
 
 class Application(db.Model):
+    __table_args__ = (
+        # Duplicate-application check and project access checks
+        db.Index('ix_application_project_id_developer_id', 'project_id', 'developer_id'),
+        # Shortlist counts per project
+        db.Index('ix_application_project_id_status', 'project_id', 'status'),
+        # Developer dashboard ordered by applied_at
+        db.Index('ix_application_developer_id_applied_at', 'developer_id', 'applied_at'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
     developer_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     cover_letter = db.Column(db.Text)
     status = db.Column(db.String(20), default='pending')  # pending, shortlisted, rejected
     applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+    shortlisted_at = db.Column(db.DateTime)
     
     # Relationships
     submission = db.relationship('Submission', backref='application', uselist=False)
 
+# Number of applications per project. Deferred so it is only computed where a
+# query asks for it with undefer(); the subquery is an index-only count per
+# returned row, so listing pages stay at one query however many rows they show.
+Project.application_count = db.column_property(
+    db.select(db.func.count())
+    .where(Application.project_id == Project.id)
+    .correlate_except(Application)
+    .scalar_subquery(),
+    deferred=True
+)
+
+# Full-text search over title, skills and description, maintained by the
+# database rather than the ORM: a generated tsvector column with a GIN index
+# on PostgreSQL, and an external-content FTS5 table kept in sync by triggers
+# on SQLite. Neither is mapped; app/services/search.py queries them. These
+# DDL hooks cover db.create_all(); migrations create the same objects.
+PROJECT_SEARCH_POSTGRESQL = [
+    """ALTER TABLE project ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(required_skills, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED""",
+    'CREATE INDEX ix_project_search_vector ON project USING gin (search_vector)',
+]
+PROJECT_SEARCH_SQLITE = [
+    """CREATE VIRTUAL TABLE project_fts USING fts5(
+        title, required_skills, description,
+        content='project', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER project_fts_insert AFTER INSERT ON project BEGIN
+        INSERT INTO project_fts (rowid, title, required_skills, description)
+        VALUES (new.id, new.title, new.required_skills, new.description);
+    END""",
+    """CREATE TRIGGER project_fts_delete AFTER DELETE ON project BEGIN
+        INSERT INTO project_fts (project_fts, rowid, title, required_skills, description)
+        VALUES ('delete', old.id, old.title, old.required_skills, old.description);
+    END""",
+    """CREATE TRIGGER project_fts_update AFTER UPDATE OF title, required_skills, description ON project BEGIN
+        INSERT INTO project_fts (project_fts, rowid, title, required_skills, description)
+        VALUES ('delete', old.id, old.title, old.required_skills, old.description);
+        INSERT INTO project_fts (rowid, title, required_skills, description)
+        VALUES (new.id, new.title, new.required_skills, new.description);
+    END""",
+]
+
+for _statement in PROJECT_SEARCH_POSTGRESQL:
+    db.event.listen(Project.__table__, 'after_create',
+                    db.DDL(_statement).execute_if(dialect='postgresql'))
+for _statement in PROJECT_SEARCH_SQLITE:
+    db.event.listen(Project.__table__, 'after_create',
+                    db.DDL(_statement).execute_if(dialect='sqlite'))
+db.event.listen(Project.__table__, 'before_drop',
+                db.DDL('DROP TABLE IF EXISTS project_fts').execute_if(dialect='sqlite'))
+
 class Submission(db.Model):
+    __table_args__ = (
+        db.Index('ix_submission_application_id', 'application_id'),
+        db.Index('ix_submission_project_id', 'project_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     application_id = db.Column(db.Integer, db.ForeignKey('application.id'), nullable=False)
     project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
@@ -100,6 +199,16 @@ class Submission(db.Model):
     submitted_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class Message(db.Model):
+    __table_args__ = (
+        # Thread lookups by (sender, recipient) pair, keyset-paginated on id
+        db.Index('ix_message_sender_id_recipient_id_id', 'sender_id', 'recipient_id', 'id'),
+        db.Index('ix_message_recipient_id_sender_id_id', 'recipient_id', 'sender_id', 'id'),
+        # Unread messages for a recipient (partial on databases that support it)
+        db.Index('ix_message_recipient_id_sender_id_unread', 'recipient_id', 'sender_id',
+                 postgresql_where=db.text('is_read = false'),
+                 sqlite_where=db.text('is_read = 0')),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     project_id = db.Column(db.Integer, db.ForeignKey('project.id'), nullable=False)
     sender_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -113,6 +222,15 @@ class Message(db.Model):
     recipient = db.relationship('User', foreign_keys=[recipient_id], backref='received_messages')
 
 class Notification(db.Model):
+    __table_args__ = (
+        # Notification list ordered by created_at desc
+        db.Index('ix_notification_user_id_created_at', 'user_id', 'created_at'),
+        # Unread count per user (partial on databases that support it)
+        db.Index('ix_notification_user_id_unread', 'user_id',
+                 postgresql_where=db.text('is_read = false'),
+                 sqlite_where=db.text('is_read = 0')),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     title = db.Column(db.String(200), nullable=False)
@@ -122,4 +240,184 @@ class Notification(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
-    user = db.relationship('User', backref='notifications')
\ No newline at end of file
+    user = db.relationship('User', backref='notifications')
+
+class Conversation(db.Model):
+    # One row per (user, partner) thread, maintained by MessageService on send
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'partner_id', name='uq_conversation_user_id_partner_id'),
+        # Conversation list ordered by latest message
+        db.Index('ix_conversation_user_id_last_sent_at', 'user_id', 'last_sent_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    partner_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    last_message_id = db.Column(db.Integer, db.ForeignKey('message.id', ondelete='SET NULL'))
+    last_sent_at = db.Column(db.DateTime, default=datetime.utcnow)
+    unread_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    # Relationships
+    partner = db.relationship('User', foreign_keys=[partner_id])
+    last_message = db.relationship('Message', foreign_keys=[last_message_id])
+
+class Skill(db.Model):
+    # Canonical skill; `slug` is the normalized name used for matching
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    slug = db.Column(db.String(100), unique=True, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    aliases = db.relationship('SkillAlias', backref='skill', cascade='all, delete-orphan')
+    
+    def __repr__(self):
+        return f'<Skill {self.name}>'
+
+class SkillAlias(db.Model):
+    # Alternative spelling that resolves to a skill, e.g. "js" -> JavaScript
+    id = db.Column(db.Integer, primary_key=True)
+    skill_id = db.Column(db.Integer, db.ForeignKey('skill.id', ondelete='CASCADE'), nullable=False)
+    alias = db.Column(db.String(100), unique=True, nullable=False)
+
+# Inverted indexes from skill to projects and developers: the primary keys
+# serve lookups by owner, the (skill_id, ...) indexes serve skill filters
+project_skill = db.Table(
+    'project_skill',
+    db.Column('project_id', db.Integer, db.ForeignKey('project.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('skill_id', db.Integer, db.ForeignKey('skill.id', ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_project_skill_skill_id_project_id', 'skill_id', 'project_id'),
+)
+
+developer_skill = db.Table(
+    'developer_skill',
+    db.Column('developer_profile_id', db.Integer, db.ForeignKey('developer_profile.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('skill_id', db.Integer, db.ForeignKey('skill.id', ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_developer_skill_skill_id_developer_profile_id', 'skill_id', 'developer_profile_id'),
+)
+
+class MatchScore(db.Model):
+    # Precomputed developer/project fit, maintained by MatchService. Holds each
+    # developer's and each active project's top matches plus every applicant.
+    __table_args__ = (
+        # Recommended projects for a developer
+        db.Index('ix_match_score_developer_profile_id_score', 'developer_profile_id', 'score'),
+        # Ranked developers and applicants for a project
+        db.Index('ix_match_score_project_id_score', 'project_id', 'score'),
+    )
+
+    developer_profile_id = db.Column(db.Integer, db.ForeignKey('developer_profile.id', ondelete='CASCADE'), primary_key=True)
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id', ondelete='CASCADE'), primary_key=True)
+    score = db.Column(db.Float, nullable=False)
+    skill_score = db.Column(db.Float, nullable=False)
+    matched_skills = db.Column(db.Integer, nullable=False, default=0)
+    computed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    project = db.relationship('Project')
+    developer_profile = db.relationship('DeveloperProfile')
+
+class Job(db.Model):
+    # Background job queue, written and claimed by app.services.jobs
+    __table_args__ = (
+        # Claiming: oldest due pending job first
+        db.Index('ix_job_status_run_at', 'status', 'run_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default='{}')  # JSON keyword arguments
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, running, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = db.Column(db.DateTime)
+    locked_by = db.Column(db.String(100))
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    
+    def __repr__(self):
+        return f'<Job {self.id} {self.name} {self.status}>'
+
+class NotificationDigest(db.Model):
+    # Per-user email digest state, maintained by DigestService
+    __table_args__ = (
+        # Users whose digest is due
+        db.Index('ix_notification_digest_due_at', 'due_at'),
+    )
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    # Newest notification already covered by a digest (or predating digests)
+    last_notification_id = db.Column(db.Integer, nullable=False, default=0)
+    last_sent_at = db.Column(db.DateTime)
+    # Set while new notifications wait for the user's next digest
+    due_at = db.Column(db.DateTime)
+
+class DigestCursor(db.Model):
+    # Single row: the newest notification id DigestService has collected
+    id = db.Column(db.Integer, primary_key=True)
+    last_notification_id = db.Column(db.Integer, nullable=False, default=0)
+
+class LifecycleRun(db.Model):
+    # One row per ProjectLifecycle run, for `flask lifecycle history`
+    id = db.Column(db.Integer, primary_key=True)
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    # Projects moved to 'expired', and projects whose reminders were sent
+    expired_count = db.Column(db.Integer, nullable=False, default=0)
+    reminded_count = db.Column(db.Integer, nullable=False, default=0)
+    notification_count = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.Text)
+
+    def __repr__(self):
+        return f'<LifecycleRun {self.id} expired={self.expired_count} reminded={self.reminded_count}>'
+
+class CompanyStats(db.Model):
+    # Per-company rollup, maintained incrementally by app.services.analytics
+    company_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    projects = db.Column(db.Integer, nullable=False, default=0)
+    # Projects currently in each status
+    open_projects = db.Column(db.Integer, nullable=False, default=0)
+    shortlisting_projects = db.Column(db.Integer, nullable=False, default=0)
+    submission_projects = db.Column(db.Integer, nullable=False, default=0)
+    completed_projects = db.Column(db.Integer, nullable=False, default=0)
+    expired_projects = db.Column(db.Integer, nullable=False, default=0)
+    applications = db.Column(db.Integer, nullable=False, default=0)
+    shortlisted = db.Column(db.Integer, nullable=False, default=0)
+    submissions = db.Column(db.Integer, nullable=False, default=0)
+    scored_submissions = db.Column(db.Integer, nullable=False, default=0)
+    score_total = db.Column(db.Integer, nullable=False, default=0)
+    # Projects with a shortlist, and the summed time from creation to their first shortlisting
+    shortlisted_projects = db.Column(db.Integer, nullable=False, default=0)
+    shortlist_seconds_total = db.Column(db.Float, nullable=False, default=0)
+
+class ProjectStats(db.Model):
+    # Per-project rollup, maintained incrementally by app.services.analytics
+    __table_args__ = (
+        # Company analytics: a company's projects
+        db.Index('ix_project_stats_company_id', 'company_id'),
+    )
+
+    project_id = db.Column(db.Integer, db.ForeignKey('project.id', ondelete='CASCADE'), primary_key=True)
+    company_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    applications = db.Column(db.Integer, nullable=False, default=0)
+    shortlisted = db.Column(db.Integer, nullable=False, default=0)
+    submissions = db.Column(db.Integer, nullable=False, default=0)
+    scored_submissions = db.Column(db.Integer, nullable=False, default=0)
+    score_total = db.Column(db.Integer, nullable=False, default=0)
+    first_shortlisted_at = db.Column(db.DateTime)
+
+class DailyStats(db.Model):
+    # Per-company activity per day (UTC), maintained incrementally by app.services.analytics
+    __table_args__ = (
+        # Platform-wide series: every company's rows for a range of days
+        db.Index('ix_daily_stats_day', 'day'),
+    )
+
+    company_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    projects_created = db.Column(db.Integer, nullable=False, default=0)
+    applications = db.Column(db.Integer, nullable=False, default=0)
+    shortlisted = db.Column(db.Integer, nullable=False, default=0)
+    submissions = db.Column(db.Integer, nullable=False, default=0)
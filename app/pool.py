@@ -0,0 +1,112 @@
+import logging
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool, Pool
+from app.metrics import Histogram, DURATION_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+
+def engine_options(config, url=None):
+    """SQLAlchemy engine options for the DATABASE_POOL_* settings.
+
+    'queue' keeps a pool of DATABASE_POOL_SIZE connections per worker
+    process. 'null' opens a connection per checkout and closes it on
+    return, for serverless instances and for an external pooler such as
+    PgBouncer, which then does the pooling. pg8000 only uses unnamed
+    prepared statements, so it works with PgBouncer's transaction mode
+    without further settings. ``url`` defaults to the primary database;
+    read replicas pass their own.
+    """
+    url = make_url(url or config['SQLALCHEMY_DATABASE_URI'])
+    if config['DATABASE_POOL'] == 'null':
+        return {'poolclass': NullPool}
+    if url.get_backend_name() == 'sqlite':
+        # Keep Flask-SQLAlchemy's SQLite defaults (in-memory databases need a static pool)
+        return {}
+    return {
+        'pool_size': config['DATABASE_POOL_SIZE'],
+        'max_overflow': config['DATABASE_MAX_OVERFLOW'],
+        'pool_timeout': config['DATABASE_POOL_TIMEOUT'],
+        'pool_recycle': config['DATABASE_POOL_RECYCLE'],
+        'pool_pre_ping': config['DATABASE_POOL_PRE_PING'],
+    }
+
+
+def describe(engine):
+    """One-line summary of an engine's effective pool settings"""
+    pool = engine.pool
+    parts = [f'{type(pool).__name__} for {engine.url.render_as_string(hide_password=True)}']
+    if hasattr(pool, 'size') and hasattr(pool, 'overflow'):
+        parts.append(f'size={pool.size()} max_overflow={pool._max_overflow} timeout={pool._timeout}s')
+    parts.append(f'recycle={pool._recycle}s pre_ping={pool._pre_ping}')
+    return ' '.join(parts)
+
+
+class PoolMetrics:
+    """Per-process connection pool counters, exported on the metrics endpoint.
+
+    Counts new connections, checkouts and invalidations, and how long each
+    checkout held its connection; the current pool occupancy is read from
+    the engine when the metrics are rendered.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.invalidations = 0
+        self.held = Histogram(DURATION_BUCKETS)
+
+    def install(self):
+        # Listeners go on the Pool class, so they cover every engine; once per process
+        if not event.contains(Pool, 'checkout', self._on_checkout):
+            event.listen(Pool, 'connect', self._on_connect)
+            event.listen(Pool, 'checkout', self._on_checkout)
+            event.listen(Pool, 'checkin', self._on_checkin)
+            event.listen(Pool, 'invalidate', self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        connection_record.info['checked_out_at'] = time.perf_counter()
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        started = connection_record.info.pop('checked_out_at', None)
+        if started is not None:
+            with self._lock:
+                self.held.observe(time.perf_counter() - started)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def render(self, engine):
+        """Counters and gauges in Prometheus text exposition format"""
+        pool = engine.pool
+        lines = []
+        with self._lock:
+            for name, help_text, value in (
+                ('collab_db_pool_connects_total', 'Database connections opened', self.connects),
+                ('collab_db_pool_checkouts_total', 'Connections checked out of the pool', self.checkouts),
+                ('collab_db_pool_invalidations_total', 'Connections discarded after errors', self.invalidations),
+            ):
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} counter', f'{name} {value}']
+            name = 'collab_db_pool_checkout_seconds'
+            lines += [f'# HELP {name} How long checkouts held their connection',
+                      f'# TYPE {name} histogram']
+            lines += self.held.render(name, f'pool="{type(pool).__name__}"')
+        if hasattr(pool, 'checkedout') and hasattr(pool, 'overflow'):
+            for name, help_text, value in (
+                ('collab_db_pool_checked_out', 'Connections currently checked out', pool.checkedout()),
+                ('collab_db_pool_idle', 'Idle connections in the pool', pool.checkedin()),
+                ('collab_db_pool_overflow', 'Connections open beyond the pool size', max(pool.overflow(), 0)),
+            ):
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} gauge', f'{name} {value}']
+        return lines
@@ -0,0 +1,153 @@
+import random
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event, text
+from sqlalchemy.sql import Select
+from app.pool import engine_options
+
+# Replicas are Flask-SQLAlchemy binds named replica_0, replica_1, ...
+BIND_PREFIX = 'replica_'
+# Holds the time until which a visitor's reads stay on the primary
+STICKY_COOKIE = 'primary_until'
+
+
+def replica_binds(config):
+    """SQLALCHEMY_BINDS entries for the DATABASE_REPLICA_URLS setting"""
+    return {f'{BIND_PREFIX}{index}': {'url': url, **engine_options(config, url)}
+            for index, url in enumerate(config['DATABASE_REPLICA_URLS'])}
+
+
+def replication_lag(engine):
+    """Seconds since a PostgreSQL standby replayed its last transaction.
+
+    None for other databases, and for servers that aren't standbys.
+    """
+    if engine.dialect.name != 'postgresql':
+        return None
+    with engine.connect() as connection:
+        lag = connection.execute(text(
+            'SELECT EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())')).scalar()
+    return None if lag is None else float(lag)
+
+
+def copy_sqlite(primary_engine, replica_engine):
+    """Copy a SQLite primary into a SQLite replica, to try out routing locally"""
+    if primary_engine.dialect.name != 'sqlite' or replica_engine.dialect.name != 'sqlite':
+        raise ValueError('Only SQLite databases can be copied; use streaming replication for PostgreSQL')
+    source = primary_engine.raw_connection()
+    target = replica_engine.raw_connection()
+    try:
+        source.driver_connection.backup(target.driver_connection)
+    finally:
+        target.close()
+        source.close()
+
+
+class RoutingSession(Session):
+    """Session that sends plain SELECTs to the request's read replica.
+
+    Writes, flushes and SELECT ... FOR UPDATE always go to the primary, as
+    does everything outside a view marked with @read_replica. Once a
+    request has written, the rest of it reads from the primary too.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and isinstance(clause, Select) \
+                and clause._for_update_arg is None:
+            replica = ReplicaRouter.current_bind()
+            if replica is not None:
+                return self._db.engines[replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaRouter:
+    """Read replica routing with read-your-writes stickiness.
+
+    A request that writes sets the primary_until cookie, and @read_replica
+    views keep that visitor on the primary until it expires, so replication
+    lag never hides their own changes from them.
+    """
+
+    @staticmethod
+    def init_app(app):
+        if ReplicaRouter.replicas(app):
+            app.after_request(ReplicaRouter._set_sticky_cookie)
+
+    @staticmethod
+    def replicas(app=None):
+        """Bind keys of the configured replicas"""
+        binds = (app or current_app).config['SQLALCHEMY_BINDS']
+        return sorted(key for key in binds if key.startswith(BIND_PREFIX))
+
+    @staticmethod
+    def current_bind():
+        """The replica bind key this request reads from, or None for the primary"""
+        if not has_request_context() or g.get('wrote_to_primary') or g.get('use_primary'):
+            return None
+        return g.get('read_replica')
+
+    @staticmethod
+    def sticky():
+        """Whether this visitor wrote recently enough to need the primary"""
+        try:
+            return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+        except ValueError:
+            return False
+
+    @staticmethod
+    def _set_sticky_cookie(response):
+        if g.get('wrote_to_primary'):
+            window = current_app.config['REPLICA_STICKY_SECONDS']
+            response.set_cookie(STICKY_COOKIE, str(time.time() + window), max_age=window,
+                                httponly=True, samesite='Lax')
+        return response
+
+
+def read_replica(view):
+    """Serve a view's reads from a replica, unless the visitor just wrote"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        replicas = ReplicaRouter.replicas()
+        if replicas and not ReplicaRouter.sticky():
+            # One replica per request, so a page never mixes two replicas' lag
+            g.read_replica = random.choice(replicas)
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def primary():
+    """Read from the primary inside the block.
+
+    For reads whose results are cached and shared, which must not capture
+    a lagging replica's state.
+    """
+    if not has_request_context():
+        yield
+        return
+    previous = g.get('use_primary', False)
+    g.use_primary = True
+    try:
+        yield
+    finally:
+        g.use_primary = previous
+
+
+def _mark_write():
+    if has_request_context():
+        g.wrote_to_primary = True
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_flush(session, flush_context):
+    _mark_write()
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _track_bulk_write(orm_execute_state):
+    # Bulk INSERT/UPDATE/DELETE statements bypass the flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _mark_write()
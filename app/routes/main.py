@@ -1,20 +1,37 @@
-from flask import render_template, redirect, url_for, flash, request, jsonify
+from flask import render_template, redirect, url_for, flash, request, jsonify, Response, current_app
 from flask_login import login_required, current_user
+from sqlalchemy.orm import joinedload, selectinload, undefer
 from app import db
 from app.routes import bp
-from app.routes.forms import ProjectForm, ApplicationForm, SubmissionForm, MessageForm, FeedbackForm
-from app.models import Project, Application, Submission, Message, Notification, User
+from app.models import Project, Application, Submission, Message, Notification, User, DeveloperProfile
 from app.services.notification_service import NotificationService
+from app.services.message_service import MessageService
+from app.services.project_service import ProjectService, REVIEW_ACTIONS, MAX_REVIEW_BATCH
+from app.services.search import ProjectSearch
+from app.services.project_listing import ProjectListing
+from app.services.skill_service import SkillService
+from app.services.match_service import MatchService
+from app.services.analytics import Analytics
+from app.services.jobs import JobQueue
+from app.services.page_cache import cached_page, project_scope, LISTING
+from app.replicas import read_replica
+from app.services.conditional import conditional_json
+from app.services.realtime import get_broker, format_event
 from datetime import datetime
-import json
+import queue
+import time
 
 @bp.route('/')
+@cached_page(LISTING)
+@read_replica
 def index():
     if current_user.is_authenticated:
         return redirect(url_for('main.dashboard'))
     
     # Get recent projects for homepage
-    recent_projects = Project.query.filter_by(status='open').order_by(Project.created_at.desc()).limit(6).all()
+    recent_projects = Project.query.filter_by(status='open')\
+        .options(selectinload(Project.skill_tags))\
+        .order_by(Project.created_at.desc()).limit(6).all()
     return render_template('index.html', projects=recent_projects)
 
 @bp.route('/dashboard')
@@ -27,63 +44,200 @@ def dashboard():
 
 @bp.route('/company-dashboard')
 @login_required
+@read_replica
 def company_dashboard():
     if current_user.role != 'company':
         flash('Access denied.', 'error')
         return redirect(url_for('main.index'))
     
-    projects = current_user.projects.order_by(Project.created_at.desc()).all()
+    projects = current_user.projects.options(undefer(Project.application_count))\
+        .order_by(Project.created_at.desc()).all()
     
-    # Calculate stats
-    total_projects = len(projects)
-    active_projects = len([p for p in projects if p.status in ['open', 'shortlisting', 'submission']])
-    completed_projects = len([p for p in projects if p.status == 'completed'])
+    # Stats come from the company's analytics rollup row
+    stats = Analytics.summary(Analytics.company(current_user.id))
     
     return render_template('company/dashboard.html', 
                          projects=projects,
-                         total_projects=total_projects,
-                         active_projects=active_projects,
-                         completed_projects=completed_projects)
+                         stats=stats,
+                         total_projects=stats['projects'],
+                         active_projects=stats['active_projects'],
+                         completed_projects=stats['completed_projects'])
 
 @bp.route('/developer-dashboard')
 @login_required
+@read_replica
 def developer_dashboard():
     if current_user.role != 'developer':
         flash('Access denied.', 'error')
         return redirect(url_for('main.index'))
     
-    applications = current_user.applications.order_by(Application.applied_at.desc()).all()
-    
-    # Calculate stats
-    total_applications = len(applications)
-    shortlisted = len([a for a in applications if a.status == 'shortlisted'])
-    submissions = len([a for a in applications if a.submission])
-    wins = len([a for a in applications if a.submission and a.submission.is_winner])
+    applications = current_user.applications.options(
+        joinedload(Application.submission),
+        joinedload(Application.project)
+            .joinedload(Project.company_user)
+            .joinedload(User.company_profile)
+    ).order_by(Application.applied_at.desc()).all()
+    
+    # Calculate stats: applications, submissions and wins per status
+    stats = db.session.query(
+        Application.status,
+        db.func.count(Application.id),
+        db.func.count(Submission.id),
+        db.func.count(db.case((Submission.is_winner == True, 1)))
+    ).outerjoin(Submission, Submission.application_id == Application.id)\
+        .filter(Application.developer_id == current_user.id)\
+        .group_by(Application.status).all()
+    
+    total_applications = sum(row[1] for row in stats)
+    shortlisted = sum(row[1] for row in stats if row[0] == 'shortlisted')
+    submissions = sum(row[2] for row in stats)
+    wins = sum(row[3] for row in stats)
+    
+    recommended = []
+    if current_user.developer_profile:
+        recommended = MatchService.recommended_projects(current_user.developer_profile.id, current_user.id)
     
     return render_template('developer/dashboard.html',
                          applications=applications,
+                         recommended=recommended,
                          total_applications=total_applications,
                          shortlisted=shortlisted,
                          submissions=submissions,
                          wins=wins)
 
+def _listing_options():
+    # Everything a project card shows, loaded with the page
+    return (
+        undefer(Project.application_count),
+        joinedload(Project.company_user).joinedload(User.company_profile),
+        selectinload(Project.skill_tags)
+    )
+
 @bp.route('/projects')
+@cached_page(LISTING)
+@read_replica
 def projects():
     page = request.args.get('page', 1, type=int)
+    search_query = request.args.get('q', '').strip()
     skill_filter = request.args.get('skill', '')
+    skill_match = request.args.get('skill_match', 'all')
     status_filter = request.args.get('status', 'open')
-    
-    query = Project.query.filter_by(status=status_filter)
-    
-    if skill_filter:
-        query = query.filter(Project.required_skills.contains(skill_filter))
-    
-    projects = query.order_by(Project.created_at.desc()).paginate(
-        page=page, per_page=12, error_out=False)
-    
-    return render_template('projects/list.html', projects=projects, skill_filter=skill_filter)
+    skills = SkillService.parse(skill_filter) if skill_filter else None
+    
+    if not search_query:
+        # Newest first, paged by cursor so deep pages cost the same as the first
+        listing = ProjectListing.page(status_filter, skills, match_all=skill_match != 'any',
+                                      after=request.args.get('after'), options=_listing_options())
+        return render_template('projects/list.html', projects=listing, listing=listing,
+                               skill_filter=skill_filter, skill_match=skill_match,
+                               search_query=search_query, status_filter=status_filter)
+    
+    # Search results are ordered by relevance, so they keep numbered pages
+    query = ProjectSearch.search(search_query, status_filter).options(*_listing_options())
+    if skills:
+        query = SkillService.filter_projects(query, skills, match_all=skill_match != 'any')
+    
+    projects = query.paginate(page=page, per_page=ProjectListing.PER_PAGE, error_out=False)
+    
+    return render_template('projects/list.html', projects=projects, listing=None,
+                         skill_filter=skill_filter, skill_match=skill_match,
+                         search_query=search_query, status_filter=status_filter)
+
+@bp.route('/api/projects')
+@cached_page(LISTING)
+@read_replica
+def list_projects():
+    """A page of the project listing for infinite scroll.
+
+    Takes the /projects filters plus ``after`` (the previous page's
+    ``next`` cursor) and returns the rendered cards with the next cursor.
+    """
+    skill_filter = request.args.get('skill', '')
+    listing = ProjectListing.page(
+        request.args.get('status', 'open'),
+        SkillService.parse(skill_filter) if skill_filter else None,
+        match_all=request.args.get('skill_match', 'all') != 'any',
+        after=request.args.get('after'),
+        per_page=min(max(request.args.get('limit', ProjectListing.PER_PAGE, type=int), 1), 50),
+        options=_listing_options()
+    )
+    return jsonify({
+        'total': listing.total,
+        'next': listing.next_cursor,
+        'projects': [{
+            'id': project.id,
+            'title': project.title,
+            'status': project.status,
+            'deadline': project.deadline.isoformat(),
+            'winner_reward': project.winner_reward,
+            'url': url_for('main.project_detail', id=project.id)
+        } for project in listing.items],
+        'html': render_template('projects/_cards.html', projects=listing.items)
+    })
+
+@bp.route('/api/analytics')
+@login_required
+@read_replica
+def analytics():
+    """Rollup statistics: the company's own for companies, platform-wide otherwise"""
+    days = max(1, min(request.args.get('days', 30, type=int), 365))
+    if current_user.role == 'company':
+        return jsonify({
+            'scope': 'company',
+            'summary': Analytics.summary(Analytics.company(current_user.id)),
+            'daily': Analytics.daily(current_user.id, days),
+            'projects': [{
+                'id': project.id,
+                'title': project.title,
+                'status': project.status,
+                **Analytics.summary(stats)
+            } for project, stats in Analytics.projects(current_user.id)]
+        })
+    return jsonify({
+        'scope': 'platform',
+        'summary': Analytics.summary(Analytics.platform()),
+        'daily': Analytics.daily(days=days),
+    })
+
+@bp.route('/api/projects/search')
+@read_replica
+def search_projects():
+    """Ranked full-text search over projects, with highlighted snippets"""
+    search_query = request.args.get('q', '').strip()
+    status_filter = request.args.get('status', 'open')
+    page = request.args.get('page', 1, type=int)
+    per_page = min(request.args.get('per_page', 12, type=int), 50)
+    
+    if not search_query:
+        return jsonify({'success': False, 'error': 'Missing search query'})
+    
+    results = ProjectSearch.search(search_query, status_filter)\
+        .options(selectinload(Project.skill_tags))\
+        .paginate(page=page, per_page=per_page, error_out=False)
+    
+    return jsonify({
+        'success': True,
+        'query': search_query,
+        'page': results.page,
+        'pages': results.pages,
+        'total': results.total,
+        'results': [{
+            'id': project.id,
+            'title': project.title,
+            'status': project.status,
+            'required_skills': project.required_skills,
+            'skills': [skill.name for skill in project.skill_tags],
+            'deadline': project.deadline.isoformat(),
+            'winner_reward': project.winner_reward,
+            'rank': project.search_rank,
+            'snippet': str(ProjectSearch.highlight(project.search_snippet)),
+            'url': url_for('main.project_detail', id=project.id)
+        } for project in results.items]
+    })
 
 @bp.route('/project/<int:id>')
+@cached_page(lambda id: project_scope(id))
+@read_replica
 def project_detail(id):
     project = Project.query.get_or_404(id)
     
@@ -104,6 +258,7 @@ def create_project():
         flash('Only companies can create projects.', 'error')
         return redirect(url_for('main.index'))
     
+    from app.routes.forms import ProjectForm
     form = ProjectForm()
     if form.validate_on_submit():
         project = Project(
@@ -118,6 +273,9 @@ def create_project():
         )
         
         db.session.add(project)
+        db.session.flush()
+        JobQueue.enqueue('matches.refresh_project', {'project_id': project.id})
+        Analytics.project_created(project)
         db.session.commit()
         
         flash('Project created successfully!', 'success')
@@ -142,10 +300,12 @@ def apply_project(project_id):
         flash('You have already applied to this project.', 'warning')
         return redirect(url_for('main.project_detail', id=project_id))
     
-    if project.status != 'open':
+    # The deadline counts even before the next lifecycle run expires the project
+    if project.status != 'open' or project.deadline < datetime.utcnow():
         flash('This project is no longer accepting applications.', 'error')
         return redirect(url_for('main.project_detail', id=project_id))
     
+    from app.routes.forms import ApplicationForm
     form = ApplicationForm()
     if form.validate_on_submit():
         application = Application(
@@ -155,15 +315,20 @@ def apply_project(project_id):
         )
         
         db.session.add(application)
-        db.session.commit()
+        Analytics.application_created(project)
         
         # Send notification to company
         NotificationService.create_notification(
             project.company_id,
             'New Application',
             f'{current_user.username} applied to your project "{project.title}"',
-            'application'
+            'application',
+            commit=False
         )
+        if current_user.developer_profile:
+            db.session.flush()
+            MatchService.score_pair(current_user.developer_profile.id, project_id)
+        db.session.commit()
         
         flash('Application submitted successfully!', 'success')
         return redirect(url_for('main.project_detail', id=project_id))
@@ -179,15 +344,24 @@ def manage_project(project_id):
         flash('Access denied.', 'error')
         return redirect(url_for('main.index'))
     
-    applications = project.applications.order_by(Application.applied_at.desc()).all()
+    applications = project.applications.options(
+        joinedload(Application.developer_user).joinedload(User.developer_profile)
+            .selectinload(DeveloperProfile.skill_tags)
+    ).order_by(Application.applied_at.desc()).all()
+    # Best-matching applicants first; unscored ones keep their order at the end
+    match_scores = MatchService.applicant_scores(project.id)
+    applications.sort(key=lambda app: match_scores.get(app.developer_id, -1), reverse=True)
     shortlisted = [app for app in applications if app.status == 'shortlisted']
+    # Applications are already in the identity map, so submission.application
+    # resolves without a query
     submissions = project.submissions.all()
     
     return render_template('projects/manage.html', 
                          project=project, 
                          applications=applications,
                          shortlisted=shortlisted,
-                         submissions=submissions)
+                         submissions=submissions,
+                         match_scores=match_scores)
 
 @bp.route('/shortlist/<int:application_id>')
 @login_required
@@ -199,33 +373,43 @@ def shortlist_application(application_id):
         flash('Access denied.', 'error')
         return redirect(url_for('main.index'))
     
-    # Check if we can still shortlist
-    current_shortlisted = Application.query.filter_by(
-        project_id=project.id, status='shortlisted').count()
-    
-    if current_shortlisted >= project.max_shortlist:
-        flash('Maximum shortlist limit reached.', 'error')
-        return redirect(url_for('main.manage_project', project_id=project.id))
-    
-    application.status = 'shortlisted'
-    db.session.commit()
-    
-    # Update project status if needed
-    if project.status == 'open':
-        project.status = 'shortlisting'
-        db.session.commit()
-    
-    # Send notification to developer
-    NotificationService.create_notification(
-        application.developer_id,
-        'Shortlisted!',
-        f'You have been shortlisted for project "{project.title}"',
-        'shortlist'
-    )
-    
-    flash('Application shortlisted successfully!', 'success')
+    result, = ProjectService.review_applications(project.id, [application.id], 'shortlist')
+    if result['ok']:
+        flash('Application shortlisted successfully!', 'success')
+    elif result['status'] == 'shortlisted':
+        flash('This application is already shortlisted.', 'info')
+    else:
+        flash(f"{result['error']}.", 'error')
     return redirect(url_for('main.manage_project', project_id=project.id))
 
+@bp.route('/api/projects/<int:project_id>/applications/review', methods=['POST'])
+@login_required
+def review_applications(project_id):
+    """Shortlist or reject many applications at once, reporting each one's outcome"""
+    project = Project.query.get_or_404(project_id)
+    if project.company_id != current_user.id:
+        return jsonify({'success': False, 'error': 'Access denied'}), 403
+    
+    data = request.get_json(silent=True) or {}
+    action = data.get('action')
+    application_ids = data.get('application_ids')
+    if action not in REVIEW_ACTIONS:
+        return jsonify({'success': False, 'error': 'Action must be shortlist or reject'}), 400
+    if not isinstance(application_ids, list) or not application_ids \
+            or not all(isinstance(i, int) and not isinstance(i, bool) for i in application_ids):
+        return jsonify({'success': False, 'error': 'application_ids must be a list of ids'}), 400
+    if len(application_ids) > MAX_REVIEW_BATCH:
+        return jsonify({'success': False,
+                        'error': f'At most {MAX_REVIEW_BATCH} applications per request'}), 400
+    
+    results = ProjectService.review_applications(project.id, application_ids, action)
+    return jsonify({
+        'success': True,
+        'action': action,
+        'changed': sum(1 for r in results if r['ok']),
+        'results': results
+    })
+
 @bp.route('/submit/<int:application_id>', methods=['GET', 'POST'])
 @login_required
 def submit_work(application_id):
@@ -244,6 +428,7 @@ def submit_work(application_id):
         flash('You have already submitted work for this project.', 'warning')
         return redirect(url_for('main.project_detail', id=application.project_id))
     
+    from app.routes.forms import SubmissionForm
     form = SubmissionForm()
     if form.validate_on_submit():
         submission = Submission(
@@ -256,20 +441,22 @@ def submit_work(application_id):
         )
         
         db.session.add(submission)
+        Analytics.submission_created(application.project)
         
         # Update project status if this is the first submission
         if application.project.status == 'shortlisting':
             application.project.status = 'submission'
-        
-        db.session.commit()
+            Analytics.project_status_changed(application.project.company_id, 'shortlisting', 'submission')
         
         # Send notification to company
         NotificationService.create_notification(
             application.project.company_id,
             'New Submission',
             f'{current_user.username} submitted work for "{application.project.title}"',
-            'submission'
+            'submission',
+            commit=False
         )
+        db.session.commit()
         
         flash('Work submitted successfully!', 'success')
         return redirect(url_for('main.project_detail', id=application.project_id))
@@ -285,8 +472,10 @@ def submission_feedback(submission_id):
         flash('Access denied.', 'error')
         return redirect(url_for('main.index'))
     
+    from app.routes.forms import FeedbackForm
     form = FeedbackForm()
     if form.validate_on_submit():
+        Analytics.submission_scored(submission.project, submission.score, form.score.data)
         submission.score = form.score.data
         submission.feedback = form.feedback.data
         db.session.commit()
@@ -311,61 +500,27 @@ def declare_winner(submission_id):
         flash('Access denied.', 'error')
         return redirect(url_for('main.index'))
     
-    # Mark as winner
-    submission.is_winner = True
-    project.status = 'completed'
-    
-    # Update reputation scores
-    winner_profile = submission.application.developer_user.developer_profile
-    if winner_profile:
-        winner_profile.reputation_score += 10
-    
-    # Give participation rewards to all shortlisted candidates
-    shortlisted_apps = Application.query.filter_by(
-        project_id=project.id, status='shortlisted').all()
-    
-    for app in shortlisted_apps:
-        if app.submission:
-            dev_profile = app.developer_user.developer_profile
-            if dev_profile:
-                dev_profile.reputation_score += 2
-    
-    db.session.commit()
-    
-    # Send notifications
-    NotificationService.create_notification(
-        submission.application.developer_id,
-        'Congratulations! You Won!',
-        f'You won the project "{project.title}" and earned ${project.winner_reward}!',
-        'winner'
-    )
+    if project.status == 'completed':
+        flash('A winner has already been declared for this project.', 'error')
+        return redirect(url_for('main.manage_project', project_id=project.id))
+    
+    ProjectService.declare_winner(project, submission)
     
     flash('Winner declared successfully!', 'success')
     return redirect(url_for('main.manage_project', project_id=project.id))
 
 @bp.route('/messages')
 @login_required
+@read_replica
 def messages():
-    # Get all conversations for current user
-    sent_messages = Message.query.filter_by(sender_id=current_user.id).all()
-    received_messages = Message.query.filter_by(recipient_id=current_user.id).all()
-    
-    # Group by conversation partner
-    conversations = {}
-    for msg in sent_messages + received_messages:
-        partner_id = msg.recipient_id if msg.sender_id == current_user.id else msg.sender_id
-        if partner_id not in conversations:
-            conversations[partner_id] = []
-        conversations[partner_id].append(msg)
-    
-    # Sort conversations by latest message
-    for partner_id in conversations:
-        conversations[partner_id].sort(key=lambda x: x.sent_at, reverse=True)
+    # One summary row per conversation; messages load when a thread is opened
+    conversations = MessageService.get_conversations(current_user.id)
     
     return render_template('messages/list.html', conversations=conversations)
 
 @bp.route('/notifications')
 @login_required
+@read_replica
 def notifications():
     notifications = NotificationService.get_user_notifications(current_user.id)
     return render_template('notifications/list.html', notifications=notifications)
@@ -379,37 +534,62 @@ def mark_notification_read(notification_id):
 @bp.route('/api/notifications/unread-count')
 @login_required
 def unread_notifications_count():
+    # The count is served from the unread counter cache, so it is its own version
     count = NotificationService.get_unread_count(current_user.id)
-    return jsonify({'count': count})
+    return conditional_json(lambda: count, lambda: {'count': count})
+
+@bp.route('/api/notifications/stream')
+@login_required
+def notification_stream():
+    """Server-Sent Events stream of unread-count changes and new notifications"""
+    user_id = current_user.id
+    timeout = current_app.config['NOTIFICATION_STREAM_TIMEOUT']
+    keepalive = current_app.config['NOTIFICATION_STREAM_KEEPALIVE']
+    
+    broker = get_broker()
+    subscription = broker.subscribe(user_id)
+    count = NotificationService.get_unread_count(user_id)
+    # Don't hold a database connection for the life of the stream
+    db.session.close()
+    
+    def stream():
+        try:
+            yield 'retry: 5000\n'
+            yield format_event({'type': 'unread-count', 'count': count})
+            deadline = time.monotonic() + timeout
+            while time.monotonic() < deadline:
+                try:
+                    event = subscription.get(timeout=min(keepalive, max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    yield ': keepalive\n\n'
+                    continue
+                yield format_event(event)
+        finally:
+            broker.unsubscribe(user_id, subscription)
+    
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 @bp.route('/api/messages/<int:partner_id>')
 @login_required
 def get_messages(partner_id):
-    """Get all messages between current user and partner"""
-    messages = Message.query.filter(
-        ((Message.sender_id == current_user.id) & (Message.recipient_id == partner_id)) |
-        ((Message.sender_id == partner_id) & (Message.recipient_id == current_user.id))
-    ).order_by(Message.sent_at.asc()).all()
-    
-    # Mark received messages as read
-    Message.query.filter_by(
-        sender_id=partner_id,
-        recipient_id=current_user.id,
-        is_read=False
-    ).update({'is_read': True})
-    db.session.commit()
-    
-    messages_data = []
-    for msg in messages:
-        messages_data.append({
-            'id': msg.id,
-            'sender_id': msg.sender_id,
-            'recipient_id': msg.recipient_id,
-            'content': msg.content,
-            'sent_at': msg.sent_at.isoformat(),
-            'is_read': msg.is_read
-        })
-    
-    return jsonify({'success': True, 'messages': messages_data})
+    """Get a page of messages between current user and partner.
+
+    Query args: ``limit`` (default 50, max 100), ``before_id`` to page back
+    through older history and ``after_id`` to fetch only newer messages.
+    """
+    limit = min(max(request.args.get('limit', 50, type=int), 1), 100)
+    before_id = request.args.get('before_id', type=int)
+    after_id = request.args.get('after_id', type=int)
+    
+    def build():
+        return MessageService.read_thread(
+            current_user.id, partner_id, before_id=before_id, after_id=after_id, limit=limit)
+    
+    # Idle polls end here with a 304, before the thread is queried
+    return conditional_json(lambda: MessageService.thread_version(current_user.id, partner_id), build)
 
 @bp.route('/api/messages/send', methods=['POST'])
 @login_required
@@ -420,9 +600,14 @@ def send_message():
     if not data or 'recipient_id' not in data or 'content' not in data:
         return jsonify({'success': False, 'error': 'Missing required fields'})
     
-    recipient_id = data['recipient_id']
+    # Ids may arrive as strings, but conversation summaries are looked up by int
+    try:
+        recipient_id = int(data['recipient_id'])
+        project_id = data.get('project_id')  # Optional project context
+        project_id = int(project_id) if project_id else None
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'Invalid recipient or project id'}), 400
     content = data['content'].strip()
-    project_id = data.get('project_id')  # Optional project context
     
     if not content or len(content) > 500:
         return jsonify({'success': False, 'error': 'Invalid message content'})
@@ -448,24 +633,8 @@ def send_message():
         if not (is_company_owner or has_applied):
             return jsonify({'success': False, 'error': 'No access to this project'})
     
-    # Create new message
-    message = Message(
-        sender_id=current_user.id,
-        recipient_id=recipient_id,
-        content=content,
-        project_id=project_id
-    )
-    
-    db.session.add(message)
-    db.session.commit()
-    
-    # Create notification for recipient
-    NotificationService.create_notification(
-        recipient_id,
-        'New Message',
-        f'{current_user.username} sent you a message',
-        'message'
-    )
+    # Create new message; the recipient is notified by a background job
+    message = MessageService.send_message(current_user.id, recipient_id, content, project_id)
     
     return jsonify({'success': True, 'message_id': message.id})
 
@@ -485,25 +654,10 @@ def compose_message(recipient_id):
     if project_id:
         project = Project.query.get(project_id)
     
+    from app.routes.forms import MessageForm
     form = MessageForm()
     if form.validate_on_submit():
-        message = Message(
-            sender_id=current_user.id,
-            recipient_id=recipient_id,
-            content=form.content.data,
-            project_id=project_id
-        )
-        
-        db.session.add(message)
-        db.session.commit()
-        
-        # Create notification for recipient
-        NotificationService.create_notification(
-            recipient_id,
-            'New Message',
-            f'{current_user.username} sent you a message',
-            'message'
-        )
+        MessageService.send_message(current_user.id, recipient_id, form.content.data, project_id)
         
         flash('Message sent successfully!', 'success')
         return redirect(url_for('main.messages'))
@@ -515,11 +669,7 @@ def compose_message(recipient_id):
 def mark_all_notifications_read():
     """Mark all notifications as read for current user"""
     try:
-        Notification.query.filter_by(
-            user_id=current_user.id,
-            is_read=False
-        ).update({'is_read': True})
-        db.session.commit()
+        NotificationService.mark_all_as_read(current_user.id)
         return jsonify({'success': True})
     except Exception as e:
         db.session.rollback()
@@ -529,17 +679,9 @@ def mark_all_notifications_read():
 @login_required
 def delete_notification(notification_id):
     """Delete a notification"""
-    notification = Notification.query.filter_by(
-        id=notification_id,
-        user_id=current_user.id
-    ).first()
-    
-    if not notification:
-        return jsonify({'success': False, 'error': 'Notification not found'})
-    
     try:
-        db.session.delete(notification)
-        db.session.commit()
+        if not NotificationService.delete_notification(notification_id, current_user.id):
+            return jsonify({'success': False, 'error': 'Notification not found'})
         return jsonify({'success': True})
     except Exception as e:
         db.session.rollback()
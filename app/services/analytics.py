@@ -0,0 +1,299 @@
+from collections import Counter
+from datetime import datetime, timedelta
+from functools import partial
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from app.models import Project, Application, Submission, CompanyStats, ProjectStats, DailyStats
+from app.services.hooks import before_commit, transaction_state
+
+# CompanyStats columns counting the projects in each status
+STATUS_COLUMNS = {
+    'open': 'open_projects',
+    'shortlisting': 'shortlisting_projects',
+    'submission': 'submission_projects',
+    'completed': 'completed_projects',
+    'expired': 'expired_projects',
+}
+ACTIVE_STATUSES = ('open', 'shortlisting', 'submission')
+
+
+class Analytics:
+    """Pre-aggregated statistics per company, per project and per company-day.
+
+    Routes and services report domain events (a project created, an
+    application shortlisted, ...). The resulting deltas are summed per row
+    for the transaction and written just before it commits, as one upsert
+    per touched row, so the rollups commit atomically with the changes they
+    count and stats pages read a handful of rows instead of scanning
+    history. ``rebuild`` recomputes every rollup from the source tables,
+    for upgrades and after bulk loads that bypass the events.
+    """
+
+    # Domain events
+
+    @staticmethod
+    def project_created(project):
+        """A new project, after it has been flushed"""
+        created_at = project.created_at or datetime.utcnow()
+        Analytics._add(ProjectStats, {'project_id': project.id}, first={'company_id': project.company_id})
+        Analytics._add(CompanyStats, {'company_id': project.company_id},
+                       projects=1, **{STATUS_COLUMNS[project.status or 'open']: 1})
+        Analytics._add(DailyStats, {'company_id': project.company_id, 'day': created_at.date()},
+                       projects_created=1)
+
+    @staticmethod
+    def project_status_changed(company_id, old_status, new_status, count=1):
+        """``count`` of a company's projects moved from one status to another"""
+        changes = Counter()
+        if old_status in STATUS_COLUMNS:
+            changes[STATUS_COLUMNS[old_status]] -= count
+        if new_status in STATUS_COLUMNS:
+            changes[STATUS_COLUMNS[new_status]] += count
+        if changes:
+            Analytics._add(CompanyStats, {'company_id': company_id}, **changes)
+
+    @staticmethod
+    def application_created(project):
+        Analytics._count(project, 'applications')
+
+    @staticmethod
+    def application_shortlisted(project, shortlisted_at, first, count=1):
+        """``count`` applications were shortlisted; ``first`` if they are the project's first"""
+        Analytics._count(project, 'shortlisted', shortlisted_at, count)
+        if first:
+            Analytics._add(ProjectStats, {'project_id': project.id},
+                           first={'first_shortlisted_at': shortlisted_at})
+            Analytics._add(CompanyStats, {'company_id': project.company_id}, shortlisted_projects=1,
+                           shortlist_seconds_total=(shortlisted_at - project.created_at).total_seconds())
+
+    @staticmethod
+    def submission_created(project):
+        Analytics._count(project, 'submissions')
+
+    @staticmethod
+    def submission_scored(project, old_score, new_score):
+        """A submission's score changed; unscored submissions have a score of 0"""
+        changes = {'score_total': (new_score or 0) - (old_score or 0)}
+        if bool(new_score) != bool(old_score):
+            changes['scored_submissions'] = 1 if new_score else -1
+        Analytics._add(ProjectStats, {'project_id': project.id}, first={'company_id': project.company_id},
+                       **changes)
+        Analytics._add(CompanyStats, {'company_id': project.company_id}, **changes)
+
+    @staticmethod
+    def _count(project, column, now=None, count=1):
+        # More of something on the project, its company and today
+        day = (now or datetime.utcnow()).date()
+        Analytics._add(ProjectStats, {'project_id': project.id}, first={'company_id': project.company_id},
+                       **{column: count})
+        Analytics._add(CompanyStats, {'company_id': project.company_id}, **{column: count})
+        Analytics._add(DailyStats, {'company_id': project.company_id, 'day': day}, **{column: count})
+
+    # Incremental writes
+
+    @staticmethod
+    def _add(model, key, first=None, **increments):
+        # Deltas for one rollup row, written by _write before the commit.
+        # ``first`` values are only set if the row doesn't have them yet.
+        pending = transaction_state('analytics', dict)
+        if not pending:
+            before_commit(partial(Analytics._write, pending))
+        _, totals, initial = pending.setdefault((model, tuple(key.items())), (key, Counter(), {}))
+        totals.update(increments)
+        for column, value in (first or {}).items():
+            initial.setdefault(column, value)
+
+    @staticmethod
+    def _write(pending, session):
+        dialect = session.get_bind(mapper=CompanyStats).dialect.name
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        # Popped as written, so events recorded by later hooks start a new batch
+        for row_id in list(pending):
+            key, totals, initial = pending.pop(row_id)
+            table = row_id[0].__table__
+            statement = insert(table).values(**key, **totals, **initial)
+            changes = {column: table.c[column] + statement.excluded[column] for column in totals}
+            changes.update({column: db.func.coalesce(table.c[column], statement.excluded[column])
+                            for column in initial})
+            if changes:
+                statement = statement.on_conflict_do_update(index_elements=list(key), set_=changes)
+            else:
+                statement = statement.on_conflict_do_nothing(index_elements=list(key))
+            session.execute(statement)
+
+    # Reads
+
+    @staticmethod
+    def company(company_id):
+        """A company's rollup row, or None before its first project"""
+        return db.session.get(CompanyStats, company_id)
+
+    @staticmethod
+    def platform():
+        """Totals over every company, in the shape of a CompanyStats row"""
+        columns = [c for c in CompanyStats.__table__.c if c.name != 'company_id']
+        return db.session.query(*[db.func.sum(c).label(c.name) for c in columns]).one()
+
+    @staticmethod
+    def projects(company_id, limit=50):
+        """(Project, ProjectStats) pairs for a company's newest projects"""
+        return db.session.query(Project, ProjectStats)\
+            .join(ProjectStats, ProjectStats.project_id == Project.id)\
+            .filter(Project.company_id == company_id)\
+            .order_by(Project.created_at.desc()).limit(limit).all()
+
+    @staticmethod
+    def daily(company_id=None, days=30):
+        """Activity per day for the last ``days`` days, oldest first, without gaps"""
+        since = datetime.utcnow().date() - timedelta(days=days - 1)
+        columns = ('projects_created', 'applications', 'shortlisted', 'submissions')
+        query = db.session.query(DailyStats.day, *[db.func.sum(getattr(DailyStats, c)) for c in columns])\
+            .filter(DailyStats.day >= since)
+        if company_id is not None:
+            query = query.filter(DailyStats.company_id == company_id)
+        rows = {row[0]: row[1:] for row in query.group_by(DailyStats.day)}
+        series = []
+        for offset in range(days):
+            day = since + timedelta(days=offset)
+            values = rows.get(day) or (0,) * len(columns)
+            series.append({'day': day.isoformat(), **{c: int(v or 0) for c, v in zip(columns, values)}})
+        return series
+
+    @staticmethod
+    def summary(stats):
+        """Counts and derived rates from a CompanyStats or ProjectStats row (or None)"""
+        def get(name):
+            return getattr(stats, name, None) or 0
+
+        projects = get('projects')
+        shortlisted = get('shortlisted')
+        scored = get('scored_submissions')
+        summary = {
+            'applications': get('applications'),
+            'shortlisted': shortlisted,
+            'submissions': get('submissions'),
+            # Shortlisted developers who went on to submit work
+            'submission_rate': round(get('submissions') / shortlisted, 3) if shortlisted else None,
+            'average_score': round(get('score_total') / scored, 2) if scored else None,
+        }
+        if isinstance(stats, ProjectStats):
+            first = stats.first_shortlisted_at
+            summary['first_shortlisted_at'] = first.isoformat() if first else None
+            return summary
+
+        shortlisted_projects = get('shortlisted_projects')
+        summary.update({
+            'projects': projects,
+            'active_projects': sum(get(STATUS_COLUMNS[s]) for s in ACTIVE_STATUSES),
+            **{column: get(column) for column in STATUS_COLUMNS.values()},
+            'applications_per_project': round(summary['applications'] / projects, 2) if projects else None,
+            'average_hours_to_shortlist': round(get('shortlist_seconds_total') / shortlisted_projects / 3600, 1)
+            if shortlisted_projects else None,
+        })
+        return summary
+
+    # Rebuilding
+
+    @staticmethod
+    def rebuild():
+        """Recompute every rollup from the source tables with set-based statements.
+
+        Runs in one transaction, so readers see the old rollups until it
+        commits. Returns the number of companies.
+        """
+        db.session.execute(db.delete(DailyStats))
+        db.session.execute(db.delete(ProjectStats))
+        db.session.execute(db.delete(CompanyStats))
+
+        Analytics._rebuild_projects()
+        Analytics._rebuild_companies()
+        Analytics._rebuild_daily()
+        companies = db.session.query(db.func.count()).select_from(CompanyStats).scalar()
+        db.session.commit()
+        return companies
+
+    @staticmethod
+    def _rebuild_projects():
+        applications = db.select(
+            Application.project_id,
+            db.func.count().label('applications'),
+            db.func.count(db.case((Application.status == 'shortlisted', 1))).label('shortlisted'),
+            db.func.min(Application.shortlisted_at).label('first_shortlisted_at'),
+        ).group_by(Application.project_id).subquery()
+        submissions = db.select(
+            Submission.project_id,
+            db.func.count().label('submissions'),
+            db.func.count(db.case((Submission.score != 0, 1))).label('scored_submissions'),
+            db.func.coalesce(db.func.sum(Submission.score), 0).label('score_total'),
+        ).group_by(Submission.project_id).subquery()
+        db.session.execute(db.insert(ProjectStats).from_select(
+            ['project_id', 'company_id', 'applications', 'shortlisted', 'first_shortlisted_at',
+             'submissions', 'scored_submissions', 'score_total'],
+            db.select(
+                Project.id, Project.company_id,
+                db.func.coalesce(applications.c.applications, 0),
+                db.func.coalesce(applications.c.shortlisted, 0),
+                applications.c.first_shortlisted_at,
+                db.func.coalesce(submissions.c.submissions, 0),
+                db.func.coalesce(submissions.c.scored_submissions, 0),
+                db.func.coalesce(submissions.c.score_total, 0),
+            ).outerjoin(applications, applications.c.project_id == Project.id)
+            .outerjoin(submissions, submissions.c.project_id == Project.id)
+        ))
+
+    @staticmethod
+    def _rebuild_companies():
+        # Seconds from creation to first shortlisting, per project
+        if db.session.get_bind(mapper=CompanyStats).dialect.name == 'postgresql':
+            shortlist_seconds = db.func.extract('epoch', ProjectStats.first_shortlisted_at - Project.created_at)
+        else:
+            shortlist_seconds = (db.func.julianday(ProjectStats.first_shortlisted_at) -
+                                 db.func.julianday(Project.created_at)) * 86400
+        status_counts = [db.func.count(db.case((Project.status == status, 1)))
+                         for status in STATUS_COLUMNS]
+        db.session.execute(db.insert(CompanyStats).from_select(
+            ['company_id', 'projects', *STATUS_COLUMNS.values(), 'applications', 'shortlisted',
+             'submissions', 'scored_submissions', 'score_total', 'shortlisted_projects',
+             'shortlist_seconds_total'],
+            db.select(
+                Project.company_id, db.func.count(), *status_counts,
+                db.func.sum(ProjectStats.applications), db.func.sum(ProjectStats.shortlisted),
+                db.func.sum(ProjectStats.submissions), db.func.sum(ProjectStats.scored_submissions),
+                db.func.sum(ProjectStats.score_total),
+                db.func.count(ProjectStats.first_shortlisted_at),
+                db.func.coalesce(db.func.sum(shortlist_seconds), 0),
+            ).join(ProjectStats, ProjectStats.project_id == Project.id)
+            .group_by(Project.company_id)
+        ))
+
+    @staticmethod
+    def _rebuild_daily():
+        # One grouped query per activity, summed into rows per company and day
+        activity = [
+            ('projects_created', db.select(Project.company_id, Project.created_at.label('at'))),
+            ('applications', db.select(Project.company_id, Application.applied_at.label('at'))
+                .join(Project, Project.id == Application.project_id)),
+            ('shortlisted', db.select(Project.company_id, Application.shortlisted_at.label('at'))
+                .join(Project, Project.id == Application.project_id)
+                .where(Application.shortlisted_at.isnot(None))),
+            ('submissions', db.select(Project.company_id, Submission.submitted_at.label('at'))
+                .join(Project, Project.id == Submission.project_id)),
+        ]
+        rows = {}
+        for column, events in activity:
+            events = events.subquery()
+            day = db.func.date(events.c.at)
+            for company_id, value, count in db.session.execute(
+                    db.select(events.c.company_id, day, db.func.count())
+                    .group_by(events.c.company_id, day)):
+                if value is None:
+                    continue
+                if isinstance(value, str):
+                    value = datetime.strptime(value, '%Y-%m-%d').date()
+                row = rows.setdefault((company_id, value), {'company_id': company_id, 'day': value})
+                row[column] = count
+        if rows:
+            db.session.execute(db.insert(DailyStats), [
+                {'projects_created': 0, 'applications': 0, 'shortlisted': 0, 'submissions': 0, **row}
+                for row in rows.values()
+            ])
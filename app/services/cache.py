@@ -0,0 +1,282 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+
+
+class LRUCache:
+    """In-process cache with least-recently-used eviction and per-key TTL.
+
+    Each worker holds its own copy, so values can differ between workers
+    for up to the TTL; use the Redis backend to share state.
+    """
+
+    def __init__(self, max_entries=10000, default_ttl=300):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def add(self, key, value, ttl=None):
+        """Set a value only if the key isn't cached; returns whether it was set"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > time.monotonic()):
+                return False
+            self._store(key, value, ttl)
+            return True
+
+    def _store(self, key, value, ttl):
+        # Callers hold the lock
+        ttl = self.default_ttl if ttl is None else ttl
+        self._data[key] = (value, time.monotonic() + ttl if ttl else None)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key, amount=1):
+        """Add to an integer value if it is cached; return the new value or None"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            value += amount
+            self._data[key] = (value, expires_at)
+            return value
+
+    def keys(self, prefix=''):
+        with self._lock:
+            return [key for key in self._data if key.startswith(prefix)]
+
+
+class FileSystemCache:
+    """Cache stored as one JSON file per key in a directory.
+
+    Shared by every worker on a host without running Redis. Writes are
+    atomic renames, but ``incr`` is a read-modify-write that is only safe
+    within one process, so keep unread counters on memory or redis.
+    """
+
+    # Check the entry limit every this many writes rather than on each one
+    PRUNE_INTERVAL = 100
+
+    def __init__(self, directory, max_entries=10000, default_ttl=300):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest())
+
+    def _read(self, path):
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry['expires_at'] is not None and entry['expires_at'] <= time.time():
+            self._remove(path)
+            return None
+        return entry
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def get(self, key):
+        entry = self._read(self._path(key))
+        return None if entry is None else entry['value']
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        self._write(key, value, time.time() + ttl if ttl else None)
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.PRUNE_INTERVAL == 0
+        if prune:
+            self._prune()
+
+    def add(self, key, value, ttl=None):
+        """Set a value only if the key isn't cached; returns whether it was set"""
+        ttl = self.default_ttl if ttl is None else ttl
+        path = self._path(key)
+        if self._read(path) is not None:
+            return False
+        tmp_path = self._temp_file(key, value, time.time() + ttl if ttl else None)
+        try:
+            # Unlike a rename, linking fails if the entry exists, so only one
+            # process can create it
+            os.link(tmp_path, path)
+            return True
+        except FileExistsError:
+            return False
+        finally:
+            self._remove(tmp_path)
+
+    def _write(self, key, value, expires_at):
+        # Write to a temporary file and rename, so readers never see a partial entry
+        tmp_path = self._temp_file(key, value, expires_at)
+        try:
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+
+    def _temp_file(self, key, value, expires_at):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'key': key, 'value': value, 'expires_at': expires_at}, f)
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        return tmp_path
+
+    def _prune(self):
+        # Evict the least recently written files beyond max_entries
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.startswith('.'):
+                    try:
+                        entries.append((entry.stat().st_mtime, entry.path))
+                    except FileNotFoundError:
+                        pass
+        if len(entries) > self.max_entries:
+            entries.sort()
+            for _, path in entries[:len(entries) - self.max_entries]:
+                self._remove(path)
+
+    def delete(self, key):
+        self._remove(self._path(key))
+
+    def incr(self, key, amount=1):
+        """Add to an integer value if it is cached; return the new value or None"""
+        with self._lock:
+            path = self._path(key)
+            entry = self._read(path)
+            if entry is None:
+                return None
+            value = entry['value'] + amount
+            self._write(key, value, entry['expires_at'])
+            return value
+
+    def keys(self, prefix=''):
+        keys = []
+        with os.scandir(self.directory) as it:
+            for file in it:
+                if not file.name.startswith('.'):
+                    entry = self._read(file.path)
+                    if entry is not None and entry['key'].startswith(prefix):
+                        keys.append(entry['key'])
+        return keys
+
+
+# Adds to a counter only if it exists, atomically: a missing counter must be
+# rebuilt from the database, not started from zero. INCRBY keeps the TTL.
+INCR_IF_EXISTS = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return redis.call('INCRBY', KEYS[1], ARGV[1])
+end
+return false
+"""
+
+
+class RedisCache:
+    """Cache backed by any client speaking the redis-py API.
+
+    Pass a ``redis.Redis`` instance in production, or a local stand-in such
+    as ``fakeredis.FakeRedis`` (with its ``lua`` extra) in development and
+    tests.
+    """
+
+    def __init__(self, client, prefix='collab:', default_ttl=300):
+        self.client = client
+        self.prefix = prefix
+        self.default_ttl = default_ttl
+        self._incr_if_exists = client.register_script(INCR_IF_EXISTS)
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return None if value is None else json.loads(value)
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        self.client.set(self.prefix + key, json.dumps(value), ex=ttl or None)
+
+    def add(self, key, value, ttl=None):
+        """Set a value only if the key isn't cached; returns whether it was set"""
+        ttl = self.default_ttl if ttl is None else ttl
+        return bool(self.client.set(self.prefix + key, json.dumps(value), ex=ttl or None, nx=True))
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def incr(self, key, amount=1):
+        """Add to an integer value if it is cached; return the new value or None"""
+        return self._incr_if_exists(keys=[self.prefix + key], args=[amount])
+
+    def keys(self, prefix=''):
+        keys = []
+        for key in self.client.scan_iter(match=f'{self.prefix}{prefix}*'):
+            key = key.decode() if isinstance(key, bytes) else key
+            keys.append(key[len(self.prefix):])
+        return keys
+
+
+def create_cache(app):
+    """Build the cache backend selected by CACHE_BACKEND"""
+    backend = app.config['CACHE_BACKEND']
+    ttl = app.config['CACHE_DEFAULT_TTL']
+    if backend == 'memory':
+        return LRUCache(max_entries=app.config['CACHE_MAX_ENTRIES'], default_ttl=ttl)
+    if backend == 'filesystem':
+        return FileSystemCache(app.config['CACHE_DIR'], max_entries=app.config['CACHE_MAX_ENTRIES'],
+                               default_ttl=ttl)
+    if backend == 'redis':
+        import redis
+        client = redis.Redis.from_url(app.config['CACHE_REDIS_URL'])
+        return RedisCache(client, prefix=app.config['CACHE_KEY_PREFIX'], default_ttl=ttl)
+    raise ValueError(f'Unknown CACHE_BACKEND: {backend}')
+
+
+def get_cache():
+    """Get the cache for the current app, creating it on first use"""
+    app = current_app._get_current_object()
+    cache = app.extensions.get('cache')
+    if cache is None:
+        cache = app.extensions.setdefault('cache', create_cache(app))
+    return cache
@@ -0,0 +1,29 @@
+import hashlib
+from flask import request, jsonify, Response
+
+
+def conditional_json(version, build):
+    """JSON response validated by a cheap version token.
+
+    ``version()`` returns a value that changes whenever the payload for
+    this URL would. Its ETag is checked against If-None-Match first, so an
+    unchanged resource gets a 304 without ``build()`` running. Otherwise
+    ``build()`` supplies the payload and ``version()`` is called again, as
+    building may itself change the resource (e.g. marking messages read).
+    """
+    def etag():
+        return hashlib.sha1(repr((version(), request.full_path)).encode()).hexdigest()
+
+    current = etag()
+    # If-None-Match compares weakly, and proxies that compress responses
+    # (nginx with gzip) send the ETag back weakened
+    if request.if_none_match.contains_weak(current):
+        response = Response(status=304)
+    else:
+        response = jsonify(build())
+        current = etag()
+    response.set_etag(current)
+    # Per-user data: browsers may keep it but must revalidate; proxies must not
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
@@ -0,0 +1,153 @@
+import logging
+import smtplib
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from flask import current_app, render_template
+from app import db
+from app.models import Notification, NotificationDigest, DigestCursor, User
+from app.services.jobs import job
+from app.services.mailer import Mailer
+
+logger = logging.getLogger(__name__)
+
+
+class DigestService:
+    """Batched email digests of unread notifications.
+
+    ``collect`` reads only notifications newer than the DigestCursor and
+    marks their users due at most once per DIGEST_WINDOW_MINUTES.
+    ``send_due`` then emails each due user their unread notifications since
+    the last digest, one templated email per user, over a single SMTP
+    connection. Run both periodically with ``flask digests send``.
+    """
+
+    @staticmethod
+    def run(now=None):
+        """Collect new notifications and send every due digest. Returns emails sent."""
+        DigestService.collect(now)
+        return DigestService.send_due(now)
+
+    @staticmethod
+    def collect(now=None):
+        """Mark users with new notifications as due; returns how many were marked"""
+        now = now or datetime.utcnow()
+        window = timedelta(minutes=current_app.config['DIGEST_WINDOW_MINUTES'])
+        newest = db.session.query(db.func.max(Notification.id)).scalar() or 0
+
+        cursor = db.session.get(DigestCursor, 1, with_for_update=True)
+        if cursor is None:
+            # First run: start from now rather than mailing out old history
+            db.session.add(DigestCursor(id=1, last_notification_id=newest))
+            db.session.commit()
+            return 0
+        if newest <= cursor.last_notification_id:
+            db.session.commit()
+            return 0
+
+        # Primary key range scan over the rows added since the last run
+        first_seen = dict(db.session.query(Notification.user_id, db.func.min(Notification.created_at))
+                          .filter(Notification.id > cursor.last_notification_id,
+                                  Notification.id <= newest)
+                          .group_by(Notification.user_id).all())
+        states = {state.user_id: state for state in
+                  NotificationDigest.query.filter(NotificationDigest.user_id.in_(first_seen))}
+
+        for user_id, created_at in first_seen.items():
+            state = states.get(user_id)
+            if state is None:
+                state = NotificationDigest(user_id=user_id,
+                                           last_notification_id=cursor.last_notification_id)
+                db.session.add(state)
+            due_at = (created_at or now) + window
+            if state.last_sent_at is not None:
+                due_at = max(due_at, state.last_sent_at + window)
+            if state.due_at is None or due_at < state.due_at:
+                state.due_at = due_at
+
+        cursor.last_notification_id = newest
+        db.session.commit()
+        return len(first_seen)
+
+    @staticmethod
+    def send_due(now=None):
+        """Email every user whose digest is due; returns the number of emails sent"""
+        now = now or datetime.utcnow()
+        config = current_app.config
+        mailer = Mailer.from_config(config)
+        if mailer is None:
+            logger.warning('MAIL_SERVER is not set; skipping notification digests')
+            return 0
+
+        sent = 0
+        with mailer:
+            while True:
+                due = NotificationDigest.query.filter(NotificationDigest.due_at <= now)\
+                    .order_by(NotificationDigest.due_at)\
+                    .limit(config['DIGEST_BATCH_SIZE']).all()
+                if not due:
+                    break
+                sent += DigestService._send_batch(mailer, due, now)
+                # Progress is saved per batch, so a failure resends at most one batch
+                db.session.commit()
+        return sent
+
+    @staticmethod
+    def _send_batch(mailer, states, now):
+        user_ids = [state.user_id for state in states]
+        users = {user.id: user for user in User.query.filter(User.id.in_(user_ids))}
+        unread = Notification.query\
+            .join(NotificationDigest, NotificationDigest.user_id == Notification.user_id)\
+            .filter(Notification.user_id.in_(user_ids),
+                    Notification.is_read == False,
+                    Notification.id > NotificationDigest.last_notification_id)\
+            .order_by(Notification.id.desc()).all()
+        by_user = {}
+        for notification in unread:
+            by_user.setdefault(notification.user_id, []).append(notification)
+
+        sent = 0
+        for state in states:
+            state.due_at = None
+            notifications = by_user.get(state.user_id)
+            user = users.get(state.user_id)
+            if not notifications or user is None:
+                # Everything was read in the meantime
+                continue
+            try:
+                mailer.send(DigestService._build_email(user, notifications))
+            except smtplib.SMTPRecipientsRefused:
+                logger.warning('Digest for user %s refused by the mail server', user.id)
+                continue
+            state.last_notification_id = notifications[0].id
+            state.last_sent_at = now
+            sent += 1
+        return sent
+
+    @staticmethod
+    def _build_email(user, notifications):
+        config = current_app.config
+        shown = notifications[:config['DIGEST_MAX_ITEMS']]
+        context = {
+            'user': user,
+            'notifications': shown,
+            'remaining': len(notifications) - len(shown),
+        }
+        # No request here, so links are built against the public base URL
+        with current_app.test_request_context(base_url=config['APP_BASE_URL']):
+            text = render_template('email/digest.txt', **context)
+            html = render_template('email/digest.html', **context)
+
+        message = EmailMessage()
+        count = len(notifications)
+        message['Subject'] = f'You have {count} new notification{"s" if count != 1 else ""} on CollabPlatform'
+        message['To'] = user.email
+        message.set_content(text)
+        message.add_alternative(html, subtype='html')
+        return message
+
+
+@job('digests.send')
+def _send_digests():
+    # Queued by `flask digests send --enqueue`. Commits per batch as it goes,
+    # since sent emails can't be rolled back with the job's transaction.
+    DigestService.run()
@@ -0,0 +1,65 @@
+import logging
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+
+logger = logging.getLogger(__name__)
+
+
+def before_commit(callback, session=None):
+    """Run callback(session) just before the current transaction commits.
+
+    The transaction is still open, so the callback may flush and query.
+    Exceptions propagate and abort the commit.
+    """
+    session = session or db.session()
+    session.info.setdefault('before_commit', []).append(callback)
+
+
+def on_commit(callback, session=None):
+    """Run callback() once the current transaction has committed.
+
+    Use for side effects that must not happen if the write rolls back
+    (cache updates, pushes to clients). The session cannot emit SQL at
+    this point, so callbacks must capture everything they need up front.
+    """
+    session = session or db.session()
+    session.info.setdefault('on_commit', []).append(callback)
+
+
+def transaction_state(key, factory, session=None):
+    """Get per-transaction state kept on the session.
+
+    The value is created with factory() on first use and dropped when the
+    transaction commits or rolls back.
+    """
+    session = session or db.session()
+    state = session.info.setdefault('transaction_state', {})
+    if key not in state:
+        state[key] = factory()
+    return state[key]
+
+
+@event.listens_for(Session, 'before_commit')
+def _run_before_commit(session):
+    # Callbacks may register further callbacks, so drain until empty
+    while session.info.get('before_commit'):
+        callback = session.info['before_commit'].pop(0)
+        callback(session)
+
+
+@event.listens_for(Session, 'after_commit')
+def _run_on_commit(session):
+    session.info.pop('transaction_state', None)
+    for callback in session.info.pop('on_commit', []):
+        try:
+            callback()
+        except Exception:
+            logger.exception('on_commit callback failed')
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_callbacks(session):
+    session.info.pop('before_commit', None)
+    session.info.pop('on_commit', None)
+    session.info.pop('transaction_state', None)
@@ -0,0 +1,214 @@
+from app import db
+from app.models import Project, Application, Submission, Message, Notification, DeveloperProfile, Conversation, MatchScore, Job, NotificationDigest, ProjectStats, DailyStats
+
+# Registry of the queries issued on hot request paths, keyed by name.
+# Each entry is a callable returning a Query built with representative
+# parameters, so the audit can EXPLAIN exactly what the routes run.
+HOT_QUERIES = {}
+
+
+def hot_query(name):
+    """Register a query builder with the index audit"""
+    def decorator(fn):
+        HOT_QUERIES[name] = fn
+        return fn
+    return decorator
+
+
+@hot_query('notification.unread_count')
+def _notification_unread_count():
+    return Notification.query.filter_by(user_id=1, is_read=False)\
+        .with_entities(db.func.count())
+
+
+@hot_query('notification.recent')
+def _notification_recent():
+    return Notification.query.filter_by(user_id=1)\
+        .order_by(Notification.created_at.desc()).limit(20)
+
+
+@hot_query('message.thread')
+def _message_thread():
+    return Message.query.filter(
+        ((Message.sender_id == 1) & (Message.recipient_id == 2)) |
+        ((Message.sender_id == 2) & (Message.recipient_id == 1))
+    ).filter(Message.id < 1000).order_by(Message.id.desc()).limit(51)
+
+
+@hot_query('message.thread_newer')
+def _message_thread_newer():
+    return Message.query.filter(
+        ((Message.sender_id == 1) & (Message.recipient_id == 2)) |
+        ((Message.sender_id == 2) & (Message.recipient_id == 1))
+    ).filter(Message.id > 1000).order_by(Message.id.asc()).limit(51)
+
+
+@hot_query('conversation.list')
+def _conversation_list():
+    return Conversation.query.filter_by(user_id=1)\
+        .order_by(Conversation.last_sent_at.desc())
+
+
+@hot_query('application.existing')
+def _application_existing():
+    return Application.query.filter_by(project_id=1, developer_id=1).limit(1)
+
+
+@hot_query('application.shortlisted_count')
+def _application_shortlisted_count():
+    return Application.query.filter_by(project_id=1, status='shortlisted')\
+        .with_entities(db.func.count())
+
+
+@hot_query('application.developer_dashboard')
+def _application_developer_dashboard():
+    return Application.query.filter_by(developer_id=1)\
+        .order_by(Application.applied_at.desc())
+
+
+@hot_query('project.list_by_status')
+def _project_list_by_status():
+    return Project.query.filter_by(status='open')\
+        .order_by(Project.created_at.desc()).limit(12)
+
+
+@hot_query('project.listing_keyset')
+def _project_listing_keyset():
+    from datetime import datetime
+    return Project.query.filter_by(status='open')\
+        .filter(db.tuple_(Project.created_at, Project.id) < (datetime(2024, 1, 1), 100))\
+        .order_by(Project.created_at.desc(), Project.id.desc()).limit(13)
+
+
+@hot_query('project.company_dashboard')
+def _project_company_dashboard():
+    return Project.query.filter_by(company_id=1)\
+        .order_by(Project.created_at.desc())
+
+
+@hot_query('project.search')
+def _project_search():
+    from app.services.search import ProjectSearch
+    return ProjectSearch.search('python developer', 'open').limit(12)
+
+
+@hot_query('match_score.recommended')
+def _match_score_recommended():
+    return MatchScore.query.filter_by(developer_profile_id=1)\
+        .order_by(MatchScore.score.desc()).limit(5)
+
+
+@hot_query('match_score.by_project')
+def _match_score_by_project():
+    return MatchScore.query.filter_by(project_id=1)
+
+
+@hot_query('job.claim')
+def _job_claim():
+    from datetime import datetime
+    return Job.query.filter(Job.status == 'pending', Job.run_at <= datetime(2024, 1, 1))\
+        .order_by(Job.run_at).limit(10)
+
+
+@hot_query('notification_digest.due')
+def _notification_digest_due():
+    from datetime import datetime
+    return NotificationDigest.query.filter(NotificationDigest.due_at <= datetime(2024, 1, 1))\
+        .order_by(NotificationDigest.due_at).limit(50)
+
+
+@hot_query('project.lifecycle_overdue')
+def _project_lifecycle_overdue():
+    from datetime import datetime
+    return Project.query.filter(Project.status == 'open', Project.deadline < datetime(2024, 1, 1))\
+        .order_by(Project.deadline).limit(500)
+
+
+@hot_query('project.lifecycle_reminders')
+def _project_lifecycle_reminders():
+    from datetime import datetime
+    return Project.query.filter(Project.status.in_(('open', 'shortlisting', 'submission')),
+                                Project.deadline.between(datetime(2024, 1, 1), datetime(2024, 1, 2)),
+                                Project.reminded_at.is_(None)).limit(500)
+
+
+@hot_query('project_stats.by_company')
+def _project_stats_by_company():
+    return ProjectStats.query.filter_by(company_id=1)
+
+
+@hot_query('daily_stats.platform')
+def _daily_stats_platform():
+    from datetime import date
+    return DailyStats.query.filter(DailyStats.day >= date(2024, 1, 1))\
+        .with_entities(DailyStats.day, db.func.sum(DailyStats.applications))\
+        .group_by(DailyStats.day)
+
+
+@hot_query('submission.by_application')
+def _submission_by_application():
+    return Submission.query.filter_by(application_id=1)
+
+
+@hot_query('submission.by_project')
+def _submission_by_project():
+    return Submission.query.filter_by(project_id=1)
+
+
+@hot_query('developer_profile.by_user')
+def _developer_profile_by_user():
+    return DeveloperProfile.query.filter_by(user_id=1)
+
+
+class IndexAuditService:
+    @staticmethod
+    def explain(query):
+        """Return the query plan lines for a Query on the current engine"""
+        dialect = db.engine.dialect
+        sql = str(query.statement.compile(
+            dialect=dialect, compile_kwargs={'literal_binds': True}))
+
+        if dialect.name == 'sqlite':
+            rows = db.session.execute(db.text(f'EXPLAIN QUERY PLAN {sql}')).all()
+            return [row[-1] for row in rows]
+
+        rows = db.session.execute(db.text(f'EXPLAIN {sql}')).all()
+        return [row[0] for row in rows]
+
+    @staticmethod
+    def sequential_scans(plan, dialect_name):
+        """Return the plan lines that read a whole table"""
+        if dialect_name == 'sqlite':
+            # "SCAN <table>" without an index is SQLite's sequential scan;
+            # FTS5 lookups show as "SCAN <table> VIRTUAL TABLE INDEX"
+            return [line for line in plan
+                    if line.startswith('SCAN ') and ' USING ' not in line
+                    and ' VIRTUAL TABLE INDEX ' not in line]
+        return [line.strip() for line in plan if 'Seq Scan on' in line]
+
+    @staticmethod
+    def audit(names=None, disable_seqscan=True):
+        """EXPLAIN every registered hot query and report sequential scans.
+
+        On PostgreSQL the planner happily seq-scans small tables, so by
+        default the audit runs with enable_seqscan off: a Seq Scan that
+        survives that setting means no usable index exists.
+        """
+        dialect_name = db.engine.dialect.name
+        results = []
+        try:
+            if dialect_name == 'postgresql' and disable_seqscan:
+                db.session.execute(db.text('SET LOCAL enable_seqscan = off'))
+
+            for name, builder in HOT_QUERIES.items():
+                if names and name not in names:
+                    continue
+                plan = IndexAuditService.explain(builder())
+                results.append({
+                    'name': name,
+                    'plan': plan,
+                    'seq_scans': IndexAuditService.sequential_scans(plan, dialect_name)
+                })
+        finally:
+            db.session.rollback()
+        return results
@@ -0,0 +1,233 @@
+import json
+import logging
+import os
+import random
+import socket
+import time
+import traceback
+import uuid
+from datetime import datetime, timedelta
+from functools import partial
+from flask import current_app, g, has_request_context
+from app import db
+from app.models import Job
+from app.services.hooks import on_commit
+
+logger = logging.getLogger(__name__)
+
+# Handlers by job name, registered with @job
+JOBS = {}
+
+
+def job(name):
+    """Register a function as the handler for jobs called ``name``.
+
+    Handlers get the job's payload as keyword arguments and run inside the
+    worker's transaction: they must not commit, so their writes and the
+    job's completion are committed together.
+    """
+    def decorator(fn):
+        JOBS[name] = fn
+        return fn
+    return decorator
+
+
+class JobQueue:
+    """Database-backed job queue for side effects that can run after a request.
+
+    ``enqueue`` adds a job to the caller's transaction, so it exists exactly
+    when the change that caused it commits. Workers (``flask worker``)
+    claim due jobs with SELECT ... FOR UPDATE SKIP LOCKED on PostgreSQL and
+    retry failures with exponential backoff. With JOB_QUEUE_EAGER set, jobs
+    enqueued during a request instead run in-process once the response has
+    been sent, for deployments without a worker.
+    """
+
+    @staticmethod
+    def init_app(app):
+        app.after_request(JobQueue._run_eager_jobs)
+        if not app.config['JOB_QUEUE_EAGER'] and 'memory' in (
+                app.config['CACHE_BACKEND'], app.config['NOTIFICATION_BROKER']):
+            # Jobs run in another process, whose unread counters and events
+            # would never reach this one
+            app.logger.warning(
+                'JOB_QUEUE_EAGER is off but CACHE_BACKEND=%s and NOTIFICATION_BROKER=%s; '
+                'use redis and postgres so notifications from workers reach web processes',
+                app.config['CACHE_BACKEND'], app.config['NOTIFICATION_BROKER'])
+        # Import every module defining handlers, so workers can run them all
+        from app.services import message_service, project_service, digest_service, lifecycle_service, match_service  # noqa: F401
+
+    @staticmethod
+    def enqueue(name, payload=None, delay=0, max_attempts=None):
+        """Queue a job in the current transaction; it is written by the caller's commit"""
+        if name not in JOBS:
+            raise LookupError(f'No handler registered for job {name!r}')
+        config = current_app.config
+        new_job = Job(
+            name=name,
+            payload=json.dumps(payload or {}),
+            max_attempts=max_attempts or config['JOB_MAX_ATTEMPTS'],
+            run_at=datetime.utcnow() + timedelta(seconds=delay)
+        )
+        db.session.add(new_job)
+        if config['JOB_QUEUE_EAGER'] and not delay and has_request_context():
+            db.session.flush()
+            on_commit(partial(JobQueue._defer, new_job.id))
+        return new_job
+
+    @staticmethod
+    def _defer(job_id):
+        # After commit: remember the job for _run_eager_jobs (no SQL allowed here)
+        g.setdefault('eager_job_ids', []).append(job_id)
+
+    @staticmethod
+    def _run_eager_jobs(response):
+        job_ids = g.pop('eager_job_ids', None)
+        if job_ids:
+            app = current_app._get_current_object()
+            response.call_on_close(partial(JobQueue._run_in_app, app, job_ids))
+        return response
+
+    @staticmethod
+    def _run_in_app(app, job_ids):
+        with app.app_context():
+            for job_id in job_ids:
+                JobQueue.run_job(job_id)
+
+    @staticmethod
+    def _ready(now):
+        # Due pending jobs, and running jobs whose worker stopped renewing them
+        stale = now - timedelta(seconds=current_app.config['JOB_LOCK_TIMEOUT'])
+        return ((Job.status == 'pending') & (Job.run_at <= now)) | \
+            ((Job.status == 'running') & (Job.locked_at < stale))
+
+    @staticmethod
+    def claim(worker_id, limit=1, job_ids=None):
+        """Lock up to ``limit`` due jobs for ``worker_id`` and return them.
+
+        Concurrent workers skip each other's locked rows instead of waiting.
+        The guarded UPDATE makes claiming safe on databases without SKIP
+        LOCKED too, such as SQLite.
+        """
+        now = datetime.utcnow()
+        ready = JobQueue._ready(now)
+        candidates = db.select(Job.id).where(ready)
+        if job_ids is not None:
+            candidates = candidates.where(Job.id.in_(job_ids))
+        candidates = candidates.order_by(Job.run_at).limit(limit)\
+            .with_for_update(skip_locked=True)
+        ids = db.session.scalars(candidates).all()
+        if not ids:
+            db.session.commit()
+            return []
+
+        token = f'{worker_id}:{uuid.uuid4().hex[:12]}'
+        db.session.execute(
+            db.update(Job).where(Job.id.in_(ids), ready)
+            .values(status='running', locked_at=now, locked_by=token, attempts=Job.attempts + 1),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.commit()
+        return Job.query.filter_by(locked_by=token).order_by(Job.run_at).all()
+
+    @staticmethod
+    def execute(claimed):
+        """Run a claimed job and record the outcome. Returns True on success."""
+        job_id = claimed.id
+        try:
+            handler = JOBS.get(claimed.name)
+            if handler is None:
+                raise LookupError(f'No handler registered for job {claimed.name!r}')
+            handler(**json.loads(claimed.payload))
+            claimed.status = 'done'
+            claimed.finished_at = datetime.utcnow()
+            claimed.last_error = None
+            db.session.commit()
+            return True
+        except Exception:
+            db.session.rollback()
+            logger.exception('Job %s (%s) failed', job_id, claimed.name)
+            failed = db.session.get(Job, job_id)
+            failed.last_error = traceback.format_exc()[-4000:]
+            failed.locked_at = None
+            failed.locked_by = None
+            if failed.attempts >= failed.max_attempts:
+                failed.status = 'failed'
+                failed.finished_at = datetime.utcnow()
+            else:
+                failed.status = 'pending'
+                failed.run_at = datetime.utcnow() + timedelta(seconds=JobQueue.backoff(failed.attempts))
+            db.session.commit()
+            return False
+
+    @staticmethod
+    def backoff(attempts):
+        """Seconds before retrying after ``attempts`` failures, with jitter"""
+        config = current_app.config
+        delay = min(config['JOB_RETRY_BACKOFF'] * 2 ** (attempts - 1), config['JOB_RETRY_BACKOFF_MAX'])
+        return delay * random.uniform(0.75, 1.25)
+
+    @staticmethod
+    def run_job(job_id, worker_id='eager'):
+        """Claim and run one job now if it is due; returns False if it wasn't run"""
+        claimed = JobQueue.claim(worker_id, job_ids=[job_id])
+        return bool(claimed) and JobQueue.execute(claimed[0])
+
+    @staticmethod
+    def work(worker_id=None, burst=False, max_jobs=None, stop=None):
+        """Process jobs until stopped.
+
+        With ``burst`` the worker returns once no job is due, which is how
+        tests and cron-driven setups run the queue in-process. ``stop`` is
+        an optional threading.Event checked between jobs. Returns the number
+        of jobs processed.
+        """
+        config = current_app.config
+        worker_id = worker_id or f'{socket.gethostname()}:{os.getpid()}'
+        processed = 0
+        while not (stop and stop.is_set()):
+            claimed = JobQueue.claim(worker_id, limit=config['JOB_BATCH_SIZE'])
+            if not claimed:
+                if burst:
+                    break
+                if stop:
+                    stop.wait(config['JOB_POLL_INTERVAL'])
+                else:
+                    time.sleep(config['JOB_POLL_INTERVAL'])
+                continue
+            for index, claimed_job in enumerate(claimed):
+                if (stop and stop.is_set()) or (max_jobs and processed >= max_jobs):
+                    JobQueue._release(claimed[index:])
+                    return processed
+                JobQueue.execute(claimed_job)
+                processed += 1
+        return processed
+
+    @staticmethod
+    def run_pending():
+        """Run every due job in-process, e.g. from tests"""
+        return JobQueue.work(worker_id='inline', burst=True)
+
+    @staticmethod
+    def _release(unstarted):
+        # Hand claimed but unstarted jobs back without counting an attempt
+        db.session.execute(
+            db.update(Job).where(Job.id.in_([j.id for j in unstarted]), Job.status == 'running')
+            .values(status='pending', locked_at=None, locked_by=None, attempts=Job.attempts - 1),
+            execution_options={'synchronize_session': False}
+        )
+        db.session.commit()
+
+    @staticmethod
+    def purge(older_than_days=7):
+        """Delete finished jobs older than the given age; returns the number deleted"""
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+        deleted = Job.query.filter(Job.status.in_(('done', 'failed')), Job.finished_at < cutoff)\
+            .delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+
+    @staticmethod
+    def counts():
+        """Number of jobs in each status"""
+        return dict(db.session.query(Job.status, db.func.count()).group_by(Job.status).all())
@@ -0,0 +1,171 @@
+import logging
+import traceback
+from collections import Counter
+from datetime import datetime, timedelta
+from flask import current_app
+from app import db
+from app.models import Project, Application, Submission, LifecycleRun
+from app.services.analytics import Analytics
+from app.services.jobs import job
+from app.services.notification_service import NotificationService
+
+logger = logging.getLogger(__name__)
+
+# Projects that still have a deadline to meet
+REMINDED_STATUSES = ('open', 'shortlisting', 'submission')
+
+
+class ProjectLifecycle:
+    """Deadline-driven project status changes.
+
+    Open projects past their deadline are moved to 'expired' with guarded
+    set-based UPDATEs, LIFECYCLE_BATCH_SIZE projects per transaction, so
+    they drop out of the listing and its index range. Projects a company
+    has started shortlisting stay with the company. Active projects whose
+    deadline is within LIFECYCLE_REMINDER_HOURS get one round of reminders:
+    the company, and shortlisted developers who haven't submitted work.
+    Both steps find their projects through ix_project_status_deadline.
+    Run periodically with ``flask lifecycle run``; every run is recorded in
+    the lifecycle_run table.
+    """
+
+    @staticmethod
+    def run(now=None):
+        """Expire overdue projects and send due reminders. Returns the LifecycleRun."""
+        now = now or datetime.utcnow()
+        record = LifecycleRun(started_at=datetime.utcnow())
+        db.session.add(record)
+        db.session.commit()
+        try:
+            ProjectLifecycle.expire_projects(now, record)
+            ProjectLifecycle.send_reminders(now, record)
+        except Exception:
+            db.session.rollback()
+            record.error = traceback.format_exc()[-4000:]
+            raise
+        finally:
+            record.finished_at = datetime.utcnow()
+            db.session.commit()
+        return record
+
+    @staticmethod
+    def expire_projects(now=None, record=None):
+        """Move open projects past their deadline to 'expired'; returns how many"""
+        now = now or datetime.utcnow()
+        overdue = (Project.status == 'open') & (Project.deadline < now)
+        expired = 0
+        while True:
+            # Concurrent runs skip each other's batches instead of waiting
+            batch = db.session.query(Project.id, Project.company_id, Project.title)\
+                .filter(overdue).order_by(Project.deadline)\
+                .limit(current_app.config['LIFECYCLE_BATCH_SIZE'])\
+                .with_for_update(skip_locked=True).all()
+            if not batch:
+                db.session.commit()
+                break
+
+            db.session.execute(
+                db.update(Project).where(Project.id.in_([p.id for p in batch]), overdue)
+                .values(status='expired', updated_at=now),
+                execution_options={'synchronize_session': False}
+            )
+            for company_id, count in Counter(p.company_id for p in batch).items():
+                Analytics.project_status_changed(company_id, 'open', 'expired', count)
+            notified = NotificationService.create_many([(
+                p.company_id,
+                'Project Expired',
+                f'"{p.title}" reached its deadline without a shortlist and is no longer '
+                f'accepting applications.',
+                'project'
+            ) for p in batch], commit=False)
+
+            expired += len(batch)
+            if record is not None:
+                record.expired_count += len(batch)
+                record.notification_count += notified
+            # The status changes and their notifications commit together
+            db.session.commit()
+        if expired:
+            logger.info('Expired %s projects', expired)
+        return expired
+
+    @staticmethod
+    def send_reminders(now=None, record=None):
+        """Remind about active projects whose deadline is near; returns how many projects"""
+        now = now or datetime.utcnow()
+        horizon = now + timedelta(hours=current_app.config['LIFECYCLE_REMINDER_HOURS'])
+        due = Project.status.in_(REMINDED_STATUSES) & Project.deadline.between(now, horizon) & \
+            Project.reminded_at.is_(None)
+        reminded = 0
+        while True:
+            batch = db.session.query(Project.id, Project.company_id, Project.title,
+                                     Project.status, Project.deadline)\
+                .filter(due)\
+                .limit(current_app.config['LIFECYCLE_BATCH_SIZE'])\
+                .with_for_update(skip_locked=True).all()
+            if not batch:
+                db.session.commit()
+                break
+
+            project_ids = [p.id for p in batch]
+            # updated_at is kept: sending reminders doesn't change the project
+            db.session.execute(
+                db.update(Project).where(Project.id.in_(project_ids), due)
+                .values(reminded_at=now, updated_at=Project.updated_at),
+                execution_options={'synchronize_session': False}
+            )
+            # Shortlisted developers who haven't submitted work, in one query
+            pending_work = db.session.query(Application.project_id, Application.developer_id)\
+                .outerjoin(Submission, Submission.application_id == Application.id)\
+                .filter(Application.project_id.in_(project_ids),
+                        Application.status == 'shortlisted',
+                        Submission.id.is_(None)).all()
+            developers = {}
+            for project_id, developer_id in pending_work:
+                developers.setdefault(project_id, []).append(developer_id)
+
+            notifications = []
+            for p in batch:
+                due_on = p.deadline.strftime('%b %d at %H:%M UTC')
+                if p.status == 'open':
+                    notifications.append((
+                        p.company_id, 'Deadline Approaching',
+                        f'"{p.title}" closes on {due_on}. Shortlist applicants before then, '
+                        f'or the project will expire.', 'project'))
+                else:
+                    notifications.append((
+                        p.company_id, 'Deadline Approaching',
+                        f'Submissions for "{p.title}" are due on {due_on}.', 'project'))
+                notifications.extend((
+                    developer_id, 'Submission Due Soon',
+                    f'Your work for "{p.title}" is due on {due_on}.', 'project')
+                    for developer_id in developers.get(p.id, ()))
+            notified = NotificationService.create_many(notifications, commit=False)
+
+            reminded += len(batch)
+            if record is not None:
+                record.reminded_count += len(batch)
+                record.notification_count += notified
+            db.session.commit()
+        return reminded
+
+    @staticmethod
+    def history(limit=10):
+        """The most recent runs, newest first"""
+        return LifecycleRun.query.order_by(LifecycleRun.id.desc()).limit(limit).all()
+
+    @staticmethod
+    def purge(older_than_days=30):
+        """Delete run records older than the given age; returns the number deleted"""
+        cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+        deleted = LifecycleRun.query.filter(LifecycleRun.started_at < cutoff)\
+            .delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+
+
+@job('lifecycle.run')
+def _run_lifecycle():
+    # Queued by `flask lifecycle run --enqueue`. Commits per batch, like the
+    # digest job, so a long backlog doesn't hold one transaction open.
+    ProjectLifecycle.run()
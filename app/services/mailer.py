@@ -0,0 +1,75 @@
+import logging
+import smtplib
+
+logger = logging.getLogger(__name__)
+
+
+class Mailer:
+    """SMTP client that sends many messages over one persistent connection.
+
+    The connection opens on the first send and is replaced after
+    ``max_messages`` messages (many servers cap messages per session) or
+    if the server drops it. Use as a context manager to close it.
+    """
+
+    def __init__(self, host, port=587, use_tls=True, username=None, password=None,
+                 sender=None, max_messages=100, timeout=30):
+        self.host = host
+        self.port = port
+        self.use_tls = use_tls
+        self.username = username
+        self.password = password
+        self.sender = sender
+        self.max_messages = max_messages
+        self.timeout = timeout
+        self._smtp = None
+        self._sent = 0
+
+    @classmethod
+    def from_config(cls, config):
+        """Build a Mailer from the MAIL_* settings, or None if MAIL_SERVER is unset"""
+        if not config['MAIL_SERVER']:
+            return None
+        return cls(config['MAIL_SERVER'], config['MAIL_PORT'], config['MAIL_USE_TLS'],
+                   config['MAIL_USERNAME'], config['MAIL_PASSWORD'], config['MAIL_DEFAULT_SENDER'],
+                   config['MAIL_MAX_MESSAGES_PER_CONNECTION'], config['MAIL_TIMEOUT'])
+
+    def _connect(self):
+        self.close()
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        smtp.ehlo()
+        if self.use_tls:
+            smtp.starttls()
+            smtp.ehlo()
+        if self.username:
+            smtp.login(self.username, self.password)
+        self._smtp = smtp
+        self._sent = 0
+
+    def send(self, message):
+        """Send an email.message.EmailMessage, filling in From if missing"""
+        if 'From' not in message and self.sender:
+            message['From'] = self.sender
+        if self._smtp is None or self._sent >= self.max_messages:
+            self._connect()
+        try:
+            self._smtp.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            # Idle connections get dropped; retry once on a fresh one
+            self._connect()
+            self._smtp.send_message(message)
+        self._sent += 1
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
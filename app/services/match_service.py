@@ -0,0 +1,321 @@
+import heapq
+import math
+from collections import defaultdict, namedtuple
+from datetime import datetime
+from flask import current_app
+from app import db
+from app.models import Project, DeveloperProfile, Application, MatchScore, project_skill, developer_skill
+from app.services.cache import get_cache
+from app.services.jobs import job
+
+# Projects in these statuses are scored; only open ones are recommended
+ACTIVE_STATUSES = ('open', 'shortlisting', 'submission')
+# Matches kept per developer and per project, on top of every applicant
+TOP_K = 20
+# Sides of a (developer_profile_id, project_id) pair, for ranking
+DEVELOPER, PROJECT = 0, 1
+
+SKILL_WEIGHT = 0.8
+EXPERIENCE_WEIGHT = 0.1
+REPUTATION_WEIGHT = 0.1
+EXPERIENCE_LEVELS = {'beginner': 0.25, 'intermediate': 0.5, 'advanced': 0.75, 'expert': 1.0}
+# Reputation at which the reputation term reaches its full weight
+REPUTATION_CAP = 100
+# Cache key of the IDF of every skill, as [skill_id, idf] pairs
+IDF_KEY = 'match_idf'
+
+Developer = namedtuple('Developer', 'skills bonus')
+Score = namedtuple('Score', 'score skill_score matched_skills')
+
+
+class MatchService:
+    """Precomputed developer/project match scores.
+
+    Developers and projects are sparse vectors over the skill taxonomy. A
+    pair's skill score is the IDF-weighted share of the project's required
+    skills that the developer has, so rare skills count for more than
+    common ones. Experience level and reputation add smaller terms. Scoring
+    walks the project_skill inverted index, so only pairs that share a skill
+    are ever visited.
+
+    Results are stored in MatchScore. Saving a profile refreshes just that
+    developer's matches, and creating a project queues a refresh of its
+    matches; ``refresh_all`` rebuilds everything and also
+    corrects rankings that incremental refreshes can't (e.g. a project
+    losing a top match after a developer edits their skills).
+    """
+
+    @staticmethod
+    def refresh_all():
+        """Recompute every match. Returns the number of rows stored."""
+        developers = MatchService._developer_vectors()
+        projects = MatchService._project_vectors()
+        keep = MatchService._applicant_pairs()
+        idf = MatchService._idf()
+        MatchService._cache_idf(idf)
+        scores = MatchService._score(developers, projects, idf, keep)
+
+        db.session.execute(MatchScore.__table__.delete())
+        rows = MatchService._top_k(scores, keep)
+        MatchService._write(rows)
+        return len(rows)
+
+    @staticmethod
+    def refresh_developer(profile_id):
+        """Recompute one developer's matches against all active projects"""
+        db.session.execute(MatchScore.__table__.delete()
+                           .where(MatchScore.developer_profile_id == profile_id))
+        developers = MatchService._developer_vectors(profile_ids=[profile_id])
+        if profile_id not in developers:
+            return 0
+
+        keep = MatchService._applicant_pairs(profile_id=profile_id)
+        projects = MatchService._project_vectors(
+            skill_ids=developers[profile_id].skills,
+            project_ids=[project_id for _, project_id in keep])
+        scores = MatchService._score(developers, projects, MatchService._cached_idf(), keep)
+
+        # The developer's top K, plus pairs that now make a project's stored top K
+        cutoffs = MatchService._cutoffs(MatchScore.project_id, list(projects))
+        rows = MatchService._top_k(scores, keep, sides=(DEVELOPER,))
+        rows.update({pair: score for pair, score in scores.items()
+                     if score.score > cutoffs.get(pair[1], -1)})
+        MatchService._write(rows)
+        return len(rows)
+
+    @staticmethod
+    def refresh_project(project_id):
+        """Recompute one project's matches against all developers"""
+        # Its skills count towards every skill's IDF
+        get_cache().delete(IDF_KEY)
+        db.session.execute(MatchScore.__table__.delete()
+                           .where(MatchScore.project_id == project_id))
+        projects = MatchService._project_vectors(project_ids=[project_id])
+        if project_id not in projects:
+            return 0
+
+        keep = MatchService._applicant_pairs(project_id=project_id)
+        developers = MatchService._developer_vectors(
+            skill_ids=projects[project_id],
+            profile_ids=[profile_id for profile_id, _ in keep])
+        # Only the project's own skills weigh in its scores
+        idf = MatchService._idf(skill_ids=projects[project_id])
+        scores = MatchService._score(developers, projects, idf, keep)
+
+        # The project's top K, plus pairs that now make a developer's stored top K
+        cutoffs = MatchService._cutoffs(MatchScore.developer_profile_id, list(developers))
+        rows = MatchService._top_k(scores, keep, sides=(PROJECT,))
+        rows.update({pair: score for pair, score in scores.items()
+                     if score.score > cutoffs.get(pair[0], -1)})
+        MatchService._write(rows)
+        return len(rows)
+
+    @staticmethod
+    def score_pair(profile_id, project_id):
+        """Store the score for one pair, e.g. when the developer applies"""
+        developers = MatchService._developer_vectors(profile_ids=[profile_id])
+        projects = MatchService._project_vectors(project_ids=[project_id])
+        if project_id not in projects:
+            return
+        pair = (profile_id, project_id)
+        idf = MatchService._idf(skill_ids=projects[project_id])
+        scores = MatchService._score(developers, projects, idf, {pair})
+        if pair in scores:
+            db.session.execute(MatchScore.__table__.delete().where(
+                MatchScore.developer_profile_id == profile_id, MatchScore.project_id == project_id))
+            MatchService._write({pair: scores[pair]})
+
+    @staticmethod
+    def recommended_projects(profile_id, user_id, limit=5):
+        """Open projects that best fit a developer and they haven't applied to.
+
+        Returns (project, MatchScore) pairs, best first.
+        """
+        applied = db.select(Application.project_id).where(Application.developer_id == user_id)
+        return db.session.query(Project, MatchScore)\
+            .join(MatchScore, MatchScore.project_id == Project.id)\
+            .filter(MatchScore.developer_profile_id == profile_id,
+                    MatchScore.skill_score > 0,
+                    Project.status == 'open',
+                    Project.id.notin_(applied))\
+            .order_by(MatchScore.score.desc())\
+            .limit(limit).all()
+
+    @staticmethod
+    def applicant_scores(project_id):
+        """Stored match scores for a project's applicants, keyed by developer user id"""
+        return dict(db.session.query(DeveloperProfile.user_id, MatchScore.score)
+                    .join(MatchScore, MatchScore.developer_profile_id == DeveloperProfile.id)
+                    .join(Application, (Application.developer_id == DeveloperProfile.user_id) &
+                          (Application.project_id == MatchScore.project_id))
+                    .filter(MatchScore.project_id == project_id).all())
+
+    @staticmethod
+    def _developer_vectors(profile_ids=None, skill_ids=None):
+        # Developers selected by id, or by having any of skill_ids
+        query = db.session.query(DeveloperProfile.id, DeveloperProfile.experience_level,
+                                 DeveloperProfile.reputation_score, developer_skill.c.skill_id)\
+            .outerjoin(developer_skill, developer_skill.c.developer_profile_id == DeveloperProfile.id)
+        criteria = []
+        if profile_ids is not None:
+            criteria.append(DeveloperProfile.id.in_(profile_ids))
+        if skill_ids is not None:
+            criteria.append(DeveloperProfile.id.in_(
+                db.select(developer_skill.c.developer_profile_id)
+                .where(developer_skill.c.skill_id.in_(skill_ids))))
+        if criteria:
+            query = query.filter(db.or_(*criteria))
+
+        skills = defaultdict(set)
+        bonuses = {}
+        for profile_id, experience, reputation, skill_id in query:
+            if skill_id is not None:
+                skills[profile_id].add(skill_id)
+            if profile_id not in bonuses:
+                bonuses[profile_id] = (
+                    EXPERIENCE_WEIGHT * EXPERIENCE_LEVELS.get(experience, 0) +
+                    REPUTATION_WEIGHT * min(1.0, math.log1p(max(reputation or 0, 0)) /
+                                            math.log1p(REPUTATION_CAP)))
+        return {profile_id: Developer(skills[profile_id], bonus)
+                for profile_id, bonus in bonuses.items()}
+
+    @staticmethod
+    def _project_vectors(project_ids=None, skill_ids=None):
+        # Active projects selected by id, or by needing any of skill_ids
+        query = db.session.query(Project.id, project_skill.c.skill_id)\
+            .outerjoin(project_skill, project_skill.c.project_id == Project.id)\
+            .filter(Project.status.in_(ACTIVE_STATUSES))
+        criteria = []
+        if project_ids is not None:
+            criteria.append(Project.id.in_(project_ids))
+        if skill_ids is not None:
+            criteria.append(Project.id.in_(
+                db.select(project_skill.c.project_id)
+                .where(project_skill.c.skill_id.in_(skill_ids))))
+        if criteria:
+            query = query.filter(db.or_(*criteria))
+
+        vectors = {}
+        for project_id, skill_id in query:
+            skills = vectors.setdefault(project_id, set())
+            if skill_id is not None:
+                skills.add(skill_id)
+        return vectors
+
+    @staticmethod
+    def _idf(skill_ids=None):
+        # Inverse document frequency of each skill (or just of skill_ids)
+        # across active projects
+        query = db.session.query(project_skill.c.skill_id, db.func.count())\
+            .join(Project, Project.id == project_skill.c.project_id)\
+            .filter(Project.status.in_(ACTIVE_STATUSES))
+        if skill_ids is not None:
+            if not skill_ids:
+                return {}
+            query = query.filter(project_skill.c.skill_id.in_(skill_ids))
+        counts = query.group_by(project_skill.c.skill_id).all()
+        total = Project.query.filter(Project.status.in_(ACTIVE_STATUSES)).count()
+        return {skill_id: math.log(1 + total / count) for skill_id, count in counts}
+
+    @staticmethod
+    def _cached_idf():
+        # The full IDF table changes little between projects, so developer
+        # refreshes reuse it for up to MATCH_IDF_TTL seconds
+        cached = get_cache().get(IDF_KEY)
+        if cached is not None:
+            return dict(cached)
+        idf = MatchService._idf()
+        MatchService._cache_idf(idf)
+        return idf
+
+    @staticmethod
+    def _cache_idf(idf):
+        # Pairs, since JSON-backed caches would turn the ids into strings
+        get_cache().set(IDF_KEY, list(idf.items()), ttl=current_app.config['MATCH_IDF_TTL'])
+
+    @staticmethod
+    def _applicant_pairs(profile_id=None, project_id=None):
+        query = db.session.query(DeveloperProfile.id, Application.project_id)\
+            .join(Application, Application.developer_id == DeveloperProfile.user_id)
+        if profile_id is not None:
+            query = query.filter(DeveloperProfile.id == profile_id)
+        if project_id is not None:
+            query = query.filter(Application.project_id == project_id)
+        return set(query.all())
+
+    @staticmethod
+    def _score(developers, projects, idf, keep=()):
+        """Score every (developer, project) pair sharing a skill, plus ``keep``"""
+        index = defaultdict(list)
+        norms = {}
+        for project_id, skills in projects.items():
+            norms[project_id] = sum(idf.get(skill_id, 0) for skill_id in skills)
+            for skill_id in skills:
+                index[skill_id].append(project_id)
+
+        scores = {}
+        for profile_id, developer in developers.items():
+            weights = defaultdict(float)
+            matched = defaultdict(int)
+            for skill_id in developer.skills:
+                weight = idf.get(skill_id, 0)
+                for project_id in index.get(skill_id, ()):
+                    weights[project_id] += weight
+                    matched[project_id] += 1
+            for project_id, weight in weights.items():
+                skill_score = weight / norms[project_id] if norms[project_id] else 0.0
+                scores[(profile_id, project_id)] = Score(
+                    SKILL_WEIGHT * skill_score + developer.bonus, skill_score, matched[project_id])
+
+        # Applicants get a row even without a shared skill, so they can be ranked
+        for profile_id, project_id in keep:
+            if (profile_id, project_id) not in scores and profile_id in developers \
+                    and project_id in projects:
+                scores[(profile_id, project_id)] = Score(developers[profile_id].bonus, 0.0, 0)
+        return scores
+
+    @staticmethod
+    def _top_k(scores, keep, sides=(DEVELOPER, PROJECT)):
+        # ``keep`` plus the best TOP_K pairs of each id on the given sides.
+        # Incremental refreshes rank only the refreshed side: there every
+        # id on the other side has a single candidate pair.
+        groups = defaultdict(list)
+        for pair, score in scores.items():
+            for side in sides:
+                groups[(side, pair[side])].append((score.score, pair))
+
+        selected = {pair for pair in keep if pair in scores}
+        for candidates in groups.values():
+            selected.update(pair for _, pair in heapq.nlargest(TOP_K, candidates))
+        return {pair: scores[pair] for pair in selected}
+
+    @staticmethod
+    def _cutoffs(column, ids):
+        # Score a new pair must beat to enter each id's stored top K; ids with
+        # fewer than K stored matches have no cutoff
+        stored = defaultdict(list)
+        if ids:
+            for owner_id, score in db.session.query(column, MatchScore.score)\
+                    .filter(column.in_(ids)):
+                stored[owner_id].append(score)
+        return {owner_id: heapq.nlargest(TOP_K, scores)[-1]
+                for owner_id, scores in stored.items() if len(scores) >= TOP_K}
+
+    @staticmethod
+    def _write(rows, batch_size=5000):
+        computed_at = datetime.utcnow()
+        values = [{
+            'developer_profile_id': profile_id,
+            'project_id': project_id,
+            'score': round(score.score, 6),
+            'skill_score': round(score.skill_score, 6),
+            'matched_skills': score.matched_skills,
+            'computed_at': computed_at
+        } for (profile_id, project_id), score in rows.items()]
+        for start in range(0, len(values), batch_size):
+            db.session.execute(MatchScore.__table__.insert(), values[start:start + batch_size])
+
+
+@job('matches.refresh_project')
+def _refresh_project(project_id):
+    MatchService.refresh_project(project_id)
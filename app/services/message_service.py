@@ -0,0 +1,202 @@
+from datetime import datetime
+from functools import partial
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+from app import db
+from app.models import Message, Conversation
+from app.services.hooks import on_commit
+from app.services.jobs import JobQueue, job
+from app.services.notification_service import NotificationService
+from app.services.unread_counters import UnreadCounters
+
+
+class MessageService:
+    @staticmethod
+    def send_message(sender_id, recipient_id, content, project_id=None, commit=True):
+        """Create a message and update both sides' conversation summaries.
+
+        The recipient's notification is queued as a background job in the
+        same transaction. Pass ``commit=False`` to leave the commit to the
+        caller.
+        """
+        message = Message(
+            sender_id=sender_id,
+            recipient_id=recipient_id,
+            content=content,
+            project_id=project_id,
+            sent_at=datetime.utcnow()
+        )
+        db.session.add(message)
+        db.session.flush()
+
+        # Both sides' summaries in one upsert, so concurrent first messages
+        # between two users can't both insert, and unread counts are
+        # incremented in SQL without losing updates
+        dialect = db.session.get_bind(mapper=Conversation).dialect.name
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        statement = insert(Conversation).values([
+            {'user_id': user_id, 'partner_id': partner_id, 'last_message_id': message.id,
+             'last_sent_at': message.sent_at, 'unread_count': unread}
+            for user_id, partner_id, unread in ((sender_id, recipient_id, 0), (recipient_id, sender_id, 1))
+        ])
+        table = Conversation.__table__
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=['user_id', 'partner_id'],
+            set_={
+                'last_message_id': statement.excluded.last_message_id,
+                'last_sent_at': statement.excluded.last_sent_at,
+                'unread_count': table.c.unread_count + statement.excluded.unread_count,
+            }
+        ))
+
+        on_commit(partial(UnreadCounters.adjust, UnreadCounters.MESSAGES, recipient_id, 1))
+        on_commit(partial(MessageService._message_committed, message.id, sender_id, recipient_id))
+        JobQueue.enqueue('messages.notify_recipient', {'message_id': message.id})
+        if commit:
+            db.session.commit()
+        return message
+
+    @staticmethod
+    def get_thread(user_id, partner_id, before_id=None, after_id=None, limit=50):
+        """Get one page of the thread between user and partner, oldest first.
+
+        With no cursor the latest ``limit`` messages are returned; ``before_id``
+        pages backwards through older history and ``after_id`` returns only
+        messages newer than the client already has. Returns ``(messages,
+        has_more)`` where ``has_more`` says whether another page exists in the
+        requested direction.
+        """
+        query = Message.query.filter(
+            ((Message.sender_id == user_id) & (Message.recipient_id == partner_id)) |
+            ((Message.sender_id == partner_id) & (Message.recipient_id == user_id))
+        )
+
+        if after_id is not None:
+            messages = query.filter(Message.id > after_id)\
+                .order_by(Message.id.asc()).limit(limit + 1).all()
+            return messages[:limit], len(messages) > limit
+
+        if before_id is not None:
+            query = query.filter(Message.id < before_id)
+        messages = query.order_by(Message.id.desc()).limit(limit + 1).all()
+        has_more = len(messages) > limit
+        return list(reversed(messages[:limit])), has_more
+
+    @staticmethod
+    def read_thread(user_id, partner_id, before_id=None, after_id=None, limit=50):
+        """One page of the thread as the messages API returns it, marking it read.
+
+        Takes the arguments of ``get_thread`` and commits.
+        """
+        messages, has_more = MessageService.get_thread(
+            user_id, partner_id, before_id=before_id, after_id=after_id, limit=limit)
+
+        # Mark received messages as read, only those actually returned.
+        # Committed after serializing, which the commit's expiry would
+        # otherwise turn into a SELECT per message.
+        MessageService.mark_messages_read(user_id, partner_id, messages, commit=False)
+
+        data = {
+            'success': True,
+            'messages': [{
+                'id': msg.id,
+                'sender_id': msg.sender_id,
+                'recipient_id': msg.recipient_id,
+                'content': msg.content,
+                'sent_at': msg.sent_at.isoformat(),
+                'is_read': msg.is_read
+            } for msg in messages],
+            'has_more': has_more,
+            'oldest_id': messages[0].id if messages else None,
+            'newest_id': messages[-1].id if messages else None
+        }
+        db.session.commit()
+        return data
+
+    @staticmethod
+    def thread_version(user_id, partner_id):
+        """Cheap token that changes whenever the thread or its read state does.
+
+        Built from both sides' conversation summaries: the latest message id,
+        the user's unread count and the partner's unread count (which falls
+        as the partner reads the user's messages).
+        """
+        rows = db.session.query(Conversation.user_id, Conversation.last_message_id,
+                                Conversation.unread_count).filter(
+            ((Conversation.user_id == user_id) & (Conversation.partner_id == partner_id)) |
+            ((Conversation.user_id == partner_id) & (Conversation.partner_id == user_id))
+        ).all()
+        summaries = {row.user_id: row for row in rows}
+        mine = summaries.get(user_id)
+        theirs = summaries.get(partner_id)
+        return (mine.last_message_id if mine else None,
+                mine.unread_count if mine else 0,
+                theirs.unread_count if theirs else 0)
+
+    @staticmethod
+    def mark_messages_read(user_id, partner_id, messages, commit=True):
+        """Mark the given messages read if user received them unread.
+
+        The loaded messages are updated in place without being reloaded.
+        Pass ``commit=False`` to serialize them before the caller commits;
+        the cached unread count is adjusted once the commit succeeds.
+        """
+        message_ids = [m.id for m in messages
+                       if m.recipient_id == user_id and m.sender_id == partner_id and not m.is_read]
+        if not message_ids:
+            return 0
+
+        marked = Message.query.filter(Message.id.in_(message_ids))\
+            .filter_by(is_read=False)\
+            .update({'is_read': True}, synchronize_session=False)
+        # Already written by the UPDATE, so the flush mustn't repeat it
+        for message in messages:
+            if message.id in message_ids:
+                set_committed_value(message, 'is_read', True)
+
+        Conversation.query.filter_by(
+            user_id=user_id,
+            partner_id=partner_id
+        ).update({'unread_count': db.case(
+            (Conversation.unread_count > marked, Conversation.unread_count - marked),
+            else_=0
+        )}, synchronize_session=False)
+        on_commit(partial(UnreadCounters.adjust, UnreadCounters.MESSAGES, user_id, -marked))
+        if commit:
+            db.session.commit()
+        return marked
+
+    @staticmethod
+    def get_unread_count(user_id):
+        """Get count of unread messages for a user"""
+        return UnreadCounters.get(UnreadCounters.MESSAGES, user_id)
+
+    @staticmethod
+    def _message_committed(message_id, sender_id, recipient_id):
+        # Wakes both sides' long-polls on the thread (see app.asgi)
+        event = {'type': 'new-message', 'message_id': message_id,
+                 'sender_id': sender_id, 'recipient_id': recipient_id}
+        NotificationService._publish_many([(recipient_id, event), (sender_id, event)])
+
+    @staticmethod
+    def get_conversations(user_id):
+        """Get one summary row per conversation, most recent first"""
+        return Conversation.query.filter_by(user_id=user_id)\
+            .options(joinedload(Conversation.partner), joinedload(Conversation.last_message))\
+            .order_by(Conversation.last_sent_at.desc())\
+            .all()
+
+
+@job('messages.notify_recipient')
+def _notify_recipient(message_id):
+    message = db.session.get(Message, message_id, options=[joinedload(Message.sender)])
+    if message is None:
+        return
+    NotificationService.create_notification(
+        message.recipient_id,
+        'New Message',
+        f'{message.sender.username} sent you a message',
+        'message',
+        commit=False
+    )
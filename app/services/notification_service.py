@@ -1,40 +1,212 @@
+import logging
+from datetime import datetime
+from functools import partial
 from app import db
 from app.models import Notification
+from app.services.hooks import before_commit, on_commit, transaction_state
+from app.services.realtime import get_broker
+from app.services.unread_counters import UnreadCounters
+
+logger = logging.getLogger(__name__)
+
+# Rows per multi-row INSERT, well under the bind parameter limits of
+# PostgreSQL and SQLite
+BULK_INSERT_BATCH_SIZE = 1000
 
 class NotificationService:
     @staticmethod
-    def create_notification(user_id, title, message, notification_type):
-        """Create a new notification for a user"""
+    def create_notification(user_id, title, message, notification_type, commit=True):
+        """Create a new notification for a user.
+
+        Pass ``commit=False`` to queue the notification in the caller's unit
+        of work: it is written by the caller's next commit, in the same
+        transaction as the domain change, and pushed to clients only after
+        that commit succeeds.
+        """
         notification = Notification(
             user_id=user_id,
             title=title,
             message=message,
-            type=notification_type
+            type=notification_type,
+            created_at=datetime.utcnow()
         )
         db.session.add(notification)
-        db.session.commit()
+        NotificationService._queue(notification)
+        if commit:
+            db.session.commit()
         return notification
     
+    @staticmethod
+    def create_notifications(user_ids, title, message, notification_type, commit=True):
+        """Create the same notification for many users with multi-row INSERTs.
+
+        Duplicate user ids are ignored. Returns the number of notifications
+        created. ``commit`` behaves as in ``create_notification``.
+        """
+        return NotificationService.create_many([
+            (user_id, title, message, notification_type)
+            for user_id in dict.fromkeys(user_ids)
+        ], commit=commit)
+    
+    @staticmethod
+    def create_many(notifications, commit=True):
+        """Create notifications from (user_id, title, message, type) tuples with multi-row INSERTs.
+
+        Returns the number of notifications created. ``commit`` behaves as
+        in ``create_notification``.
+        """
+        if not notifications:
+            return 0
+
+        created_at = datetime.utcnow()
+        events = []
+        returning = db.engine.dialect.insert_returning
+        for start in range(0, len(notifications), BULK_INSERT_BATCH_SIZE):
+            batch = notifications[start:start + BULK_INSERT_BATCH_SIZE]
+            rows = [{
+                'user_id': user_id,
+                'title': title,
+                'message': message,
+                'type': notification_type,
+                'is_read': False,
+                'created_at': created_at
+            } for user_id, title, message, notification_type in batch]
+
+            # Executed as multi-row INSERTs; with RETURNING the ids come back
+            # in the order of the rows
+            if returning:
+                ids = db.session.scalars(
+                    db.insert(Notification).returning(Notification.id, sort_by_parameter_order=True),
+                    rows).all()
+            else:
+                db.session.execute(db.insert(Notification), rows)
+                ids = [None] * len(batch)
+
+            events.extend(NotificationService._event_data(
+                notification_id, user_id, title, message, notification_type, created_at)
+                for notification_id, (user_id, title, message, notification_type) in zip(ids, batch))
+
+        on_commit(partial(NotificationService._notifications_committed, events))
+        if commit:
+            db.session.commit()
+        return len(notifications)
+    
     @staticmethod
     def mark_as_read(notification_id, user_id):
         """Mark a notification as read"""
-        notification = Notification.query.filter_by(
-            id=notification_id, user_id=user_id).first()
-        if notification:
-            notification.is_read = True
-            db.session.commit()
-            return True
-        return False
+        # Guarded, so of two concurrent calls only the one that changed the
+        # row adjusts the cached count
+        marked = Notification.query.filter_by(
+            id=notification_id, user_id=user_id, is_read=False).update({'is_read': True})
+        found = bool(marked) or db.session.query(Notification.query.filter_by(
+            id=notification_id, user_id=user_id).exists()).scalar()
+        db.session.commit()
+        if marked:
+            UnreadCounters.adjust(UnreadCounters.NOTIFICATIONS, user_id, -1)
+            NotificationService.publish_unread_count(user_id)
+        return found
+    
+    @staticmethod
+    def mark_all_as_read(user_id):
+        """Mark all of a user's notifications as read"""
+        marked = Notification.query.filter_by(
+            user_id=user_id, is_read=False).update({'is_read': True})
+        db.session.commit()
+        if marked:
+            UnreadCounters.adjust(UnreadCounters.NOTIFICATIONS, user_id, -marked)
+            NotificationService.publish_unread_count(user_id)
+        return marked
+    
+    @staticmethod
+    def delete_notification(notification_id, user_id):
+        """Delete one of a user's notifications"""
+        # Deleting an unread row first tells from the row count whether the
+        # cached count must drop, even if the row is marked read meanwhile
+        unread = Notification.query.filter_by(
+            id=notification_id, user_id=user_id, is_read=False).delete()
+        deleted = unread or Notification.query.filter_by(
+            id=notification_id, user_id=user_id).delete()
+        db.session.commit()
+        if unread:
+            UnreadCounters.adjust(UnreadCounters.NOTIFICATIONS, user_id, -1)
+            NotificationService.publish_unread_count(user_id)
+        return bool(deleted)
     
     @staticmethod
     def get_unread_count(user_id):
         """Get count of unread notifications for a user"""
-        return Notification.query.filter_by(
-            user_id=user_id, is_read=False).count()
+        return UnreadCounters.get(UnreadCounters.NOTIFICATIONS, user_id)
     
     @staticmethod
     def get_user_notifications(user_id, limit=20):
         """Get recent notifications for a user"""
         return Notification.query.filter_by(user_id=user_id)\
             .order_by(Notification.created_at.desc())\
-            .limit(limit).all()
\ No newline at end of file
+            .limit(limit).all()
+    
+    @staticmethod
+    def publish_unread_count(user_id):
+        """Push the current unread count to open streams"""
+        NotificationService._publish(user_id, {
+            'type': 'unread-count',
+            'count': NotificationService.get_unread_count(user_id)
+        })
+    
+    @staticmethod
+    def _queue(notification):
+        # Notifications queued in this transaction; the first one registers a
+        # before_commit hook that snapshots them all once they have ids
+        pending = transaction_state('pending_notifications', list)
+        if not pending:
+            before_commit(partial(NotificationService._prepare_events, pending))
+        pending.append(notification)
+    
+    @staticmethod
+    def _prepare_events(pending, session):
+        session.flush()
+        events = [NotificationService._event_data(
+            n.id, n.user_id, n.title, n.message, n.type, n.created_at)
+            for n in pending if n in session]
+        on_commit(partial(NotificationService._notifications_committed, events), session)
+    
+    @staticmethod
+    def _event_data(notification_id, user_id, title, message, notification_type, created_at):
+        return {
+            'id': notification_id,
+            'user_id': user_id,
+            'title': title,
+            # NOTIFY payloads are capped at 8000 bytes
+            'message': message[:500],
+            'type': notification_type,
+            'created_at': created_at.isoformat()
+        }
+    
+    @staticmethod
+    def _notifications_committed(events):
+        # Runs after commit, so only the cache and broker may be touched here
+        published = []
+        for event in events:
+            user_id = event['user_id']
+            count = UnreadCounters.adjust(UnreadCounters.NOTIFICATIONS, user_id, 1)
+            published.append((user_id, {
+                'type': 'notification',
+                'notification': event,
+                # None when the count isn't cached; clients refetch it
+                'unread_count': count
+            }))
+        NotificationService._publish_many(published)
+    
+    @staticmethod
+    def _publish(user_id, event):
+        NotificationService._publish_many([(user_id, event)])
+    
+    @staticmethod
+    def _publish_many(events):
+        # Delivery is best effort: the rows are committed and clients that miss
+        # an event resync from the count sent when their stream (re)connects
+        if not events:
+            return
+        try:
+            get_broker().publish_many(events)
+        except Exception:
+            logger.exception('Failed to publish notification events')
@@ -0,0 +1,225 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from functools import partial, wraps
+from urllib.parse import urlencode
+from flask import current_app, request, session, make_response, Response
+from flask_login import current_user
+from markupsafe import Markup
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.models import Project, Application
+from app.replicas import primary
+from app.services.cache import get_cache
+from app.services.hooks import on_commit, transaction_state
+
+# Every cached page and fragment key includes the current generation, so
+# replacing it invalidates them all at once; old entries age out of the cache.
+# Scopes add a generation of their own under GENERATION_KEY:<scope>, so a
+# change only invalidates the pages that show it.
+GENERATION_KEY = 'page:generation'
+
+# Pages listing projects: the home page and the project listing
+LISTING = 'listing'
+
+
+def project_scope(project_id):
+    """Scope of the pages and fragments showing a single project"""
+    return f'project:{project_id}'
+
+
+class PageCacheStats:
+    """Per-process hit/miss counters, exported on the metrics endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+
+    def record(self, kind, result):
+        with self._lock:
+            self._counts[(kind, result)] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+    def render(self):
+        """Counters in Prometheus text exposition format"""
+        name = 'collab_page_cache_total'
+        lines = [f'# HELP {name} Page and fragment cache lookups by result',
+                 f'# TYPE {name} counter']
+        for (kind, result), count in sorted(self.snapshot().items()):
+            lines.append(f'{name}{{kind="{kind}",result="{result}"}} {count}')
+        return lines
+
+
+class PageCache:
+    """Whole-page cache for logged-out visitors, plus a fragment cache.
+
+    Pages are keyed on endpoint, path and query arguments and served with
+    an ETag and Last-Modified, so browsers and nginx revalidate with a 304
+    instead of downloading the page again. Committing a change to a project
+    starts a new generation of the listings and of that project's pages; a
+    change to an application only of its project's pages. Bulk changes to
+    projects start a new generation of everything.
+    """
+
+    stats = PageCacheStats()
+
+    @staticmethod
+    def generation(scope=None):
+        """Current generations of everything and of ``scope``, as the times of their last invalidations"""
+        cache = get_cache()
+        generations = []
+        for key_scope in (None, scope) if scope else (None,):
+            generation = cache.get(PageCache._generation_key(key_scope))
+            if generation is None:
+                # Lost or never set: start afresh rather than trust old entries
+                generation = PageCache.invalidate(key_scope)
+            generations.append(generation)
+        return generations
+
+    @staticmethod
+    def invalidate(scope=None):
+        """Start a new generation of ``scope``'s pages, or of every page"""
+        generation = time.time()
+        # A lost scope generation only causes misses, so it may expire;
+        # the global one is kept
+        get_cache().set(PageCache._generation_key(scope), generation, ttl=None if scope else 0)
+        PageCache.stats.record('generation', 'invalidated')
+        return generation
+
+    @staticmethod
+    def _generation_key(scope):
+        return f'{GENERATION_KEY}:{scope}' if scope else GENERATION_KEY
+
+    @staticmethod
+    def cacheable():
+        # Flashed messages are per-visitor, so a page showing them can't be shared
+        return (current_app.config['PAGE_CACHE_ENABLED'] and
+                request.method in ('GET', 'HEAD') and
+                not current_user.is_authenticated and
+                '_flashes' not in session)
+
+    @staticmethod
+    def page_key(generations):
+        args = urlencode(sorted(request.args.items(multi=True)))
+        digest = hashlib.sha1(f'{request.path}?{args}'.encode()).hexdigest()
+        return f'page:{_join(generations)}:{request.endpoint}:{digest}'
+
+    @staticmethod
+    def fragment(name, render, *vary, scope=None, ttl=None):
+        """Return cached HTML for a fragment, calling ``render()`` on a miss.
+
+        ``vary`` values are added to the key (e.g. a project id) and
+        ``scope`` says which changes invalidate it. Fragments are shared by
+        every visitor, so they must not depend on the user.
+        """
+        cache = get_cache()
+        key = f'fragment:{_join(PageCache.generation(scope))}:{name}:' + ':'.join(str(v) for v in vary)
+        html = cache.get(key)
+        if html is None:
+            PageCache.stats.record('fragment', 'miss')
+            with primary():
+                html = str(render())
+            cache.set(key, html, ttl=current_app.config['PAGE_CACHE_TTL'] if ttl is None else ttl)
+        else:
+            PageCache.stats.record('fragment', 'hit')
+        return Markup(html)
+
+
+def _join(generations):
+    return '-'.join(repr(generation) for generation in generations)
+
+
+def cached_page(scope):
+    """Serve a view from the page cache to logged-out visitors.
+
+    ``scope`` is the scope of the page's contents, or a function that
+    returns it from the view's arguments.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not PageCache.cacheable():
+                return view(*args, **kwargs)
+
+            cache = get_cache()
+            generations = PageCache.generation(scope(*args, **kwargs) if callable(scope) else scope)
+            key = PageCache.page_key(generations)
+            entry = cache.get(key)
+            if entry is not None:
+                PageCache.stats.record('page', 'hit')
+                response = Response(entry['body'], mimetype=entry['mimetype'])
+                response.headers['X-Cache'] = 'HIT'
+            else:
+                PageCache.stats.record('page', 'miss')
+                # Shared until the next change, so rendered from the primary
+                with primary():
+                    response = make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.direct_passthrough:
+                    return response
+                entry = {
+                    'body': response.get_data(as_text=True),
+                    'mimetype': response.mimetype,
+                    'etag': hashlib.sha1(response.get_data()).hexdigest(),
+                    'last_modified': int(max(generations)),
+                }
+                cache.set(key, entry, ttl=current_app.config['PAGE_CACHE_TTL'])
+                response.headers['X-Cache'] = 'MISS'
+
+            response.set_etag(entry['etag'])
+            response.last_modified = datetime.fromtimestamp(entry['last_modified'], timezone.utc)
+            response.cache_control.public = True
+            response.cache_control.max_age = current_app.config['PAGE_CACHE_MAX_AGE']
+            # Logged-in visitors get a different page at the same URL
+            response.vary.add('Cookie')
+            response = response.make_conditional(request)
+            if response.status_code == 304:
+                PageCache.stats.record('page', 'not_modified')
+            return response
+        return wrapper
+    return decorator
+
+
+def _invalidate_on_commit(session, scope):
+    # Each scope once per transaction, after it commits; None is every page
+    scopes = transaction_state('page_cache', set, session)
+    if not scopes:
+        on_commit(partial(_invalidate_scopes, scopes), session)
+    scopes.add(scope)
+
+
+def _invalidate_scopes(scopes):
+    if None in scopes:
+        PageCache.invalidate()
+        return
+    for scope in scopes:
+        PageCache.invalidate(scope)
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_flushed_changes(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Project):
+            _invalidate_on_commit(session, LISTING)
+            _invalidate_on_commit(session, project_scope(obj.id))
+        elif isinstance(obj, Application):
+            # The listings' application counts may lag by PAGE_CACHE_TTL
+            # rather than expire every listing whenever someone applies
+            _invalidate_on_commit(session, project_scope(obj.project_id))
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _track_bulk_changes(orm_execute_state):
+    # Bulk UPDATE/DELETE statements bypass the flush and don't say which
+    # rows they change. Cached pages show how many applications a project
+    # has, not their statuses, so only deleting them matters.
+    mapper = orm_execute_state.bind_mapper
+    if mapper is None:
+        return
+    if (orm_execute_state.is_update and issubclass(mapper.class_, Project)) or \
+            (orm_execute_state.is_delete and issubclass(mapper.class_, (Project, Application))):
+        _invalidate_on_commit(orm_execute_state.session, None)
@@ -0,0 +1,139 @@
+import base64
+import time
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Project
+from app.replicas import primary
+from app.services.cache import get_cache
+from app.services.hooks import on_commit, transaction_state
+from app.services.skill_service import SkillService, normalize
+
+# Cached totals are keyed by generation, like the page cache; a new
+# generation makes every filter's count miss once
+COUNT_GENERATION_KEY = 'project_count:generation'
+
+# Project changes that move a project between listings
+COUNTED_ATTRIBUTES = ('status', 'skill_tags')
+
+
+class ListingPage:
+    """One keyset page of projects"""
+
+    def __init__(self, items, next_cursor, total, first):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.total = total
+        self.first = first
+
+
+class ProjectListing:
+    """The /projects listing, paged by a (created_at, id) keyset cursor.
+
+    Each page is one indexed range scan of PER_PAGE + 1 rows, however deep
+    the visitor has scrolled. Totals are counted once per (status, skills)
+    filter and cached until a project is created, deleted, or changes
+    status or skills.
+    """
+
+    PER_PAGE = 12
+
+    @staticmethod
+    def query(status, skills=None, match_all=True):
+        query = Project.query.filter_by(status=status)
+        if skills:
+            query = SkillService.filter_projects(query, skills, match_all=match_all)
+        return query
+
+    @staticmethod
+    def page(status, skills=None, match_all=True, after=None, per_page=PER_PAGE, options=()):
+        """The page of projects following the ``after`` cursor (the first page without one)"""
+        query = ProjectListing.query(status, skills, match_all)\
+            .order_by(Project.created_at.desc(), Project.id.desc())
+        position = ProjectListing.decode_cursor(after)
+        if position is not None:
+            query = query.filter(db.tuple_(Project.created_at, Project.id) < position)
+        rows = query.options(*options).limit(per_page + 1).all()
+        items = rows[:per_page]
+        next_cursor = ProjectListing.encode_cursor(items[-1]) if len(rows) > per_page else None
+        return ListingPage(items, next_cursor, ProjectListing.count(status, skills, match_all),
+                           first=position is None)
+
+    @staticmethod
+    def encode_cursor(project):
+        position = f'{project.created_at.isoformat()}|{project.id}'
+        return base64.urlsafe_b64encode(position.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """(created_at, id) from a cursor, or None if it is missing or malformed"""
+        if not cursor:
+            return None
+        try:
+            position = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+            created_at, project_id = position.split('|')
+            return datetime.fromisoformat(created_at), int(project_id)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def count(status, skills=None, match_all=True):
+        """Number of projects matching a filter, from the cache when possible"""
+        cache = get_cache()
+        skill_key = ','.join(sorted({normalize(name) for name in skills or ()}))
+        key = f"project_count:{ProjectListing.generation()}:{status}:{'all' if match_all else 'any'}:{skill_key}"
+        total = cache.get(key)
+        if total is None:
+            with primary():
+                total = ProjectListing.query(status, skills, match_all).order_by(None).count()
+            cache.set(key, total, ttl=current_app.config['PROJECT_COUNT_TTL'])
+        return total
+
+    @staticmethod
+    def generation():
+        generation = get_cache().get(COUNT_GENERATION_KEY)
+        if generation is None:
+            generation = ProjectListing.invalidate_counts()
+        return generation
+
+    @staticmethod
+    def invalidate_counts():
+        generation = time.time()
+        get_cache().set(COUNT_GENERATION_KEY, generation, ttl=0)
+        return generation
+
+
+def _invalidate_on_commit(session):
+    # Once per transaction, after it commits
+    state = transaction_state('project_listing', dict, session)
+    if not state.get('invalidate'):
+        state['invalidate'] = True
+        on_commit(ProjectListing.invalidate_counts, session)
+
+
+def _changes_listing(obj):
+    state = db.inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in COUNTED_ATTRIBUTES)
+
+
+@event.listens_for(Session, 'after_flush')
+def _track_flushed_changes(session, flush_context):
+    for obj in list(session.new) + list(session.deleted):
+        if isinstance(obj, Project):
+            _invalidate_on_commit(session)
+            return
+    for obj in session.dirty:
+        if isinstance(obj, Project) and _changes_listing(obj):
+            _invalidate_on_commit(session)
+            return
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _track_bulk_changes(orm_execute_state):
+    # Bulk INSERT/UPDATE/DELETE statements bypass the flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and issubclass(mapper.class_, Project):
+            _invalidate_on_commit(orm_execute_state.session)
@@ -0,0 +1,190 @@
+from datetime import datetime
+from app import db
+from app.models import Project, Application, Submission, DeveloperProfile
+from app.services.analytics import Analytics
+from app.services.jobs import JobQueue, job
+from app.services.notification_service import NotificationService
+
+WINNER_REPUTATION = 10
+PARTICIPATION_REPUTATION = 2
+
+# Most applications one bulk review may change
+MAX_REVIEW_BATCH = 500
+# Projects whose applications can still be reviewed
+REVIEWABLE_STATUSES = ('open', 'shortlisting', 'submission')
+# Application statuses each review action applies to
+REVIEW_ACTIONS = {
+    'shortlist': ('shortlisted', ('pending', 'rejected')),
+    'reject': ('rejected', ('pending',)),
+}
+
+
+class ProjectService:
+    @staticmethod
+    def declare_winner(project, submission):
+        """Mark a submission as the winner and close out the project.
+
+        Reputation is awarded with set-based UPDATEs, so the number of
+        queries is the same for any number of applicants, and the
+        announcements to every applicant are queued as a background job in
+        the same commit.
+        """
+        submission.is_winner = True
+        Analytics.project_status_changed(project.company_id, project.status, 'completed')
+        project.status = 'completed'
+        winner_id = submission.application.developer_id
+
+        # Shortlisted applicants who submitted work, the winner included
+        participants = db.select(Application.developer_id)\
+            .join(Submission, Submission.application_id == Application.id)\
+            .where(Application.project_id == project.id,
+                   Application.status == 'shortlisted')\
+            .scalar_subquery()
+
+        db.session.execute(
+            db.update(DeveloperProfile)
+            .where(DeveloperProfile.user_id == winner_id)
+            .values(reputation_score=DeveloperProfile.reputation_score + WINNER_REPUTATION)
+        )
+        db.session.execute(
+            db.update(DeveloperProfile)
+            .where(DeveloperProfile.user_id.in_(participants))
+            .values(reputation_score=DeveloperProfile.reputation_score + PARTICIPATION_REPUTATION),
+            execution_options={'synchronize_session': False}
+        )
+
+        JobQueue.enqueue('projects.announce_winner', {'project_id': project.id, 'winner_id': winner_id})
+        db.session.commit()
+
+    @staticmethod
+    def review_applications(project_id, application_ids, action):
+        """Shortlist or reject a batch of a project's applications.
+
+        The project row is locked for the transaction, so the shortlisted
+        count taken under it holds until the commit and concurrent reviews
+        can't overfill ``max_shortlist``. Applications are shortlisted in
+        the order given while slots remain. The statuses change with one
+        guarded UPDATE and the developers are notified with one multi-row
+        INSERT, all in a single commit, however many applications there
+        are. Returns one result dict per distinct id, in order:
+        ``{'id', 'ok', 'status'}`` plus ``'error'`` for those left unchanged.
+        """
+        new_status, from_statuses = REVIEW_ACTIONS[action]
+        application_ids = list(dict.fromkeys(application_ids))
+        project = db.session.get(Project, project_id, with_for_update=True, populate_existing=True)
+
+        current = {a.id: a for a in db.session.query(
+            Application.id, Application.status, Application.developer_id)
+            .filter(Application.id.in_(application_ids),
+                    Application.project_id == project.id)}
+        shortlisted = db.session.query(db.func.count(Application.id))\
+            .filter_by(project_id=project.id, status='shortlisted').scalar()
+        slots = project.max_shortlist - shortlisted
+
+        results, changed = [], []
+        for application_id in application_ids:
+            application = current.get(application_id)
+            if application is None:
+                results.append({'id': application_id, 'ok': False, 'status': None,
+                                'error': 'Application not found'})
+                continue
+            result = {'id': application_id, 'ok': False, 'status': application.status}
+            if project.status not in REVIEWABLE_STATUSES:
+                result['error'] = f'The project is {project.status}'
+            elif application.status == new_status:
+                result['error'] = f'Already {new_status}'
+            elif application.status not in from_statuses:
+                result['error'] = f'{application.status.title()} applications cannot be {new_status}'
+            elif action == 'shortlist' and len(changed) >= slots:
+                result['error'] = 'Maximum shortlist limit reached'
+            else:
+                result.update(ok=True, status=new_status)
+                changed.append(application_id)
+            results.append(result)
+
+        if not changed:
+            db.session.commit()
+            return results
+
+        now = datetime.utcnow()
+        values = {'status': new_status}
+        if action == 'shortlist':
+            values['shortlisted_at'] = now
+        # The status guard only matters where the project lock isn't available (SQLite)
+        db.session.execute(
+            db.update(Application)
+            .where(Application.id.in_(changed), Application.status.in_(from_statuses))
+            .values(**values)
+        )
+        developers = [current[application_id].developer_id for application_id in changed]
+
+        if action == 'shortlist':
+            Analytics.application_shortlisted(project, now, first=shortlisted == 0, count=len(changed))
+            if project.status == 'open':
+                project.status = 'shortlisting'
+                Analytics.project_status_changed(project.company_id, 'open', 'shortlisting')
+            NotificationService.create_notifications(
+                developers,
+                'Shortlisted!',
+                f'You have been shortlisted for project "{project.title}"',
+                'shortlist',
+                commit=False
+            )
+        else:
+            NotificationService.create_notifications(
+                developers,
+                'Application Update',
+                f'Your application for "{project.title}" was not selected this time.',
+                'application',
+                commit=False
+            )
+        db.session.commit()
+        return results
+
+
+@job('projects.announce_winner')
+def _announce_winner(project_id, winner_id):
+    # Notifies the winner and every other applicant, with bulk inserts
+    project = db.session.get(Project, project_id)
+    applicants = db.session.query(
+        Application.developer_id, Application.status, Submission.id)\
+        .outerjoin(Submission, Submission.application_id == Application.id)\
+        .filter(Application.project_id == project.id,
+                Application.developer_id != winner_id)\
+        .all()
+
+    submitters = [a.developer_id for a in applicants if a.id is not None]
+    shortlisted = [a.developer_id for a in applicants
+                   if a.id is None and a.status == 'shortlisted']
+    others = [a.developer_id for a in applicants
+              if a.id is None and a.status != 'shortlisted']
+
+    NotificationService.create_notification(
+        winner_id,
+        'Congratulations! You Won!',
+        f'You won the project "{project.title}" and earned ${project.winner_reward}!',
+        'winner',
+        commit=False
+    )
+    NotificationService.create_notifications(
+        submitters,
+        'Winner Announced',
+        f'A winner has been chosen for "{project.title}". Thanks for your submission, '
+        f'you earned {PARTICIPATION_REPUTATION} reputation points.',
+        'winner',
+        commit=False
+    )
+    NotificationService.create_notifications(
+        shortlisted,
+        'Winner Announced',
+        f'A winner has been chosen for "{project.title}".',
+        'winner',
+        commit=False
+    )
+    NotificationService.create_notifications(
+        others,
+        'Project Closed',
+        f'"{project.title}" has been completed and is no longer accepting applications.',
+        'project',
+        commit=False
+    )
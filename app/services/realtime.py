@@ -0,0 +1,183 @@
+import asyncio
+import json
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from flask import current_app
+from sqlalchemy.dialects import postgresql
+from app import db
+
+logger = logging.getLogger(__name__)
+
+
+def format_event(event):
+    """Encode an event as a Server-Sent Events message"""
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+class AsyncSubscription:
+    """Subscription for asyncio consumers (the ASGI stream app).
+
+    Brokers deliver from publisher and listener threads, so events are
+    handed to the event loop with call_soon_threadsafe.
+    """
+
+    def __init__(self, loop, maxsize=100):
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize)
+
+    def put_nowait(self, event):
+        self._loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            pass
+
+    async def get(self):
+        return await self._queue.get()
+
+
+class InProcessBroker:
+    """Fan out events to subscribers inside this worker process.
+
+    Only correct when a single worker serves every stream; use the
+    Postgres broker when gunicorn runs several workers.
+    """
+
+    def __init__(self, app=None):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id, subscription=None):
+        """Register a queue for the user's events (a queue.Queue by default)"""
+        if subscription is None:
+            subscription = queue.Queue(maxsize=100)
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, user_id, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(user_id)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[user_id]
+
+    def publish(self, user_id, event):
+        self._deliver(user_id, event)
+
+    def publish_many(self, events):
+        """Publish several ``(user_id, event)`` pairs, in order"""
+        for user_id, event in events:
+            self._deliver(user_id, event)
+
+    def _deliver(self, user_id, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.put_nowait(event)
+            except queue.Full:
+                # A stalled client must not block publishers
+                pass
+
+
+class PostgresBroker(InProcessBroker):
+    """Fan out events across workers with PostgreSQL LISTEN/NOTIFY.
+
+    Publishers send ``pg_notify`` on the shared channel; each worker keeps one
+    dedicated listening connection and delivers payloads to its local
+    subscribers.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.channel = app.config['NOTIFICATION_CHANNEL']
+        self.poll_interval = app.config['NOTIFICATION_LISTEN_INTERVAL']
+        self.retry_interval = app.config['NOTIFICATION_LISTEN_RETRY']
+        self._app = app
+        self._listener = None
+
+    def subscribe(self, user_id, subscription=None):
+        self._ensure_listener()
+        return super().subscribe(user_id, subscription)
+
+    def publish(self, user_id, event):
+        self.publish_many([(user_id, event)])
+
+    def publish_many(self, events):
+        # One connection and one statement for all of them, however many
+        # events a commit produced; NOTIFY keeps their order
+        payloads = [json.dumps({'user_id': user_id, 'event': event}) for user_id, event in events]
+        if not payloads:
+            return
+        rows = db.func.unnest(db.bindparam(
+            'payloads', payloads, type_=postgresql.ARRAY(db.Text))).table_valued('payload')
+        with db.engine.begin() as connection:
+            connection.execute(db.select(db.func.pg_notify(self.channel, rows.c.payload)))
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(
+                    target=self._listen, name='notification-listener', daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        while True:
+            try:
+                with self._app.app_context():
+                    connection = db.engine.raw_connection()
+                # The listener lives for the whole process; keep it out of the pool
+                connection.detach()
+                dbapi_connection = connection.driver_connection
+                dbapi_connection.autocommit = True
+                cursor = dbapi_connection.cursor()
+                cursor.execute(f'LISTEN "{self.channel}"')
+
+                while True:
+                    # pg8000 only reads notifications off the wire while it
+                    # runs a statement, so issue a cheap one every interval
+                    if hasattr(dbapi_connection, 'poll'):
+                        dbapi_connection.poll()
+                    else:
+                        cursor.execute('SELECT 1')
+                    self._drain(dbapi_connection.notifications)
+                    time.sleep(self.poll_interval)
+            except Exception:
+                logger.exception('Notification listener failed; reconnecting')
+                time.sleep(self.retry_interval)
+
+    def _drain(self, notifications):
+        while notifications:
+            notification = notifications.pop(0) if isinstance(notifications, list) \
+                else notifications.popleft()
+            payload = getattr(notification, 'payload', None)
+            if payload is None:
+                payload = notification[2]
+            try:
+                message = json.loads(payload)
+                self._deliver(message['user_id'], message['event'])
+            except (ValueError, KeyError, TypeError):
+                logger.warning('Ignoring malformed notification payload: %r', payload)
+
+
+BROKERS = {
+    'memory': InProcessBroker,
+    'postgres': PostgresBroker,
+}
+
+
+def get_broker():
+    """Get the notification broker for the current app, creating it on first use"""
+    app = current_app._get_current_object()
+    broker = app.extensions.get('notification_broker')
+    if broker is None:
+        broker_class = BROKERS[app.config['NOTIFICATION_BROKER']]
+        broker = app.extensions.setdefault('notification_broker', broker_class(app))
+    return broker
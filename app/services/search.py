@@ -0,0 +1,75 @@
+import re
+from markupsafe import Markup, escape
+from sqlalchemy.orm import with_expression
+from app import db
+from app.models import Project
+
+# Snippet delimiters: control characters never appear in project text, so
+# the snippet can be HTML-escaped first and the marks substituted after
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+
+_fts = db.table('project_fts', db.column('rowid'))
+
+
+class ProjectSearch:
+    """Ranked full-text search over project title, skills and description.
+
+    Uses the generated ``search_vector`` column on PostgreSQL and the
+    ``project_fts`` FTS5 table on SQLite (see PROJECT_SEARCH_* in models).
+    """
+
+    @staticmethod
+    def search(text, status=None):
+        """Return a Project query for ``text``, best matches first.
+
+        Results have ``search_rank`` (higher is better) and
+        ``search_snippet`` loaded; pass the snippet through ``highlight``
+        before rendering it.
+        """
+        query = Project.query
+        if status:
+            query = query.filter(Project.status == status)
+
+        if db.engine.dialect.name == 'postgresql':
+            tsquery = db.func.websearch_to_tsquery('english', text)
+            vector = db.literal_column('project.search_vector')
+            rank = db.func.ts_rank_cd(vector, tsquery)
+            snippet = db.func.ts_headline(
+                'english', Project.description, tsquery,
+                f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, '
+                'MaxWords=30, MinWords=10, MaxFragments=2')
+            query = query.filter(vector.op('@@')(tsquery))
+        else:
+            match = ProjectSearch._fts5_query(text)
+            if match is None:
+                return query.filter(db.false())
+            table = db.literal_column('project_fts')
+            # bm25 is lower-is-better; weight title over skills over description
+            rank = -db.func.bm25(table, 10.0, 5.0, 1.0)
+            snippet = db.func.snippet(table, 2, HIGHLIGHT_START, HIGHLIGHT_END, '…', 24)
+            query = query.join(_fts, _fts.c.rowid == Project.id)\
+                .filter(table.op('MATCH')(match))
+
+        return query.options(
+            with_expression(Project.search_rank, rank),
+            with_expression(Project.search_snippet, snippet)
+        ).order_by(rank.desc(), Project.created_at.desc())
+
+    @staticmethod
+    def _fts5_query(text):
+        # Quote each word so user input can't use FTS5 query syntax; the
+        # terms are ANDed, as websearch_to_tsquery does
+        terms = re.findall(r'\w+', text)
+        if not terms:
+            return None
+        return ' '.join(f'"{term}"' for term in terms)
+
+    @staticmethod
+    def highlight(snippet):
+        """Escape a snippet and wrap its matched terms in <mark>"""
+        if not snippet:
+            return Markup('')
+        return Markup(str(escape(snippet))
+                      .replace(HIGHLIGHT_START, '<mark>')
+                      .replace(HIGHLIGHT_END, '</mark>'))
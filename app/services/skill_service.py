@@ -0,0 +1,198 @@
+import re
+from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Project, DeveloperProfile, Skill, SkillAlias, project_skill, developer_skill
+
+# Common alternative spellings, keyed by canonical name. Seeded by the
+# skill taxonomy migration, by db.create_all() and by seed_aliases; add
+# more with add_alias.
+DEFAULT_ALIASES = {
+    'JavaScript': ['js', 'javascript es6', 'es6'],
+    'TypeScript': ['ts'],
+    'Node.js': ['node', 'nodejs', 'node js'],
+    'React': ['reactjs', 'react.js', 'react js'],
+    'Vue.js': ['vue', 'vuejs'],
+    'Python': ['py', 'python3'],
+    'Go': ['golang'],
+    'PostgreSQL': ['postgres', 'psql'],
+    'Kubernetes': ['k8s'],
+    'UI/UX Design': ['ui/ux', 'ux/ui', 'ui ux design', 'ux design', 'ui design'],
+    'Adobe Creative Suite': ['adobe cc', 'adobe creative cloud'],
+}
+
+SKILL_SEPARATORS = re.compile(r'[,;\n]')
+
+
+def normalize(name):
+    """Matching key for a skill name: lowercase with whitespace collapsed"""
+    return ' '.join(name.lower().split())
+
+
+class SkillService:
+    @staticmethod
+    def parse(text):
+        """Split a comma-separated skill string into distinct display names"""
+        names = {}
+        for part in SKILL_SEPARATORS.split(text or ''):
+            name = ' '.join(part.split())
+            if name:
+                names.setdefault(normalize(name), name[:100])
+        return list(names.values())
+
+    @staticmethod
+    def resolve(names, create=False):
+        """Map skill names to Skill rows, honouring aliases.
+
+        Unknown names are skipped, or created as new skills when ``create``
+        is set. Returns skills in the order of ``names`` without duplicates.
+        """
+        wanted = {normalize(name): name for name in names}
+        if not wanted:
+            return []
+
+        with db.session.no_autoflush:
+            by_slug = SkillService._lookup(list(wanted))
+            missing = [slug for slug in wanted if slug not in by_slug]
+            if missing and create:
+                SkillService._insert_missing([(wanted[slug], slug) for slug in missing])
+                by_slug.update(SkillService._lookup(missing))
+
+        skills = []
+        for slug in wanted:
+            skill = by_slug.get(slug)
+            if skill is not None and skill not in skills:
+                skills.append(skill)
+        return skills
+
+    @staticmethod
+    def _lookup(slugs):
+        found = {skill.slug: skill for skill in Skill.query.filter(Skill.slug.in_(slugs))}
+        for alias in SkillAlias.query.filter(SkillAlias.alias.in_(slugs)):
+            found[alias.alias] = alias.skill
+        return found
+
+    @staticmethod
+    def _insert_missing(rows):
+        # INSERT ... ON CONFLICT DO NOTHING, so concurrent requests adding the
+        # same new skill don't fail on the unique slug
+        dialect = db.session.get_bind().dialect.name
+        insert = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}.get(dialect)
+        values = [{'name': name, 'slug': slug} for name, slug in rows]
+        if insert is None:
+            db.session.execute(db.insert(Skill), values)
+            return
+        db.session.execute(insert(Skill).values(values).on_conflict_do_nothing(index_elements=['slug']))
+
+    @staticmethod
+    def skill_ids(names):
+        return [skill.id for skill in SkillService.resolve(names)]
+
+    @staticmethod
+    def filter_projects(query, names, match_all=True):
+        """Restrict a Project query to projects needing all (or any) of the skills"""
+        return SkillService._filter(query, Project.id, project_skill.c.project_id,
+                                    project_skill.c.skill_id, names, match_all)
+
+    @staticmethod
+    def filter_developers(query, names, match_all=True):
+        """Restrict a DeveloperProfile query to developers with all (or any) of the skills"""
+        return SkillService._filter(query, DeveloperProfile.id, developer_skill.c.developer_profile_id,
+                                    developer_skill.c.skill_id, names, match_all)
+
+    @staticmethod
+    def _filter(query, owner_id, link_owner_id, link_skill_id, names, match_all):
+        requested = {normalize(name) for name in names}
+        skill_ids = set(SkillService.skill_ids(names))
+        # An unknown skill can't be matched, so an AND filter with one is empty
+        if not skill_ids or (match_all and len(skill_ids) < len(requested)):
+            return query.filter(db.false())
+
+        matching = db.select(link_owner_id).where(link_skill_id.in_(skill_ids))
+        if match_all and len(skill_ids) > 1:
+            matching = matching.group_by(link_owner_id)\
+                .having(db.func.count() == len(skill_ids))
+        return query.filter(owner_id.in_(matching))
+
+    @staticmethod
+    def add_alias(skill_name, alias):
+        """Make ``alias`` resolve to the skill called ``skill_name``"""
+        skill = SkillService.resolve([skill_name], create=True)[0]
+        db.session.add(SkillAlias(skill_id=skill.id, alias=normalize(alias)))
+        return skill
+
+    @staticmethod
+    def seed_aliases():
+        """Add any missing DEFAULT_ALIASES (new databases start with them)"""
+        existing = {alias for alias, in db.session.query(SkillAlias.alias)}
+        for name, aliases in DEFAULT_ALIASES.items():
+            skill = SkillService.resolve([name], create=True)[0]
+            for alias in aliases:
+                if normalize(alias) not in existing:
+                    db.session.add(SkillAlias(skill_id=skill.id, alias=normalize(alias)))
+
+    @staticmethod
+    def rebuild():
+        """Re-derive every project and developer skill link from the skill strings.
+
+        For rows written without the ORM (bulk loads, manual SQL). Returns the
+        number of links written.
+        """
+        SkillService.seed_aliases()
+        db.session.flush()
+        links = 0
+        for model, column, table, owner_column in (
+                (Project, Project.required_skills, project_skill, 'project_id'),
+                (DeveloperProfile, DeveloperProfile.skills, developer_skill, 'developer_profile_id')):
+            rows = db.session.query(model.id, column).all()
+            parsed = {owner_id: SkillService.parse(text) for owner_id, text in rows}
+            names = {normalize(name): name for names in parsed.values() for name in names}
+            SkillService.resolve(list(names.values()), create=True)
+            by_slug = SkillService._lookup(list(names))
+
+            db.session.execute(table.delete())
+            values = []
+            for owner_id, owner_names in parsed.items():
+                skill_ids = {by_slug[normalize(name)].id for name in owner_names
+                             if normalize(name) in by_slug}
+                values.extend({owner_column: owner_id, 'skill_id': skill_id} for skill_id in skill_ids)
+            if values:
+                db.session.execute(table.insert(), values)
+            links += len(values)
+        db.session.commit()
+        return links
+
+
+@event.listens_for(Session, 'before_flush')
+def _sync_skill_tags(session, flush_context, instances):
+    # Keep skill_tags in step with the comma-separated strings the forms edit
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Project):
+            attr = 'required_skills'
+        elif isinstance(obj, DeveloperProfile):
+            attr = 'skills'
+        else:
+            continue
+        if obj in session.new or db.inspect(obj).attrs[attr].history.has_changes():
+            obj.skill_tags = SkillService.resolve(SkillService.parse(getattr(obj, attr)), create=True)
+
+
+@event.listens_for(SkillAlias.__table__, 'after_create')
+def _seed_default_aliases(target, connection, **kw):
+    # db.create_all() databases start with the aliases the taxonomy
+    # migration seeds, so e.g. "golang" resolves to Go everywhere
+    skills = Skill.__table__
+    now = datetime.utcnow()
+    existing = set(connection.execute(db.select(target.c.alias)).scalars())
+    for name, aliases in DEFAULT_ALIASES.items():
+        slug = normalize(name)
+        skill_id = connection.execute(db.select(skills.c.id).where(skills.c.slug == slug)).scalar()
+        if skill_id is None:
+            skill_id = connection.execute(
+                skills.insert().values(name=name, slug=slug, created_at=now)).inserted_primary_key[0]
+        values = [{'skill_id': skill_id, 'alias': normalize(alias)}
+                  for alias in aliases if normalize(alias) not in existing]
+        if values:
+            connection.execute(target.insert(), values)
@@ -0,0 +1,92 @@
+from app import db
+from app.models import Notification, Message
+from app.replicas import primary
+from app.services.cache import get_cache
+
+
+class UnreadCounters:
+    """Per-user unread counts for notifications and messages.
+
+    Counts live in the cache and are adjusted in place as rows are created
+    or read. A missing or expired counter is rebuilt from the database on
+    the next read, and ``reconcile`` corrects any drift in cached values.
+    """
+
+    NOTIFICATIONS = 'notifications'
+    MESSAGES = 'messages'
+
+    @staticmethod
+    def _key(kind, user_id):
+        return f'unread:{kind}:{user_id}'
+
+    @staticmethod
+    def _count_query(kind):
+        if kind == UnreadCounters.NOTIFICATIONS:
+            return db.session.query(Notification.user_id, db.func.count())\
+                .filter(Notification.is_read == False)\
+                .group_by(Notification.user_id)
+        return db.session.query(Message.recipient_id, db.func.count())\
+            .filter(Message.is_read == False)\
+            .group_by(Message.recipient_id)
+
+    @staticmethod
+    def _count(kind, user_id):
+        if kind == UnreadCounters.NOTIFICATIONS:
+            return Notification.query.filter_by(user_id=user_id, is_read=False).count()
+        return Message.query.filter_by(recipient_id=user_id, is_read=False).count()
+
+    @staticmethod
+    def get(kind, user_id):
+        """Get a user's unread count, loading it from the database on a miss"""
+        cache = get_cache()
+        key = UnreadCounters._key(kind, user_id)
+        count = cache.get(key)
+        if count is None:
+            # Later changes adjust the cached count, so it must start from the primary
+            with primary():
+                count = UnreadCounters._count(kind, user_id)
+            # Only if still missing: a count cached meanwhile may already
+            # include adjustments this one hasn't seen
+            if not cache.add(key, count):
+                cached = cache.get(key)
+                count = count if cached is None else cached
+        return count
+
+    @staticmethod
+    def adjust(kind, user_id, amount):
+        """Apply a committed change to a cached count.
+
+        Returns the new count, or None if the count isn't cached. Never
+        queries the database, so it is safe to call from on_commit hooks.
+        """
+        cache = get_cache()
+        key = UnreadCounters._key(kind, user_id)
+        count = cache.incr(key, amount)
+        if count is not None and count < 0:
+            # Out of step with the database; rebuild on next read
+            cache.delete(key)
+            return None
+        return count
+
+    @staticmethod
+    def reconcile():
+        """Compare every cached counter with the database and fix drift.
+
+        Returns the number of counters that were corrected.
+        """
+        cache = get_cache()
+        corrected = 0
+        for kind in (UnreadCounters.NOTIFICATIONS, UnreadCounters.MESSAGES):
+            prefix = f'unread:{kind}:'
+            keys = cache.keys(prefix)
+            if not keys:
+                continue
+
+            actual = dict(UnreadCounters._count_query(kind).all())
+            for key in keys:
+                user_id = int(key[len(prefix):])
+                expected = actual.get(user_id, 0)
+                if cache.get(key) not in (None, expected):
+                    cache.set(key, expected)
+                    corrected += 1
+        return corrected
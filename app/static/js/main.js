@@ -4,11 +4,8 @@ document.addEventListener('DOMContentLoaded', function() {
     // Initialize all components
     initializeComponents();
     
-    // Load notification count
-    loadNotificationCount();
-    
-    // Refresh notification count every 30 seconds
-    setInterval(loadNotificationCount, 30000);
+    // Keep the notification badge current (polling, or push where enabled)
+    startNotificationUpdates();
     
     // Initialize animations
     initializeAnimations();
@@ -140,28 +137,106 @@ function initializeProjectFeatures() {
     });
 }
 
+// Subscribe to the notification stream where the server enables it
+// (NOTIFICATION_STREAMING), otherwise poll
+let notificationPollTimer = null;
+
+function startNotificationUpdates() {
+    // The badge only exists for logged-in users
+    const badge = document.getElementById('notification-badge');
+    if (!badge) {
+        return;
+    }
+    
+    if (badge.dataset.stream !== 'true' || !window.EventSource) {
+        startNotificationPolling();
+        return;
+    }
+    
+    const source = new EventSource('/api/notifications/stream');
+    let opened = false;
+    
+    source.addEventListener('open', function() {
+        opened = true;
+        stopNotificationPolling();
+    });
+    
+    source.addEventListener('unread-count', function(e) {
+        updateNotificationBadge(JSON.parse(e.data).count);
+    });
+    
+    source.addEventListener('notification', function(e) {
+        const data = JSON.parse(e.data);
+        if (data.unread_count === null) {
+            loadNotificationCount();
+        } else {
+            updateNotificationBadge(data.unread_count);
+        }
+    });
+    
+    source.addEventListener('error', function() {
+        // The server ends streams periodically and EventSource reconnects on
+        // its own; only give up if the stream never opened at all
+        if (!opened) {
+            source.close();
+            startNotificationPolling();
+        }
+    });
+}
+
+function startNotificationPolling() {
+    if (notificationPollTimer) {
+        return;
+    }
+    loadNotificationCount();
+    
+    // Refresh notification count every 30 seconds
+    notificationPollTimer = setInterval(loadNotificationCount, 30000);
+}
+
+function stopNotificationPolling() {
+    if (notificationPollTimer) {
+        clearInterval(notificationPollTimer);
+        notificationPollTimer = null;
+    }
+}
+
+// Last count fetched and its ETag; unchanged polls get a 304 and reuse it
+let notificationCountCache = null;
+
 // Load unread notification count
 function loadNotificationCount() {
-    fetch('/api/notifications/unread-count')
-        .then(response => response.json())
-        .then(data => {
-            const badge = document.getElementById('notification-badge');
-            if (badge) {
-                if (data.count > 0) {
-                    badge.textContent = data.count > 99 ? '99+' : data.count;
-                    badge.style.display = 'flex';
-                    
-                    // Add pulse animation for new notifications
-                    badge.style.animation = 'pulse 2s infinite';
-                } else {
-                    badge.style.display = 'none';
-                    badge.style.animation = 'none';
-                }
+    const headers = notificationCountCache ? {'If-None-Match': notificationCountCache.etag} : {};
+    fetch('/api/notifications/unread-count', {headers: headers})
+        .then(response => {
+            if (response.status === 304) {
+                return notificationCountCache;
             }
+            return response.json().then(data => {
+                notificationCountCache = {etag: response.headers.get('ETag'), count: data.count};
+                return notificationCountCache;
+            });
         })
+        .then(data => updateNotificationBadge(data.count))
         .catch(error => console.error('Error loading notification count:', error));
 }
 
+function updateNotificationBadge(count) {
+    const badge = document.getElementById('notification-badge');
+    if (badge) {
+        if (count > 0) {
+            badge.textContent = count > 99 ? '99+' : count;
+            badge.style.display = 'flex';
+            
+            // Add pulse animation for new notifications
+            badge.style.animation = 'pulse 2s infinite';
+        } else {
+            badge.style.display = 'none';
+            badge.style.animation = 'none';
+        }
+    }
+}
+
 // Mark notification as read
 function markNotificationRead(notificationId) {
     fetch(`/api/notifications/mark-read/${notificationId}`, {
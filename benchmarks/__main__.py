@@ -0,0 +1,122 @@
+"""Benchmark the core user journeys.
+
+    python -m benchmarks                          # seed in-memory SQLite and run
+    python -m benchmarks --scale 5 --requests 500
+    python -m benchmarks --save-baseline          # record benchmarks/baseline.json
+    python -m benchmarks --compare                # exit 1 on regressions
+    python -m benchmarks --database-url postgresql://.../bench_scratch
+
+The target database must be empty; it is created and seeded on each run.
+The committed benchmarks/baseline.json holds the query counts of a default
+run on in-memory SQLite, without timings, so --compare checks latency only
+against a baseline saved on the same machine.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def parse_args(argv=None):
+    from benchmarks.runner import JOURNEYS
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default='sqlite://',
+                        help='Empty database to seed and benchmark (default: in-memory SQLite)')
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help='Multiplier for the number of companies and developers')
+    parser.add_argument('--requests', type=int, default=200, help='Measured requests per journey')
+    parser.add_argument('--warmup', type=int, default=20, help='Unmeasured requests per journey')
+    parser.add_argument('--users', type=int, default=5, help='Logged-in clients per role')
+    parser.add_argument('--journey', action='append', choices=[j.name for j in JOURNEYS],
+                        help='Only run this journey (repeatable)')
+    parser.add_argument('--page-cache', action='store_true',
+                        help='Serve logged-out journeys from the page cache (off by default, '
+                             'so the numbers measure the views themselves)')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline file')
+    parser.add_argument('--save-baseline', action='store_true', help='Save results as the baseline')
+    parser.add_argument('--compare', action='store_true', help='Compare results with the baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Allowed p95 latency growth over the baseline (default 0.25)')
+    parser.add_argument('--slack-ms', type=float, default=2.0,
+                        help='p95 latency growth in ms that is never a regression (default 2)')
+    return parser.parse_args(argv)
+
+
+def create_benchmark_app(database_url, page_cache=False):
+    from config import Config
+    from app import create_app
+
+    class BenchmarkConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_url
+        WTF_CSRF_ENABLED = False
+        QUERY_METRICS_ENABLED = True
+        QUERY_METRICS_SERVER_TIMING = True
+        QUERY_METRICS_SLOW_REQUEST_MS = 60 * 1000
+        PAGE_CACHE_ENABLED = page_cache
+
+    return create_app(BenchmarkConfig)
+
+
+def print_table(results):
+    columns = ['requests', 'errors', 'p50_ms', 'p95_ms', 'p99_ms', 'queries_per_request']
+    width = max(len(name) for name in results) + 2
+    print('journey'.ljust(width) + ''.join(c.rjust(21 if c == 'queries_per_request' else 10)
+                                          for c in columns))
+    for name, summary in results.items():
+        print(name.ljust(width) + ''.join(str(summary[c]).rjust(21 if c == 'queries_per_request' else 10)
+                                         for c in columns))
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.compare and not args.save_baseline and not os.path.exists(args.baseline):
+        sys.exit(f'No baseline at {args.baseline}; record one first with --save-baseline.')
+
+    from app import db
+    from app.models import User
+    from benchmarks.seed import seed, SeedSize, PASSWORD
+    from benchmarks.runner import run, compare
+
+    app = create_benchmark_app(args.database_url, page_cache=args.page_cache)
+    with app.app_context():
+        db.create_all()
+        if User.query.first() is not None:
+            sys.exit('The benchmark database must be empty.')
+        started = time.perf_counter()
+        data = seed(SeedSize().scaled(args.scale))
+        print(f'Seeded {len(data.company_ids)} companies, {len(data.developer_ids)} developers '
+              f'and {len(data.project_ids)} projects in {time.perf_counter() - started:.1f}s')
+
+    results = run(app, data, PASSWORD, requests_per_journey=args.requests, warmup=args.warmup,
+                  users=args.users, journeys=args.journey)
+    print_table(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'Baseline saved to {args.baseline}')
+
+    if args.compare:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, latency_tolerance=args.tolerance,
+                              latency_slack_ms=args.slack_ms)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            sys.exit(1)
+        print('No regressions against the baseline')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""Measure cold starts of the serverless entry point (api/index.py).
+
+    python -m benchmarks.coldstart                   # fast start vs. full start
+    python -m benchmarks.coldstart --runs 20 --path /projects
+    python -m benchmarks.coldstart --importtime      # slowest imports of a cold start
+
+Each run starts a fresh interpreter that imports the entry point and serves
+one request, as a new serverless instance does. The database is a scratch
+SQLite file migrated up front, so both modes start against the same schema.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = '''
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {root!r})
+import api.index
+imported = time.perf_counter()
+response = api.index.app.test_client().get({path!r})
+served = time.perf_counter()
+print(json.dumps({{
+    'status': response.status_code,
+    'import_ms': (imported - started) * 1000,
+    'first_request_ms': (served - imported) * 1000,
+}}))
+'''
+
+MODES = (('fast', 'true'), ('full', 'false'))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.coldstart', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10, help='Cold starts per mode')
+    parser.add_argument('--path', default='/', help='URL of the first request')
+    parser.add_argument('--importtime', action='store_true',
+                        help='Summarise python -X importtime for one fast cold start instead')
+    parser.add_argument('--top', type=int, default=20, help='Modules to list with --importtime')
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    return parser.parse_args(argv)
+
+
+def migrate(database_url):
+    """Create the schema in the scratch database with the migrations"""
+    from flask_migrate import upgrade
+    from config import Config
+    from app import create_app
+
+    class MigrateConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_url
+        FAST_START = False
+
+    app = create_app(MigrateConfig)
+    with app.app_context():
+        upgrade(directory=os.path.join(ROOT, 'migrations'))
+
+
+def child_env(database_url, fast_start):
+    env = dict(os.environ, VERCEL='1', DATABASE_URL=database_url, FAST_START=fast_start)
+    env.pop('POSTGRES_URL', None)
+    return env
+
+
+def cold_start(database_url, fast_start, path, importtime=False):
+    """Run one cold start; returns (timings, stderr)"""
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + \
+        ['-c', CHILD.format(root=ROOT, path=path)]
+    started = time.perf_counter()
+    result = subprocess.run(command, env=child_env(database_url, fast_start), cwd=ROOT,
+                            capture_output=True, text=True)
+    total_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f'Cold start failed:\n{result.stderr}')
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings['total_ms'] = total_ms
+    return timings, result.stderr
+
+
+def summarise(runs):
+    summary = {'runs': len(runs), 'errors': sum(1 for r in runs if r['status'] >= 400)}
+    for key in ('total_ms', 'import_ms', 'first_request_ms'):
+        values = sorted(r[key] for r in runs)
+        summary[f'{key[:-3]}_p50_ms'] = round(statistics.median(values), 1)
+        summary[f'{key[:-3]}_max_ms'] = round(values[-1], 1)
+    return summary
+
+
+def parse_importtime(stderr):
+    """(module, self_us, cumulative_us) for each line of -X importtime output"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def print_importtime(modules, top):
+    total = sum(self_us for _, self_us, _ in modules)
+    by_package = Counter()
+    for name, self_us, _ in modules:
+        by_package[name.split('.')[0]] += self_us
+    print(f'{len(modules)} modules imported in {total / 1000:.1f}ms\n')
+    print('package'.ljust(40) + 'self ms'.rjust(10))
+    for package, self_us in by_package.most_common(top):
+        print(package.ljust(40) + f'{self_us / 1000:.1f}'.rjust(10))
+    print('\n' + 'module'.ljust(40) + 'self ms'.rjust(10) + 'cumulative ms'.rjust(15))
+    for name, self_us, cumulative_us in sorted(modules, key=lambda m: -m[1])[:top]:
+        print(name[:39].ljust(40) + f'{self_us / 1000:.1f}'.rjust(10) + f'{cumulative_us / 1000:.1f}'.rjust(15))
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as scratch:
+        database_url = f"sqlite:///{os.path.join(scratch, 'coldstart.db')}"
+        migrate(database_url)
+
+        if args.importtime:
+            _, stderr = cold_start(database_url, 'true', args.path, importtime=True)
+            print_importtime(parse_importtime(stderr), args.top)
+            return
+
+        # One unmeasured start per mode writes the .pyc files; the measured
+        # runs then alternate modes so background load affects both alike
+        runs = {mode: [] for mode, _ in MODES}
+        for mode, fast_start in MODES:
+            cold_start(database_url, fast_start, args.path)
+        for _ in range(args.runs):
+            for mode, fast_start in MODES:
+                runs[mode].append(cold_start(database_url, fast_start, args.path)[0])
+        results = {mode: summarise(mode_runs) for mode, mode_runs in runs.items()}
+
+    columns = ['runs', 'errors', 'total_p50_ms', 'import_p50_ms', 'first_request_p50_ms', 'total_max_ms']
+    print('mode'.ljust(8) + ''.join(c.rjust(22) for c in columns))
+    for mode, summary in results.items():
+        print(mode.ljust(8) + ''.join(str(summary[c]).rjust(22) for c in columns))
+    saved = results['full']['total_p50_ms'] - results['fast']['total_p50_ms']
+    print(f'\nFast start saves {saved:.0f}ms per cold start '
+          f'({saved / results["full"]["total_p50_ms"]:.0%}) at the median')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""Hold many idle notification streams open against one server worker.
+
+    python -m benchmarks.idle                        # 1000 streams, WSGI vs. ASGI
+    python -m benchmarks.idle --connections 5000 --server asgi
+
+Starts one gunicorn sync worker (run:app, as in the Dockerfile) and one
+uvicorn worker (app.asgi:application), opens --connections logged-in
+/api/notifications/stream connections to each at once, and reports how many
+streams were open within --wait seconds and the worker's memory per open
+stream. Needs gunicorn and uvicorn installed, and Linux for the memory
+figures.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.coldstart import ROOT, migrate
+
+SERVERS = {
+    'wsgi': lambda port: [sys.executable, '-m', 'gunicorn', '--workers', '1', '--timeout', '120',
+                          '--bind', f'127.0.0.1:{port}', 'run:app'],
+    'asgi': lambda port: [sys.executable, '-m', 'uvicorn', 'app.asgi:application',
+                          '--port', str(port), '--log-level', 'warning'],
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.idle', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--connections', type=int, default=1000, help='Streams to open per server')
+    parser.add_argument('--wait', type=float, default=10.0,
+                        help='Seconds to wait for the streams to open')
+    parser.add_argument('--server', action='append', choices=sorted(SERVERS),
+                        help='Only benchmark this server (repeatable)')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--output', help='Write results as JSON to this file')
+    return parser.parse_args(argv)
+
+
+def session_cookie(database_url):
+    """Create a user in the scratch database and return a logged-in session cookie"""
+    from config import Config
+    from app import create_app, db
+    from app.models import User
+
+    class CookieConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_url
+        WTF_CSRF_ENABLED = False
+
+    app = create_app(CookieConfig)
+    with app.app_context():
+        user = User(username='idle', email='idle@example.com', role='developer')
+        user.set_password('idle-password')
+        db.session.add(user)
+        db.session.commit()
+    client = app.test_client()
+    client.post('/auth/login', data={'email': 'idle@example.com', 'password': 'idle-password'})
+    return client.get_cookie('session').value
+
+
+def rss_kb(pid):
+    """Resident memory of a process and its children, in kB"""
+    total = 0
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            total += next(int(line.split()[1]) for line in f if line.startswith('VmRSS:'))
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            total += sum(rss_kb(int(child)) for child in f.read().split())
+    except (OSError, StopIteration):
+        pass
+    return total
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Server did not start on port {port}')
+
+
+async def open_stream(port, cookie, opened_by):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f'GET /api/notifications/stream HTTP/1.1\r\nHost: localhost\r\n'
+                 f'Cookie: session={cookie}\r\n\r\n'.encode())
+    await writer.drain()
+    try:
+        await asyncio.wait_for(reader.readuntil(b'event: unread-count'),
+                               timeout=max(opened_by - time.monotonic(), 0))
+        return writer, True
+    except (asyncio.TimeoutError, asyncio.IncompleteReadError, OSError):
+        return writer, False
+
+
+async def hold_streams(port, cookie, connections, wait, measure):
+    opened_by = time.monotonic() + wait
+    results = await asyncio.gather(*(open_stream(port, cookie, opened_by) for _ in range(connections)),
+                                   return_exceptions=True)
+    opened = sum(1 for r in results if not isinstance(r, BaseException) and r[1])
+    rss = measure()
+    for result in results:
+        if not isinstance(result, BaseException):
+            result[0].close()
+    return opened, rss
+
+
+def run_server(name, port, env, cookie, connections, wait):
+    process = subprocess.Popen(SERVERS[name](port), cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port)
+        time.sleep(1)
+        idle_rss = rss_kb(process.pid)
+        started = time.perf_counter()
+        opened, rss = asyncio.run(hold_streams(port, cookie, connections, wait,
+                                               lambda: rss_kb(process.pid)))
+        return {
+            'connections': connections,
+            'opened': opened,
+            'open_seconds': round(time.perf_counter() - started, 2),
+            'idle_rss_mb': round(idle_rss / 1024, 1),
+            'rss_mb': round(rss / 1024, 1),
+            'kb_per_stream': round((rss - idle_rss) / opened, 1) if opened else None,
+        }
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as scratch:
+        database_url = f"sqlite:///{os.path.join(scratch, 'idle.db')}"
+        migrate(database_url)
+        cookie = session_cookie(database_url)
+        env = dict(os.environ, DATABASE_URL=database_url, FLASK_APP='run.py',
+                   NOTIFICATION_BROKER='memory', NOTIFICATION_STREAM_TIMEOUT='600',
+                   PAGE_CACHE_ENABLED='false')
+
+        results = {}
+        for name in args.server or sorted(SERVERS, reverse=True):
+            results[name] = run_server(name, args.port, env, cookie, args.connections, args.wait)
+
+    columns = ['connections', 'opened', 'open_seconds', 'idle_rss_mb', 'rss_mb', 'kb_per_stream']
+    print('server'.ljust(8) + ''.join(c.rjust(14) for c in columns))
+    for name, summary in results.items():
+        print(name.ljust(8) + ''.join(str(summary[c]).rjust(14) for c in columns))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
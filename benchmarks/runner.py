@@ -0,0 +1,150 @@
+"""Drive the core user journeys through the Flask test client and measure them."""
+
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from app.models import User
+
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+@dataclass
+class Journey:
+    name: str
+    role: str
+    # (rng, seed result, user id) -> URL
+    url: object
+
+
+JOURNEYS = [
+    Journey('projects', None, lambda rng, data, user_id: '/projects'),
+    Journey('projects_deep', None, lambda rng, data, user_id: f'/projects?after={data.listing_cursor}'),
+    Journey('projects_api', None, lambda rng, data, user_id: f'/api/projects?after={data.listing_cursor}'),
+    Journey('project_search', None, lambda rng, data, user_id: '/projects?q=python+design'),
+    Journey('project_detail', None,
+            lambda rng, data, user_id: f'/project/{rng.choice(data.project_ids)}'),
+    Journey('company_dashboard', 'company', lambda rng, data, user_id: '/company-dashboard'),
+    Journey('company_analytics', 'company', lambda rng, data, user_id: '/api/analytics'),
+    Journey('developer_dashboard', 'developer', lambda rng, data, user_id: '/developer-dashboard'),
+    Journey('messages', 'developer', lambda rng, data, user_id: '/messages'),
+    Journey('message_thread', 'thread',
+            lambda rng, data, user_id: f'/api/messages/{_partner(rng, data, user_id)}'),
+    Journey('unread_count', 'developer',
+            lambda rng, data, user_id: '/api/notifications/unread-count'),
+]
+
+
+def _partner(rng, data, user_id):
+    return rng.choice([company_id for developer_id, company_id in data.threads
+                       if developer_id == user_id])
+
+
+@dataclass
+class JourneyResult:
+    name: str
+    latencies: list = field(default_factory=list)
+    queries: list = field(default_factory=list)
+    errors: int = 0
+
+    def percentile(self, p):
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self):
+        count = len(self.latencies)
+        return {
+            'requests': count,
+            'errors': self.errors,
+            'p50_ms': round(self.percentile(50) * 1000, 2),
+            'p95_ms': round(self.percentile(95) * 1000, 2),
+            'p99_ms': round(self.percentile(99) * 1000, 2),
+            'queries_per_request': round(sum(self.queries) / count, 2) if count else 0,
+            'max_queries': max(self.queries, default=0),
+        }
+
+
+def _login(app, email, password):
+    client = app.test_client()
+    response = client.post('/auth/login', data={'email': email, 'password': password})
+    if response.status_code != 302:
+        raise RuntimeError(f'Login failed for {email}: {response.status_code}')
+    return client
+
+
+def run(app, data, password, requests_per_journey=200, warmup=20, users=5,
+        journeys=None, random_seed=42):
+    """Run each journey and return {name: summary}.
+
+    Each journey cycles through ``users`` logged-in clients of the journey's
+    role. Query counts come from the Server-Timing header added by
+    QueryMetrics, so QUERY_METRICS_ENABLED must be on.
+    """
+    rng = random.Random(random_seed)
+    selected = [j for j in JOURNEYS if journeys is None or j.name in journeys]
+    results = {}
+
+    # Only developers with at least one thread can open a thread
+    pools = {
+        'company': data.company_ids[:users],
+        'developer': data.developer_ids[:users],
+        'thread': sorted({developer_id for developer_id, _ in data.threads})[:users],
+    }
+    with app.app_context():
+        emails = dict(User.query.with_entities(User.id, User.email)
+                      .filter(User.id.in_([i for ids in pools.values() for i in ids])).all())
+
+    clients = {None: [(app.test_client(), None)]}
+    for role, ids in pools.items():
+        clients[role] = [(_login(app, emails[user_id], password), user_id) for user_id in ids]
+
+    for journey in selected:
+        result = JourneyResult(journey.name)
+        pool = clients[journey.role]
+        for n in range(warmup + requests_per_journey):
+            client, user_id = pool[n % len(pool)]
+            url = journey.url(rng, data, user_id)
+            started = time.perf_counter()
+            response = client.get(url)
+            elapsed = time.perf_counter() - started
+            response.close()
+            if n < warmup:
+                continue
+            if response.status_code != 200:
+                result.errors += 1
+            result.latencies.append(elapsed)
+            match = SERVER_TIMING_QUERIES.search(response.headers.get('Server-Timing', ''))
+            result.queries.append(int(match.group(1)) if match else 0)
+        results[journey.name] = result.summary()
+    return results
+
+
+def compare(results, baseline, latency_tolerance=0.25, latency_slack_ms=2.0):
+    """Compare results with a saved baseline.
+
+    Returns a list of regression messages. Any increase in queries per
+    request is a regression; p95 latency may grow by ``latency_tolerance``
+    before it counts, since timings vary between runs and machines, and
+    by at least ``latency_slack_ms``, since millisecond timings jitter by
+    more than the tolerance.
+    """
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if current['queries_per_request'] > previous['queries_per_request']:
+            regressions.append(
+                f"{name}: queries per request {previous['queries_per_request']} -> "
+                f"{current['queries_per_request']}")
+        # The committed baseline has no timings: they only compare on one machine
+        if 'p95_ms' in previous and current['p95_ms'] > max(
+                previous['p95_ms'] * (1 + latency_tolerance), previous['p95_ms'] + latency_slack_ms):
+            regressions.append(
+                f"{name}: p95 {previous['p95_ms']}ms -> {current['p95_ms']}ms")
+        if current['errors'] > previous.get('errors', 0):
+            regressions.append(f"{name}: {current['errors']} errors")
+    return regressions
@@ -0,0 +1,199 @@
+"""Synthetic dataset for benchmarks.
+
+Scales up the shapes used by create_sample_data in run.py: companies with
+profiles and projects, developers with profiles who apply to projects, and
+the messages and notifications that traffic generates. Rows are generated
+from a fixed random seed and inserted in bulk, so the same scale always
+produces the same dataset.
+"""
+
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from werkzeug.security import generate_password_hash
+from app import db
+from app.models import (User, CompanyProfile, DeveloperProfile, Project, Application,
+                        Submission, Message, Notification, Conversation)
+from app.services.skill_service import SkillService
+from app.services.match_service import MatchService
+from app.services.project_listing import ProjectListing
+from app.services.analytics import Analytics
+
+PASSWORD = 'bench123'
+
+SKILL_SETS = [
+    'JavaScript, React, Node.js, Python, PostgreSQL',
+    'UI/UX Design, Figma, Adobe Creative Suite, Prototyping',
+    'Python, Flask, Django, REST APIs',
+    'Google Ads, SEO, Content Marketing',
+    'Mobile Design, Swift, Kotlin, Flutter',
+]
+EXPERIENCE_LEVELS = ['beginner', 'intermediate', 'advanced', 'expert']
+PROJECT_STATUSES = ['open'] * 6 + ['shortlisting', 'submission', 'completed']
+
+
+@dataclass
+class SeedSize:
+    companies: int = 10
+    developers: int = 200
+    projects_per_company: int = 10
+    applications_per_project: int = 15
+    messages_per_application: int = 2
+    notifications_per_user: int = 20
+
+    def scaled(self, scale):
+        return SeedSize(
+            companies=max(1, int(self.companies * scale)),
+            developers=max(2, int(self.developers * scale)),
+            projects_per_company=self.projects_per_company,
+            applications_per_project=self.applications_per_project,
+            messages_per_application=self.messages_per_application,
+            notifications_per_user=self.notifications_per_user,
+        )
+
+
+@dataclass
+class SeedResult:
+    company_ids: list
+    developer_ids: list
+    project_ids: list
+    # (developer_id, company_id) pairs that have a message thread
+    threads: list
+    # /projects cursor halfway down the open projects
+    listing_cursor: str = None
+
+
+def _insert(model, rows, batch_size=2000):
+    """Bulk insert rows and return their ids in order"""
+    ids = []
+    for start in range(0, len(rows), batch_size):
+        ids.extend(db.session.scalars(
+            db.insert(model).returning(model.id, sort_by_parameter_order=True),
+            rows[start:start + batch_size]
+        ).all())
+    return ids
+
+
+def seed(size=None, random_seed=42):
+    """Populate an empty database; every user's password is PASSWORD"""
+    size = size or SeedSize()
+    rng = random.Random(random_seed)
+    now = datetime.utcnow()
+    # Hash once: the work factor makes per-user hashing dominate seeding time
+    password_hash = generate_password_hash(PASSWORD)
+
+    company_ids = _insert(User, [{
+        'username': f'company{i}', 'email': f'company{i}@bench.example.com',
+        'password_hash': password_hash, 'role': 'company',
+        'created_at': now - timedelta(days=365)
+    } for i in range(size.companies)])
+    developer_ids = _insert(User, [{
+        'username': f'developer{i}', 'email': f'developer{i}@bench.example.com',
+        'password_hash': password_hash, 'role': 'developer',
+        'created_at': now - timedelta(days=rng.randint(1, 365))
+    } for i in range(size.developers)])
+
+    _insert(CompanyProfile, [{
+        'user_id': user_id, 'company_name': f'Company {i}',
+        'description': 'Leading technology solutions provider',
+        'website': f'https://company{i}.example.com', 'industry': 'Technology',
+        'size': '51-200', 'location': 'San Francisco, CA'
+    } for i, user_id in enumerate(company_ids)])
+    _insert(DeveloperProfile, [{
+        'user_id': user_id, 'full_name': f'Developer {i}',
+        'bio': 'Full-stack developer', 'skills': rng.choice(SKILL_SETS),
+        'experience_level': rng.choice(EXPERIENCE_LEVELS), 'reputation_score': rng.randint(0, 100)
+    } for i, user_id in enumerate(developer_ids)])
+
+    project_rows = []
+    for company_id in company_ids:
+        for i in range(size.projects_per_company):
+            created_at = now - timedelta(days=rng.randint(0, 90), minutes=rng.randint(0, 1440))
+            project_rows.append({
+                'company_id': company_id,
+                'title': f'Project {company_id}-{i}: E-commerce Mobile App Design',
+                'description': 'Design a modern, user-friendly mobile app for our e-commerce platform. '
+                               'Should include user authentication, product browsing, shopping cart, '
+                               'and checkout flow.',
+                'required_skills': rng.choice(SKILL_SETS),
+                'deadline': now + timedelta(days=rng.randint(-10, 30)),
+                'winner_reward': 1500.0, 'participation_reward': 100.0, 'max_shortlist': 5,
+                'status': rng.choice(PROJECT_STATUSES), 'created_at': created_at, 'updated_at': created_at
+            })
+    project_ids = _insert(Project, project_rows)
+
+    application_rows = []
+    for project_id, project in zip(project_ids, project_rows):
+        applicants = rng.sample(developer_ids, min(size.applications_per_project, len(developer_ids)))
+        for n, developer_id in enumerate(applicants):
+            application_rows.append({
+                'project_id': project_id, 'developer_id': developer_id,
+                'cover_letter': 'I would love to work on this project.',
+                'status': 'shortlisted' if n < 5 and project['status'] != 'open' else 'pending',
+                'applied_at': project['created_at'] + timedelta(hours=n + 1),
+                '_company_id': project['company_id']
+            })
+    application_ids = _insert(Application, [
+        {k: v for k, v in row.items() if not k.startswith('_')} for row in application_rows])
+
+    _insert(Submission, [{
+        'application_id': application_id, 'project_id': row['project_id'],
+        'description': 'Submission', 'github_url': 'https://github.com/example/repo',
+        'score': rng.randint(0, 10), 'submitted_at': row['applied_at'] + timedelta(days=2)
+    } for application_id, row in zip(application_ids, application_rows)
+        if row['status'] == 'shortlisted'])
+
+    message_rows = []
+    for row in application_rows:
+        pair = [row['developer_id'], row['_company_id']]
+        for n in range(size.messages_per_application):
+            sender_id, recipient_id = pair if n % 2 == 0 else pair[::-1]
+            message_rows.append({
+                'project_id': row['project_id'], 'sender_id': sender_id,
+                'recipient_id': recipient_id, 'content': f'Message {n} about the project',
+                'is_read': rng.random() < 0.7,
+                'sent_at': row['applied_at'] + timedelta(hours=n + 1)
+            })
+    message_ids = _insert(Message, message_rows)
+    _insert_conversations(message_ids, message_rows)
+    threads = sorted({(row['developer_id'], row['_company_id']) for row in application_rows}) \
+        if size.messages_per_application else []
+
+    notification_rows = []
+    for user_id in company_ids + developer_ids:
+        for n in range(size.notifications_per_user):
+            notification_rows.append({
+                'user_id': user_id, 'title': 'New Application',
+                'message': 'Someone applied to your project', 'type': 'application',
+                'is_read': rng.random() < 0.8, 'created_at': now - timedelta(hours=n)
+            })
+    _insert(Notification, notification_rows)
+
+    # Bulk inserts bypass the ORM hook that links skills
+    SkillService.rebuild()
+    MatchService.refresh_all()
+    db.session.commit()
+    Analytics.rebuild()
+    
+    open_projects = ProjectListing.query('open').order_by(Project.created_at.desc(), Project.id.desc())
+    middle = open_projects.offset(open_projects.count() // 2).first()
+    listing_cursor = ProjectListing.encode_cursor(middle) if middle else None
+    return SeedResult(company_ids, developer_ids, project_ids, threads, listing_cursor)
+
+
+def _insert_conversations(message_ids, message_rows):
+    # Build the summaries MessageService maintains on send
+    conversations = {}
+    for message_id, row in zip(message_ids, message_rows):
+        for user_id, partner_id in ((row['sender_id'], row['recipient_id']),
+                                    (row['recipient_id'], row['sender_id'])):
+            conversation = conversations.setdefault((user_id, partner_id), {
+                'user_id': user_id, 'partner_id': partner_id, 'unread_count': 0,
+                'last_message_id': None, 'last_sent_at': None
+            })
+            if conversation['last_sent_at'] is None or row['sent_at'] >= conversation['last_sent_at']:
+                conversation['last_message_id'] = message_id
+                conversation['last_sent_at'] = row['sent_at']
+            if user_id == row['recipient_id'] and not row['is_read']:
+                conversation['unread_count'] += 1
+    _insert(Conversation, list(conversations.values()))
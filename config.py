@@ -1,8 +1,19 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
 
+
+def driver_url(database_url):
+    """pg8000 is the PostgreSQL driver in requirements.txt; convert psycopg2-style URLs"""
+    if database_url.startswith('postgres://'):
+        return database_url.replace('postgres://', 'postgresql+pg8000://', 1)
+    if database_url.startswith('postgresql://'):
+        return database_url.replace('postgresql://', 'postgresql+pg8000://', 1)
+    return database_url
+
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production-vercel-deployment'
     
@@ -11,28 +22,128 @@ class Config:
     if os.environ.get('VERCEL'):
         # Production on Vercel - use PostgreSQL with pg8000 driver
         database_url = os.environ.get('DATABASE_URL') or os.environ.get('POSTGRES_URL')
-        if database_url:
-            # Convert psycopg2 URL to pg8000 URL
-            if database_url.startswith('postgres://'):
-                database_url = database_url.replace('postgres://', 'postgresql+pg8000://', 1)
-            elif database_url.startswith('postgresql://'):
-                database_url = database_url.replace('postgresql://', 'postgresql+pg8000://', 1)
-            SQLALCHEMY_DATABASE_URI = database_url
-        else:
+        if not database_url:
             # Fallback to SQLite if no PostgreSQL URL provided
-            SQLALCHEMY_DATABASE_URI = 'sqlite:///temp_collaboration_platform.db'
+            database_url = 'sqlite:///temp_collaboration_platform.db'
     else:
         # Development - use SQLite
-        SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///collaboration_platform.db'
+        database_url = os.environ.get('DATABASE_URL') or 'sqlite:///collaboration_platform.db'
+    SQLALCHEMY_DATABASE_URI = driver_url(database_url)
+    
+    # Read replicas, as comma-separated URLs. Views marked @read_replica send
+    # their reads to one of them; after a visitor writes, their reads stay on
+    # the primary for REPLICA_STICKY_SECONDS so they see their own changes
+    # despite replication lag.
+    DATABASE_REPLICA_URLS = [driver_url(url.strip()) for url in
+                             (os.environ.get('DATABASE_REPLICA_URLS') or '').split(',') if url.strip()]
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS') or 10)
+    
+    # Connection pool ('queue' or 'null'), turned into SQLALCHEMY_ENGINE_OPTIONS
+    # by app.pool. Each gunicorn worker has its own pool, so the database sees
+    # up to workers x (DATABASE_POOL_SIZE + DATABASE_MAX_OVERFLOW) connections.
+    # Use 'null' on serverless platforms and behind PgBouncer.
+    DATABASE_POOL = os.environ.get('DATABASE_POOL') or ('null' if os.environ.get('VERCEL') else 'queue')
+    DATABASE_POOL_SIZE = int(os.environ.get('DATABASE_POOL_SIZE') or 5)
+    DATABASE_MAX_OVERFLOW = int(os.environ.get('DATABASE_MAX_OVERFLOW') or 10)
+    DATABASE_POOL_TIMEOUT = int(os.environ.get('DATABASE_POOL_TIMEOUT') or 30)
+    # Replace connections older than this many seconds, before idle timeouts
+    # on the server or a load balancer close them
+    DATABASE_POOL_RECYCLE = int(os.environ.get('DATABASE_POOL_RECYCLE') or 1800)
+    DATABASE_POOL_PRE_PING = os.environ.get('DATABASE_POOL_PRE_PING', 'true').lower() in ['true', 'on', '1']
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Serverless cold starts: skip table creation, migrations and CLI setup
+    # at boot (api/index.py turns this on)
+    FAST_START = os.environ.get('FAST_START', 'false').lower() in ['true', 'on', '1']
+    
     # Mail configuration
     MAIL_SERVER = os.environ.get('MAIL_SERVER')
     MAIL_PORT = int(os.environ.get('MAIL_PORT') or 587)
     MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS', 'true').lower() in ['true', 'on', '1']
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
+    MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER') or MAIL_USERNAME or 'noreply@localhost'
+    # Many SMTP servers cap messages per session; reconnect after this many
+    MAIL_MAX_MESSAGES_PER_CONNECTION = int(os.environ.get('MAIL_MAX_MESSAGES_PER_CONNECTION') or 100)
+    MAIL_TIMEOUT = int(os.environ.get('MAIL_TIMEOUT') or 30)
+    # Public URL used for links in emails, which aren't sent from a request
+    APP_BASE_URL = os.environ.get('APP_BASE_URL') or 'http://localhost:5000'
+    
+    # Notification digests: at most one email per user per window, listing
+    # up to DIGEST_MAX_ITEMS unread notifications
+    DIGEST_WINDOW_MINUTES = int(os.environ.get('DIGEST_WINDOW_MINUTES') or 60)
+    DIGEST_BATCH_SIZE = int(os.environ.get('DIGEST_BATCH_SIZE') or 50)
+    DIGEST_MAX_ITEMS = int(os.environ.get('DIGEST_MAX_ITEMS') or 20)
+    
+    # Project lifecycle runs (`flask lifecycle run`): open projects past their
+    # deadline expire, and active ones get reminders this many hours before it
+    LIFECYCLE_REMINDER_HOURS = int(os.environ.get('LIFECYCLE_REMINDER_HOURS') or 24)
+    LIFECYCLE_BATCH_SIZE = int(os.environ.get('LIFECYCLE_BATCH_SIZE') or 500)
+    
+    # Real-time notification delivery
+    # 'memory' fans out within one worker; 'postgres' uses LISTEN/NOTIFY across workers
+    NOTIFICATION_BROKER = os.environ.get('NOTIFICATION_BROKER', 'memory')
+    NOTIFICATION_CHANNEL = os.environ.get('NOTIFICATION_CHANNEL', 'collab_notifications')
+    # Seconds between the listener's polls for notifications (each one runs
+    # SELECT 1 under pg8000), and before it reconnects after an error
+    NOTIFICATION_LISTEN_INTERVAL = float(os.environ.get('NOTIFICATION_LISTEN_INTERVAL') or 0.5)
+    NOTIFICATION_LISTEN_RETRY = float(os.environ.get('NOTIFICATION_LISTEN_RETRY') or 5)
+    # Pages subscribe to the notification stream instead of polling. Each open
+    # stream holds a sync gunicorn worker, so only enable this where the stream
+    # is served by app.asgi with the postgres broker (docker-compose.asgi.yml)
+    NOTIFICATION_STREAMING = os.environ.get('NOTIFICATION_STREAMING', 'false').lower() in ['true', 'on', '1']
+    # Streams end after this many seconds and the browser reconnects, so a
+    # sync worker is never held past its timeout
+    NOTIFICATION_STREAM_TIMEOUT = int(os.environ.get('NOTIFICATION_STREAM_TIMEOUT') or 55)
+    NOTIFICATION_STREAM_KEEPALIVE = int(os.environ.get('NOTIFICATION_STREAM_KEEPALIVE') or 15)
+    # Seconds a message thread long-poll on the ASGI server waits for a new
+    # message before answering with none
+    MESSAGE_WAIT_TIMEOUT = int(os.environ.get('MESSAGE_WAIT_TIMEOUT') or 25)
+    
+    # Cache ('memory' is a per-worker LRU; 'filesystem' is shared by the
+    # workers on one host; 'redis' is shared across hosts)
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+    CACHE_DIR = os.environ.get('CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'collab-cache')
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL') or 'redis://localhost:6379/0'
+    CACHE_KEY_PREFIX = os.environ.get('CACHE_KEY_PREFIX', 'collab:')
+    CACHE_DEFAULT_TTL = int(os.environ.get('CACHE_DEFAULT_TTL') or 300)
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES') or 10000)
+    
+    # Rendered pages for logged-out visitors. Project and application commits
+    # clear the pages showing them at once in the shared backends; with
+    # 'memory' other workers can serve a stale page for up to PAGE_CACHE_TTL
+    # seconds, as can listings showing a project's application count.
+    PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', 'true').lower() in ['true', 'on', '1']
+    PAGE_CACHE_TTL = int(os.environ.get('PAGE_CACHE_TTL') or 60)
+    # Lets browsers and nginx reuse a page this long before revalidating it
+    PAGE_CACHE_MAX_AGE = int(os.environ.get('PAGE_CACHE_MAX_AGE') or 5)
+    # Project listing totals per filter; project changes clear them sooner
+    PROJECT_COUNT_TTL = int(os.environ.get('PROJECT_COUNT_TTL') or 300)
+    # IDF table reused by profile match refreshes; project refreshes clear it
+    MATCH_IDF_TTL = int(os.environ.get('MATCH_IDF_TTL') or 300)
+    
+    # Background jobs. Run `flask worker` and set JOB_QUEUE_EAGER=false in
+    # production; eager mode runs a request's jobs in the web process after
+    # the response is sent, so deployments without a worker still work.
+    JOB_QUEUE_EAGER = os.environ.get('JOB_QUEUE_EAGER', 'true').lower() in ['true', 'on', '1']
+    JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL') or 1.0)
+    JOB_BATCH_SIZE = int(os.environ.get('JOB_BATCH_SIZE') or 10)
+    JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS') or 5)
+    # Retry delay doubles from JOB_RETRY_BACKOFF seconds up to JOB_RETRY_BACKOFF_MAX
+    JOB_RETRY_BACKOFF = int(os.environ.get('JOB_RETRY_BACKOFF') or 10)
+    JOB_RETRY_BACKOFF_MAX = int(os.environ.get('JOB_RETRY_BACKOFF_MAX') or 3600)
+    # Running jobs not finished after this many seconds are assumed lost and retried
+    JOB_LOCK_TIMEOUT = int(os.environ.get('JOB_LOCK_TIMEOUT') or 600)
+    
+    # Per-request SQL metrics: Server-Timing headers, slow request log and a
+    # Prometheus endpoint, served outside debug mode only with QUERY_METRICS_TOKEN set
+    QUERY_METRICS_ENABLED = os.environ.get('QUERY_METRICS_ENABLED', 'true').lower() in ['true', 'on', '1']
+    QUERY_METRICS_SERVER_TIMING = os.environ.get('QUERY_METRICS_SERVER_TIMING', 'true').lower() in ['true', 'on', '1']
+    QUERY_METRICS_SLOW_REQUEST_MS = int(os.environ.get('QUERY_METRICS_SLOW_REQUEST_MS') or 500)
+    QUERY_METRICS_SLOWEST = int(os.environ.get('QUERY_METRICS_SLOWEST') or 3)
+    QUERY_METRICS_PATH = os.environ.get('QUERY_METRICS_PATH', '/metrics')
+    QUERY_METRICS_TOKEN = os.environ.get('QUERY_METRICS_TOKEN')
     
     # File upload configuration
     UPLOAD_FOLDER = 'app/static/uploads'
@@ -0,0 +1,56 @@
+"""Add conversation summary table
+
+Revision ID: 1478a5e83bdc
+Revises: 306ac8dc094f
+Create Date: 2026-10-18 10:03:27.914652
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1478a5e83bdc'
+down_revision = '306ac8dc094f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('conversation',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('partner_id', sa.Integer(), nullable=False),
+    sa.Column('last_message_id', sa.Integer(), nullable=True),
+    sa.Column('last_sent_at', sa.DateTime(), nullable=True),
+    sa.Column('unread_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['last_message_id'], ['message.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['partner_id'], ['user.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'partner_id', name='uq_conversation_user_id_partner_id')
+    )
+    with op.batch_alter_table('conversation', schema=None) as batch_op:
+        batch_op.create_index('ix_conversation_user_id_last_sent_at', ['user_id', 'last_sent_at'], unique=False)
+
+    # Backfill one row per (user, partner) from the existing message history
+    op.execute("""
+        INSERT INTO conversation (user_id, partner_id, last_message_id, last_sent_at, unread_count)
+        SELECT t.user_id, t.partner_id, MAX(t.id), MAX(t.sent_at), SUM(t.unread)
+        FROM (
+            SELECT sender_id AS user_id, recipient_id AS partner_id, id, sent_at, 0 AS unread
+            FROM message
+            UNION ALL
+            SELECT recipient_id, sender_id, id, sent_at,
+                   CASE WHEN is_read THEN 0 ELSE 1 END
+            FROM message
+        ) t
+        GROUP BY t.user_id, t.partner_id
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('conversation', schema=None) as batch_op:
+        batch_op.drop_index('ix_conversation_user_id_last_sent_at')
+
+    op.drop_table('conversation')
@@ -0,0 +1,80 @@
+"""Add indexes for hot query paths
+
+Revision ID: 306ac8dc094f
+Revises: c9e3bff75c4d
+Create Date: 2026-10-18 09:12:41.530118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '306ac8dc094f'
+down_revision = 'c9e3bff75c4d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('company_profile', schema=None) as batch_op:
+        batch_op.create_index('ix_company_profile_user_id', ['user_id'], unique=False)
+
+    with op.batch_alter_table('developer_profile', schema=None) as batch_op:
+        batch_op.create_index('ix_developer_profile_user_id', ['user_id'], unique=False)
+
+    with op.batch_alter_table('project', schema=None) as batch_op:
+        batch_op.create_index('ix_project_status_created_at', ['status', 'created_at'], unique=False)
+        batch_op.create_index('ix_project_company_id_created_at', ['company_id', 'created_at'], unique=False)
+
+    with op.batch_alter_table('application', schema=None) as batch_op:
+        batch_op.create_index('ix_application_project_id_developer_id', ['project_id', 'developer_id'], unique=False)
+        batch_op.create_index('ix_application_project_id_status', ['project_id', 'status'], unique=False)
+        batch_op.create_index('ix_application_developer_id_applied_at', ['developer_id', 'applied_at'], unique=False)
+
+    with op.batch_alter_table('submission', schema=None) as batch_op:
+        batch_op.create_index('ix_submission_application_id', ['application_id'], unique=False)
+        batch_op.create_index('ix_submission_project_id', ['project_id'], unique=False)
+
+    with op.batch_alter_table('message', schema=None) as batch_op:
+        batch_op.create_index('ix_message_sender_id_recipient_id_sent_at', ['sender_id', 'recipient_id', 'sent_at'], unique=False)
+        batch_op.create_index('ix_message_recipient_id_sender_id_sent_at', ['recipient_id', 'sender_id', 'sent_at'], unique=False)
+        batch_op.create_index('ix_message_recipient_id_sender_id_unread', ['recipient_id', 'sender_id'], unique=False,
+                              postgresql_where=sa.text('is_read = false'),
+                              sqlite_where=sa.text('is_read = 0'))
+
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.create_index('ix_notification_user_id_created_at', ['user_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_notification_user_id_unread', ['user_id'], unique=False,
+                              postgresql_where=sa.text('is_read = false'),
+                              sqlite_where=sa.text('is_read = 0'))
+
+
+def downgrade():
+    with op.batch_alter_table('notification', schema=None) as batch_op:
+        batch_op.drop_index('ix_notification_user_id_unread')
+        batch_op.drop_index('ix_notification_user_id_created_at')
+
+    with op.batch_alter_table('message', schema=None) as batch_op:
+        batch_op.drop_index('ix_message_recipient_id_sender_id_unread')
+        batch_op.drop_index('ix_message_recipient_id_sender_id_sent_at')
+        batch_op.drop_index('ix_message_sender_id_recipient_id_sent_at')
+
+    with op.batch_alter_table('submission', schema=None) as batch_op:
+        batch_op.drop_index('ix_submission_project_id')
+        batch_op.drop_index('ix_submission_application_id')
+
+    with op.batch_alter_table('application', schema=None) as batch_op:
+        batch_op.drop_index('ix_application_developer_id_applied_at')
+        batch_op.drop_index('ix_application_project_id_status')
+        batch_op.drop_index('ix_application_project_id_developer_id')
+
+    with op.batch_alter_table('project', schema=None) as batch_op:
+        batch_op.drop_index('ix_project_company_id_created_at')
+        batch_op.drop_index('ix_project_status_created_at')
+
+    with op.batch_alter_table('developer_profile', schema=None) as batch_op:
+        batch_op.drop_index('ix_developer_profile_user_id')
+
+    with op.batch_alter_table('company_profile', schema=None) as batch_op:
+        batch_op.drop_index('ix_company_profile_user_id')
@@ -0,0 +1,72 @@
+"""Add project full-text search
+
+Revision ID: 4b7d2e9a1c3f
+Revises: 95e6f18f6183
+Create Date: 2026-10-18 14:02:41.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b7d2e9a1c3f'
+down_revision = '95e6f18f6183'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("""
+            ALTER TABLE project ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(required_skills, '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(description, '')), 'C')
+            ) STORED
+        """)
+        op.execute('CREATE INDEX ix_project_search_vector ON project USING gin (search_vector)')
+    elif dialect == 'sqlite':
+        # Note: batch migrations that recreate the project table drop these
+        # triggers; re-run this revision's SQLite steps after any such change
+        op.execute("""
+            CREATE VIRTUAL TABLE project_fts USING fts5(
+                title, required_skills, description,
+                content='project', content_rowid='id', tokenize='porter unicode61'
+            )
+        """)
+        op.execute("""
+            CREATE TRIGGER project_fts_insert AFTER INSERT ON project BEGIN
+                INSERT INTO project_fts (rowid, title, required_skills, description)
+                VALUES (new.id, new.title, new.required_skills, new.description);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER project_fts_delete AFTER DELETE ON project BEGIN
+                INSERT INTO project_fts (project_fts, rowid, title, required_skills, description)
+                VALUES ('delete', old.id, old.title, old.required_skills, old.description);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER project_fts_update AFTER UPDATE OF title, required_skills, description ON project BEGIN
+                INSERT INTO project_fts (project_fts, rowid, title, required_skills, description)
+                VALUES ('delete', old.id, old.title, old.required_skills, old.description);
+                INSERT INTO project_fts (rowid, title, required_skills, description)
+                VALUES (new.id, new.title, new.required_skills, new.description);
+            END
+        """)
+        # Index existing projects
+        op.execute("INSERT INTO project_fts (project_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('DROP INDEX ix_project_search_vector')
+        op.execute('ALTER TABLE project DROP COLUMN search_vector')
+    elif dialect == 'sqlite':
+        op.execute('DROP TRIGGER project_fts_update')
+        op.execute('DROP TRIGGER project_fts_delete')
+        op.execute('DROP TRIGGER project_fts_insert')
+        op.execute('DROP TABLE project_fts')
@@ -0,0 +1,128 @@
+"""Add skill taxonomy
+
+Revision ID: 7e1c5a0d9b24
+Revises: 4b7d2e9a1c3f
+Create Date: 2026-10-18 15:10:27.642018
+
+"""
+import re
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7e1c5a0d9b24'
+down_revision = '4b7d2e9a1c3f'
+branch_labels = None
+depends_on = None
+
+# Copies of SkillService.DEFAULT_ALIASES and its parsing rules as of this
+# revision, so the migration doesn't change if the service does
+ALIASES = {
+    'JavaScript': ['js', 'javascript es6', 'es6'],
+    'TypeScript': ['ts'],
+    'Node.js': ['node', 'nodejs', 'node js'],
+    'React': ['reactjs', 'react.js', 'react js'],
+    'Vue.js': ['vue', 'vuejs'],
+    'Python': ['py', 'python3'],
+    'Go': ['golang'],
+    'PostgreSQL': ['postgres', 'psql'],
+    'Kubernetes': ['k8s'],
+    'UI/UX Design': ['ui/ux', 'ux/ui', 'ui ux design', 'ux design', 'ui design'],
+    'Adobe Creative Suite': ['adobe cc', 'adobe creative cloud'],
+}
+
+
+def normalize(name):
+    return ' '.join(name.lower().split())
+
+
+def parse(text):
+    names = {}
+    for part in re.split(r'[,;\n]', text or ''):
+        name = ' '.join(part.split())
+        if name:
+            names.setdefault(normalize(name), name[:100])
+    return list(names.values())
+
+
+def upgrade():
+    skill = op.create_table('skill',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('slug', sa.String(length=100), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('slug')
+    )
+    skill_alias = op.create_table('skill_alias',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('skill_id', sa.Integer(), nullable=False),
+    sa.Column('alias', sa.String(length=100), nullable=False),
+    sa.ForeignKeyConstraint(['skill_id'], ['skill.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('alias')
+    )
+    project_skill = op.create_table('project_skill',
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('skill_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['project.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['skill_id'], ['skill.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('project_id', 'skill_id')
+    )
+    with op.batch_alter_table('project_skill', schema=None) as batch_op:
+        batch_op.create_index('ix_project_skill_skill_id_project_id', ['skill_id', 'project_id'], unique=False)
+
+    developer_skill = op.create_table('developer_skill',
+    sa.Column('developer_profile_id', sa.Integer(), nullable=False),
+    sa.Column('skill_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['developer_profile_id'], ['developer_profile.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['skill_id'], ['skill.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('developer_profile_id', 'skill_id')
+    )
+    with op.batch_alter_table('developer_skill', schema=None) as batch_op:
+        batch_op.create_index('ix_developer_skill_skill_id_developer_profile_id', ['skill_id', 'developer_profile_id'], unique=False)
+
+    # Seed canonical skills and their aliases, then parse the existing
+    # comma-separated strings into links
+    bind = op.get_bind()
+    now = datetime.utcnow()
+    slugs = {}
+
+    def skill_id(name):
+        slug = normalize(name)
+        if slug not in slugs:
+            slugs[slug] = bind.execute(
+                skill.insert().values(name=name, slug=slug, created_at=now)
+            ).inserted_primary_key[0]
+        return slugs[slug]
+
+    for name, aliases in ALIASES.items():
+        target = skill_id(name)
+        for alias in aliases:
+            bind.execute(skill_alias.insert().values(skill_id=target, alias=normalize(alias)))
+            slugs[normalize(alias)] = target
+
+    for table, owner_column, source in (
+            (project_skill, 'project_id', 'SELECT id, required_skills FROM project'),
+            (developer_skill, 'developer_profile_id', 'SELECT id, skills FROM developer_profile')):
+        links = []
+        for owner_id, text in bind.execute(sa.text(source)).all():
+            for linked_id in {skill_id(name) for name in parse(text)}:
+                links.append({owner_column: owner_id, 'skill_id': linked_id})
+        if links:
+            op.bulk_insert(table, links)
+
+
+def downgrade():
+    with op.batch_alter_table('developer_skill', schema=None) as batch_op:
+        batch_op.drop_index('ix_developer_skill_skill_id_developer_profile_id')
+
+    op.drop_table('developer_skill')
+    with op.batch_alter_table('project_skill', schema=None) as batch_op:
+        batch_op.drop_index('ix_project_skill_skill_id_project_id')
+
+    op.drop_table('project_skill')
+    op.drop_table('skill_alias')
+    op.drop_table('skill')
@@ -0,0 +1,32 @@
+"""Key message thread indexes on id
+
+Revision ID: 95e6f18f6183
+Revises: 1478a5e83bdc
+Create Date: 2026-10-18 11:26:05.381742
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '95e6f18f6183'
+down_revision = '1478a5e83bdc'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('message', schema=None) as batch_op:
+        batch_op.drop_index('ix_message_sender_id_recipient_id_sent_at')
+        batch_op.drop_index('ix_message_recipient_id_sender_id_sent_at')
+        batch_op.create_index('ix_message_sender_id_recipient_id_id', ['sender_id', 'recipient_id', 'id'], unique=False)
+        batch_op.create_index('ix_message_recipient_id_sender_id_id', ['recipient_id', 'sender_id', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('message', schema=None) as batch_op:
+        batch_op.drop_index('ix_message_recipient_id_sender_id_id')
+        batch_op.drop_index('ix_message_sender_id_recipient_id_id')
+        batch_op.create_index('ix_message_recipient_id_sender_id_sent_at', ['recipient_id', 'sender_id', 'sent_at'], unique=False)
+        batch_op.create_index('ix_message_sender_id_recipient_id_sent_at', ['sender_id', 'recipient_id', 'sent_at'], unique=False)
@@ -0,0 +1,28 @@
+"""Add id to the project listing index
+
+Revision ID: fa18c682a2df
+Revises: dcf27f7dbc99
+Create Date: 2026-10-18 19:47:07.421907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fa18c682a2df'
+down_revision = 'dcf27f7dbc99'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Plain index operations: a SQLite batch that recreated the project table
+    # would drop the full-text search triggers
+    op.create_index('ix_project_status_created_at_id', 'project', ['status', 'created_at', 'id'], unique=False)
+    op.drop_index('ix_project_status_created_at', table_name='project')
+
+
+def downgrade():
+    op.create_index('ix_project_status_created_at', 'project', ['status', 'created_at'], unique=False)
+    op.drop_index('ix_project_status_created_at_id', table_name='project')
@@ -0,0 +1,106 @@
+import os
+from datetime import datetime, timedelta
+import pytest
+from flask import g
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+from config import Config, driver_url
+from app import create_app, db
+from app.models import User, Project, Application
+
+# Every test user's password, hashed once: the work factor dominates setup time
+PASSWORD = 'password'
+PASSWORD_HASH = generate_password_hash(PASSWORD)
+
+
+class TestConfig(Config):
+    TESTING = True
+    WTF_CSRF_ENABLED = False
+    # Set TEST_DATABASE_URL to a scratch PostgreSQL database to run the
+    # PostgreSQL-only tests; its tables are dropped afterwards
+    SQLALCHEMY_DATABASE_URI = driver_url(os.environ.get('TEST_DATABASE_URL') or 'sqlite://')
+    SQLALCHEMY_BINDS = {}
+    DATABASE_REPLICA_URLS = []
+    PAGE_CACHE_ENABLED = False
+    QUERY_METRICS_ENABLED = False
+    CACHE_BACKEND = 'memory'
+    NOTIFICATION_BROKER = 'memory'
+    # Jobs wait in the table until a test runs them
+    JOB_QUEUE_EAGER = False
+
+
+@pytest.fixture
+def app():
+    app = create_app(TestConfig)
+
+    @app.before_request
+    def _reset_globals():
+        # Test client requests share the fixture's app context, and with it
+        # flask.g (including Flask-Login's cached user)
+        for name in list(g):
+            g.pop(name)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def make_user(app):
+    def make_user(username, role='developer'):
+        user = User(username=username, email=f'{username}@example.com', role=role,
+                    password_hash=PASSWORD_HASH)
+        db.session.add(user)
+        db.session.commit()
+        return user
+    return make_user
+
+
+@pytest.fixture
+def make_project(app):
+    def make_project(company, **columns):
+        project = Project(company_id=company.id, title=columns.pop('title', 'Landing page'),
+                          description='Build a landing page',
+                          required_skills=columns.pop('required_skills', 'HTML'),
+                          deadline=datetime.utcnow() + timedelta(days=7), winner_reward=100,
+                          **columns)
+        db.session.add(project)
+        db.session.commit()
+        return project
+    return make_project
+
+
+@pytest.fixture
+def make_application(app):
+    def make_application(project, developer, status='pending'):
+        application = Application(project_id=project.id, developer_id=developer.id,
+                                  cover_letter='I would like to work on this.', status=status)
+        db.session.add(application)
+        db.session.commit()
+        return application
+    return make_application
+
+
+@pytest.fixture
+def login(app):
+    def login(user):
+        client = app.test_client()
+        response = client.post('/auth/login', data={'email': user.email, 'password': PASSWORD})
+        assert response.status_code == 302
+        return client
+    return login
+
+
+@pytest.fixture
+def queries(app):
+    """SQL statements executed while the test runs"""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    yield statements
+    event.remove(db.engine, 'before_cursor_execute', record)
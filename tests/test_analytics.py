@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models import Application, CompanyStats, DailyStats, Project, ProjectStats, Submission
+from app.services.analytics import Analytics
+from app.services.lifecycle_service import ProjectLifecycle
+
+ROLLUPS = (CompanyStats, ProjectStats, DailyStats)
+
+
+def snapshot():
+    db.session.expire_all()
+    rows = {}
+    for model in ROLLUPS:
+        columns = [c.name for c in model.__table__.columns]
+        rows[model.__name__] = sorted(
+            tuple(getattr(row, column) for column in columns) for row in model.query.all())
+    return rows
+
+
+def create_project(client, title, deadline):
+    response = client.post('/create-project', data={
+        'title': title, 'description': 'Build it', 'required_skills': 'HTML, CSS',
+        'deadline': deadline.strftime('%Y-%m-%dT%H:%M'), 'winner_reward': 100,
+        'participation_reward': 10, 'max_shortlist': 5,
+    })
+    assert response.status_code == 302
+    return Project.query.filter_by(title=title).one()
+
+
+def test_incremental_rollups_match_a_rebuild(make_user, login):
+    companies = [make_user('acme', role='company'), make_user('globex', role='company')]
+    developers = [make_user(f'dev{i}') for i in range(4)]
+    company_clients = [login(c) for c in companies]
+    developer_clients = {d.id: login(d) for d in developers}
+
+    week = datetime.utcnow() + timedelta(days=7)
+    contest = create_project(company_clients[0], 'Contest', week)
+    quiet = create_project(company_clients[0], 'Quiet', week)
+    overdue = create_project(company_clients[1], 'Overdue', datetime.utcnow() + timedelta(days=1))
+
+    for client in developer_clients.values():
+        assert client.post(f'/apply/{contest.id}', data={'cover_letter': 'Hi'}).status_code == 302
+    for client in list(developer_clients.values())[:2]:
+        assert client.post(f'/apply/{overdue.id}', data={'cover_letter': 'Hi'}).status_code == 302
+    developer_clients[developers[3].id].post(f'/apply/{quiet.id}', data={'cover_letter': 'Hi'})
+
+    applications = Application.query.filter_by(project_id=contest.id).order_by(Application.id).all()
+    review = f'/api/projects/{contest.id}/applications/review'
+    assert company_clients[0].post(review, json={
+        'action': 'shortlist', 'application_ids': [a.id for a in applications[:3]]}).status_code == 200
+    assert company_clients[0].post(review, json={
+        'action': 'reject', 'application_ids': [applications[3].id]}).status_code == 200
+
+    for application in applications[:2]:
+        client = developer_clients[application.developer_id]
+        assert client.post(f'/submit/{application.id}', data={'description': 'Done'}).status_code == 302
+    submissions = Submission.query.filter_by(project_id=contest.id).order_by(Submission.id).all()
+    for submission, score in zip(submissions, (7, 4)):
+        assert company_clients[0].post(f'/submission/{submission.id}/feedback',
+                                       data={'score': score, 'feedback': 'Nice'}).status_code == 302
+    # Rescoring replaces the old score
+    company_clients[0].post(f'/submission/{submissions[0].id}/feedback', data={'score': 9, 'feedback': 'Great'})
+    assert company_clients[0].get(f'/declare-winner/{submissions[0].id}').status_code == 302
+
+    assert ProjectLifecycle.expire_projects(datetime.utcnow() + timedelta(days=2)) == 1
+
+    incremental = snapshot()
+    assert incremental['CompanyStats'] and incremental['DailyStats']
+    Analytics.rebuild()
+    rebuilt = snapshot()
+
+    # Seconds to the first shortlist are computed in Python incrementally
+    # and by the database on a rebuild, so compare them approximately
+    for stats in (incremental, rebuilt):
+        stats['CompanyStats'] = [row[:-1] + (pytest.approx(row[-1], abs=0.01),)
+                                 for row in stats['CompanyStats']]
+    assert incremental == rebuilt
+
+    acme = db.session.get(CompanyStats, companies[0].id)
+    assert (acme.projects, acme.open_projects, acme.completed_projects) == (2, 1, 1)
+    assert (acme.applications, acme.shortlisted, acme.submissions) == (5, 3, 2)
+    assert (acme.scored_submissions, acme.score_total, acme.shortlisted_projects) == (2, 13, 1)
+    assert db.session.get(CompanyStats, companies[1].id).expired_projects == 1
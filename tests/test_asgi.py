@@ -0,0 +1,88 @@
+import asyncio
+import contextvars
+import json
+import pytest
+from app.asgi import StreamApp
+from app.services.message_service import MessageService
+
+
+@pytest.fixture
+def thread(app, make_user, make_project, login):
+    company = make_user('acme', role='company')
+    developer = make_user('dev')
+    project = make_project(company)
+    first = MessageService.send_message(company.id, developer.id, 'Hello', project.id)
+    cookie = login(developer).get_cookie('session').value
+    # Ids rather than rows, for use from other threads
+    return company.id, developer.id, project.id, first.id, cookie
+
+
+def wait(app, path, cookie=None, during=None):
+    """Run one request against the ASGI app; ``during`` runs in a thread while it waits"""
+    headers = [(b'cookie', f'session={cookie}'.encode())] if cookie else []
+    path, _, query = path.partition('?')
+    scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': query.encode(),
+             'headers': headers, 'client': ('127.0.0.1', 1234)}
+    sent = []
+
+    async def receive():
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+
+    async def run():
+        request = asyncio.ensure_future(StreamApp(app)(scope, receive, send))
+        if during:
+            await asyncio.sleep(0.2)
+            assert not sent, 'answered before anything happened'
+            await asyncio.to_thread(during)
+        await asyncio.wait_for(request, 5)
+
+    # Outside the fixture's app context, as under uvicorn
+    contextvars.Context().run(asyncio.run, run())
+    status = sent[0]['status']
+    body = b''.join(m.get('body', b'') for m in sent[1:])
+    return status, json.loads(body) if status == 200 else body
+
+
+def test_newer_messages_are_returned_at_once(app, thread):
+    company, developer, project, first, cookie = thread
+    status, data = wait(app, f'/api/messages/{company}/wait?after_id=0', cookie)
+    assert status == 200
+    assert [m['id'] for m in data['messages']] == [first]
+    assert data['messages'][0]['is_read']
+    assert data['newest_id'] == first
+
+
+def test_a_new_message_ends_the_wait(app, thread):
+    company, developer, project, first, cookie = thread
+
+    def reply():
+        with app.app_context():
+            MessageService.send_message(company, developer, 'Are you there?', project)
+
+    status, data = wait(app, f'/api/messages/{company}/wait?after_id={first}', cookie, during=reply)
+    assert status == 200
+    assert [m['content'] for m in data['messages']] == ['Are you there?']
+
+
+def test_messages_in_other_threads_are_ignored(app, thread, make_user):
+    company, developer, project, first, cookie = thread
+    app.config['MESSAGE_WAIT_TIMEOUT'] = 1
+    other_id = make_user('globex', role='company').id
+
+    def elsewhere():
+        with app.app_context():
+            MessageService.send_message(other_id, developer, 'Hi from elsewhere', project)
+
+    status, data = wait(app, f'/api/messages/{company}/wait?after_id={first}', cookie, during=elsewhere)
+    assert status == 200
+    assert data['messages'] == [] and data['newest_id'] is None
+
+
+def test_invalid_waits_are_refused(app, thread):
+    company, developer, project, first, cookie = thread
+    assert wait(app, f'/api/messages/{company}/wait?after_id=0')[0] == 401
+    assert wait(app, f'/api/messages/{company}/wait', cookie)[0] == 400
+    assert wait(app, '/api/messages/abc/wait?after_id=0', cookie)[0] == 404
@@ -0,0 +1,64 @@
+import pytest
+from app.services.cache import LRUCache, FileSystemCache, RedisCache
+from app.services.unread_counters import UnreadCounters
+
+
+def redis_cache():
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('lupa', reason='fakeredis needs lupa to run Lua scripts')
+    return RedisCache(fakeredis.FakeRedis())
+
+
+@pytest.fixture(params=['memory', 'filesystem', 'redis'])
+def cache(request, tmp_path):
+    if request.param == 'memory':
+        return LRUCache()
+    if request.param == 'filesystem':
+        return FileSystemCache(str(tmp_path))
+    return redis_cache()
+
+
+def test_incr_only_adjusts_cached_counters(cache):
+    assert cache.incr('missing', 1) is None
+    assert cache.get('missing') is None
+
+    cache.set('counter', 3)
+    assert cache.incr('counter', 2) == 5
+    assert cache.incr('counter', -1) == 4
+    assert cache.get('counter') == 4
+
+
+def test_add_only_sets_missing_keys(cache):
+    assert cache.add('key', 1)
+    assert not cache.add('key', 2)
+    assert cache.get('key') == 1
+
+    cache.delete('key')
+    assert cache.add('key', 3)
+    assert cache.get('key') == 3
+
+
+def test_add_replaces_expired_keys(cache):
+    if isinstance(cache, RedisCache):
+        pytest.skip('Redis expires keys itself')
+    cache.set('key', 1, ttl=-1)
+    assert cache.add('key', 2)
+    assert cache.get('key') == 2
+
+
+def test_unread_count_keeps_a_count_cached_meanwhile(app, make_user, monkeypatch):
+    user = make_user('reader')
+    key = UnreadCounters._key(UnreadCounters.NOTIFICATIONS, user.id)
+    cache = LRUCache()
+    monkeypatch.setattr('app.services.unread_counters.get_cache', lambda: cache)
+
+    def count_while_another_request_caches(kind, user_id):
+        # Another request caches the count and a new notification adjusts
+        # it while this one is still counting
+        cache.set(key, 0)
+        cache.incr(key, 1)
+        return 0
+
+    monkeypatch.setattr(UnreadCounters, '_count', staticmethod(count_while_another_request_caches))
+    assert UnreadCounters.get(UnreadCounters.NOTIFICATIONS, user.id) == 1
+    assert cache.get(key) == 1
@@ -0,0 +1,74 @@
+import pytest
+from app.services.message_service import MessageService
+from app.services.notification_service import NotificationService
+
+
+@pytest.fixture
+def reader(make_user):
+    return make_user('reader')
+
+
+def unread_count(client, *etags):
+    headers = {'If-None-Match': ', '.join(etags)} if etags else {}
+    return client.get('/api/notifications/unread-count', headers=headers)
+
+
+def test_unchanged_resource_is_not_modified(reader, login):
+    client = login(reader)
+    first = unread_count(client)
+    assert first.status_code == 200
+    assert first.get_json() == {'count': 0}
+    etag = first.headers['ETag']
+    assert first.cache_control.private and first.cache_control.no_cache
+
+    repeat = unread_count(client, etag)
+    assert repeat.status_code == 304
+    assert repeat.data == b''
+    assert repeat.headers['ETag'] == etag
+
+
+def test_etag_changes_after_a_write(reader, login):
+    client = login(reader)
+    etag = unread_count(client).headers['ETag']
+
+    NotificationService.create_notification(reader.id, 'Hello', 'Welcome', 'system')
+    changed = unread_count(client, etag)
+    assert changed.status_code == 200
+    assert changed.get_json() == {'count': 1}
+    assert changed.headers['ETag'] != etag
+    assert unread_count(client, changed.headers['ETag']).status_code == 304
+
+
+def test_any_matching_etag_is_not_modified(reader, login):
+    client = login(reader)
+    etag = unread_count(client).headers['ETag']
+    weak = f'W/{etag}'
+
+    assert unread_count(client, '"stale"', etag).status_code == 304
+    # Compressing proxies weaken the ETag they pass on
+    assert unread_count(client, weak).status_code == 304
+    assert unread_count(client, '*').status_code == 304
+    assert unread_count(client, '"stale"', 'W/"older"').status_code == 200
+
+
+def test_idle_thread_polls_skip_the_thread_query(make_user, make_project, login, queries):
+    company = make_user('acme', role='company')
+    developer = make_user('dev')
+    project = make_project(company)
+    MessageService.send_message(company.id, developer.id, 'Hello', project.id)
+    client = login(developer)
+    url = f'/api/messages/{company.id}'
+
+    # Reading the thread marks it read, so the ETag is the one after that
+    etag = client.get(url).headers['ETag']
+    del queries[:]
+    assert client.get(url, headers={'If-None-Match': etag}).status_code == 304
+    assert not [q for q in queries if 'FROM message' in q]
+
+    # Other pages of the same thread have their own ETags
+    assert client.get(f'{url}?limit=10', headers={'If-None-Match': etag}).status_code == 200
+
+    MessageService.send_message(company.id, developer.id, 'Still there?', project.id)
+    response = client.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert [m['content'] for m in response.get_json()['messages']] == ['Hello', 'Still there?']
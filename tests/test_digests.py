@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models import Notification, NotificationDigest
+from app.services.digest_service import DigestService
+
+
+class FakeSMTP:
+    """Records the connections opened and the messages sent over each"""
+    connections = []
+
+    def __init__(self, host, port, timeout=None):
+        self.address = (host, port)
+        self.messages = []
+        self.closed = False
+        FakeSMTP.connections.append(self)
+
+    def ehlo(self):
+        pass
+
+    def starttls(self):
+        pass
+
+    def send_message(self, message):
+        assert not self.closed
+        self.messages.append(message)
+
+    def quit(self):
+        self.closed = True
+
+
+@pytest.fixture
+def smtp(app, monkeypatch):
+    app.config.update(MAIL_SERVER='smtp.example.com', MAIL_USE_TLS=False)
+    FakeSMTP.connections = []
+    monkeypatch.setattr('smtplib.SMTP', FakeSMTP)
+    return FakeSMTP
+
+
+def notify(users, count=2):
+    for user in users:
+        for i in range(count):
+            db.session.add(Notification(user_id=user.id, title=f'Update {i}',
+                                        message=f'Something happened for {user.username}', type='project'))
+    db.session.commit()
+
+
+def test_digests_are_sent_once_over_one_connection(smtp, make_user):
+    users = [make_user(f'dev{i}') for i in range(3)]
+    # The first run only starts the cursor
+    assert DigestService.run() == 0
+    notify(users)
+
+    now = datetime.utcnow() + timedelta(minutes=61)
+    assert DigestService.run(now) == 3
+
+    connection, = smtp.connections
+    assert connection.address == ('smtp.example.com', 587)
+    assert connection.closed
+    assert sorted(m['To'] for m in connection.messages) == sorted(u.email for u in users)
+    assert all(m['Subject'] == 'You have 2 new notifications on CollabPlatform'
+               for m in connection.messages)
+
+    states = NotificationDigest.query.all()
+    assert sorted(s.user_id for s in states) == sorted(u.id for u in users)
+    assert all(s.last_sent_at == now and s.due_at is None for s in states)
+
+    # Nothing new, so nothing is sent and no connection is opened
+    assert DigestService.run(now + timedelta(minutes=61)) == 0
+    assert len(smtp.connections) == 1
+
+
+def test_read_notifications_are_left_out(smtp, make_user):
+    reader, other = make_user('reader'), make_user('other')
+    DigestService.run()
+    notify([reader, other])
+    Notification.query.filter_by(user_id=reader.id).update({'is_read': True})
+    db.session.commit()
+
+    assert DigestService.run(datetime.utcnow() + timedelta(minutes=61)) == 1
+    message, = smtp.connections[0].messages
+    assert message['To'] == other.email
+    assert db.session.get(NotificationDigest, reader.id).last_sent_at is None
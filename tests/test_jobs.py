@@ -0,0 +1,165 @@
+import contextvars
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import create_engine, text
+from app import db
+from app.models import Job, Notification, Project
+from app.services.jobs import JobQueue, job
+from app.services.message_service import MessageService
+
+# Failures left for tests.flaky before it succeeds, by job payload key
+FAILURES = {}
+
+
+@job('tests.flaky')
+def _flaky(key):
+    if FAILURES.get(key, 0) > 0:
+        FAILURES[key] -= 1
+        raise RuntimeError(f'{key} failed')
+
+
+def make_due(job_id):
+    db.session.get(Job, job_id).run_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+
+
+def test_queued_job_runs_in_process(app, make_user):
+    sender = make_user('sender', role='company')
+    recipient = make_user('recipient')
+    project = Project(company_id=sender.id, title='Landing page', description='Build it',
+                      required_skills='HTML', deadline=datetime.utcnow() + timedelta(days=7),
+                      winner_reward=100)
+    db.session.add(project)
+    db.session.commit()
+
+    MessageService.send_message(sender.id, recipient.id, 'Hello', project.id)
+    queued = Job.query.one()
+    assert queued.name == 'messages.notify_recipient'
+    assert queued.status == 'pending'
+    assert Notification.query.count() == 0
+
+    assert JobQueue.run_pending() == 1
+    notification = Notification.query.one()
+    assert notification.user_id == recipient.id
+    assert notification.type == 'message'
+    done = db.session.get(Job, queued.id)
+    assert done.status == 'done'
+    assert done.attempts == 1
+    assert done.finished_at is not None
+    assert done.locked_by.startswith('inline:')
+
+    # Nothing is left to run
+    assert JobQueue.run_pending() == 0
+
+
+def test_failed_job_is_retried_with_backoff(app):
+    app.config['JOB_RETRY_BACKOFF'] = 10
+    FAILURES['retry'] = 1
+    queued = JobQueue.enqueue('tests.flaky', {'key': 'retry'})
+    db.session.commit()
+
+    before = datetime.utcnow()
+    assert JobQueue.run_pending() == 1
+    retried = db.session.get(Job, queued.id)
+    assert retried.status == 'pending'
+    assert retried.attempts == 1
+    assert 'retry failed' in retried.last_error
+    assert retried.locked_by is None
+    # First retry after JOB_RETRY_BACKOFF seconds, with up to 25% jitter
+    assert before + timedelta(seconds=7) <= retried.run_at <= datetime.utcnow() + timedelta(seconds=13)
+
+    # Not due yet, so a burst run leaves it alone
+    assert JobQueue.run_pending() == 0
+    make_due(queued.id)
+    assert JobQueue.run_pending() == 1
+    succeeded = db.session.get(Job, queued.id)
+    assert succeeded.status == 'done'
+    assert succeeded.attempts == 2
+    assert succeeded.last_error is None
+
+
+def test_job_fails_after_max_attempts(app):
+    FAILURES['hopeless'] = 10
+    queued = JobQueue.enqueue('tests.flaky', {'key': 'hopeless'}, max_attempts=2)
+    db.session.commit()
+
+    JobQueue.run_pending()
+    make_due(queued.id)
+    JobQueue.run_pending()
+    failed = db.session.get(Job, queued.id)
+    assert failed.status == 'failed'
+    assert failed.attempts == 2
+    assert failed.finished_at is not None
+
+    make_due(queued.id)
+    assert JobQueue.run_pending() == 0
+
+
+def test_backoff_doubles_up_to_the_maximum(app):
+    app.config['JOB_RETRY_BACKOFF'] = 10
+    app.config['JOB_RETRY_BACKOFF_MAX'] = 60
+    for attempts, delay in ((1, 10), (2, 20), (3, 40), (4, 60), (10, 60)):
+        assert delay * 0.75 <= JobQueue.backoff(attempts) <= delay * 1.25
+
+
+def test_claimed_jobs_are_not_claimed_again(app):
+    queued = [JobQueue.enqueue('tests.flaky', {'key': f'claim{i}'}) for i in range(3)]
+    db.session.commit()
+    ids = [j.id for j in queued]
+
+    first = JobQueue.claim('worker-a', limit=2)
+    second = JobQueue.claim('worker-b', limit=5)
+    assert len(first) == 2
+    assert len(second) == 1
+    assert {j.id for j in first} | {j.id for j in second} == set(ids)
+    assert all(j.status == 'running' and j.locked_by.startswith('worker-a:') for j in first)
+    assert JobQueue.claim('worker-c', limit=5) == []
+
+
+def test_jobs_of_a_stopped_worker_are_reclaimed(app):
+    queued = JobQueue.enqueue('tests.flaky', {'key': 'stale'})
+    db.session.commit()
+    assert len(JobQueue.claim('worker-a')) == 1
+
+    stale = db.session.get(Job, queued.id)
+    stale.locked_at = datetime.utcnow() - timedelta(seconds=app.config['JOB_LOCK_TIMEOUT'] + 1)
+    db.session.commit()
+    reclaimed = JobQueue.claim('worker-b')
+    assert [j.id for j in reclaimed] == [queued.id]
+    assert reclaimed[0].attempts == 2
+
+
+def test_claim_skips_rows_locked_by_another_worker(app):
+    if db.engine.dialect.name != 'postgresql':
+        pytest.skip('SKIP LOCKED needs PostgreSQL; set TEST_DATABASE_URL')
+    queued = [JobQueue.enqueue('tests.flaky', {'key': f'locked{i}'}) for i in range(2)]
+    db.session.commit()
+    ids = [j.id for j in queued]
+
+    # Another worker's transaction holds the first job's row lock
+    other = create_engine(db.engine.url)
+    with other.connect() as connection:
+        connection.execute(text('SELECT id FROM job WHERE id = :id FOR UPDATE'), {'id': ids[0]})
+        # Waiting on the lock would fail here instead of hanging the suite
+        db.session.execute(text("SET lock_timeout = '5s'"))
+        claimed = JobQueue.claim('worker-b', limit=5)
+        assert [j.id for j in claimed] == [ids[1]]
+        connection.rollback()
+    other.dispose()
+
+    assert [j.id for j in JobQueue.claim('worker-c', limit=5)] == [ids[0]]
+
+
+def test_worker_command_processes_due_jobs(app):
+    FAILURES.pop('cli', None)
+    queued = [JobQueue.enqueue('tests.flaky', {'key': 'cli'}) for _ in range(2)]
+    db.session.commit()
+    ids = [j.id for j in queued]
+
+    # Run as `flask worker` would, outside the fixture's app context
+    result = contextvars.Context().run(
+        app.test_cli_runner().invoke, args=['worker', '--burst', '--worker-id', 'cli'])
+    assert result.exit_code == 0, result.output
+    assert result.output.strip() == '2 jobs processed.'
+    db.session.expire_all()
+    assert all(db.session.get(Job, job_id).status == 'done' for job_id in ids)
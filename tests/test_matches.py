@@ -0,0 +1,73 @@
+import json
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models import DeveloperProfile, Job, MatchScore, Project
+from app.services.cache import get_cache
+from app.services.jobs import JobQueue
+from app.services.match_service import MatchService, IDF_KEY
+
+
+@pytest.fixture
+def developer(make_user):
+    user = make_user('dev')
+    profile = DeveloperProfile(user_id=user.id, full_name='Dev', skills='HTML, Python',
+                               experience_level='advanced')
+    db.session.add(profile)
+    db.session.commit()
+    return profile
+
+
+def create_project(client, title, skills):
+    response = client.post('/create-project', data={
+        'title': title, 'description': 'Build it', 'required_skills': skills,
+        'deadline': (datetime.utcnow() + timedelta(days=7)).strftime('%Y-%m-%dT%H:%M'),
+        'winner_reward': 100, 'participation_reward': 10, 'max_shortlist': 5,
+    })
+    assert response.status_code == 302
+    return Project.query.filter_by(title=title).one()
+
+
+def test_new_project_is_scored_by_a_job(developer, make_user, login):
+    project = create_project(login(make_user('acme', role='company')), 'Site', 'HTML, CSS')
+    queued = Job.query.filter_by(name='matches.refresh_project').one()
+    assert json.loads(queued.payload) == {'project_id': project.id}
+    assert MatchScore.query.count() == 0
+
+    JobQueue.run_pending()
+    match = MatchScore.query.one()
+    assert (match.developer_profile_id, match.project_id) == (developer.id, project.id)
+    assert match.matched_skills == 1
+    assert 0 < match.skill_score < 1
+
+
+def test_developer_refreshes_reuse_the_idf_table(developer, make_user, make_project, queries):
+    company = make_user('acme', role='company')
+    make_project(company, title='Site')
+    make_project(company, title='Scraper', required_skills='Python')
+
+    def idf_queries():
+        del queries[:]
+        MatchService.refresh_developer(developer.id)
+        return len([q for q in queries if 'GROUP BY project_skill.skill_id' in q])
+
+    get_cache().delete(IDF_KEY)
+    assert idf_queries() == 1
+    assert idf_queries() == 0
+    assert MatchScore.query.count() == 2
+
+    # A project refresh changes every skill's IDF, so it drops the table
+    MatchService.refresh_project(Project.query.filter_by(title='Site').one().id)
+    assert get_cache().get(IDF_KEY) is None
+    assert idf_queries() == 1
+
+
+def test_cached_idf_matches_a_fresh_one(developer, make_user, make_project):
+    company = make_user('acme', role='company')
+    make_project(company, title='Site')
+    make_project(company, title='Scraper', required_skills='Python, HTML')
+
+    get_cache().delete(IDF_KEY)
+    fresh = MatchService._cached_idf()
+    assert MatchService._cached_idf() == fresh == MatchService._idf()
+    assert all(isinstance(skill_id, int) for skill_id in fresh)
@@ -0,0 +1,132 @@
+import pytest
+from app import db
+from app.models import Conversation, Message
+from app.services.message_service import MessageService
+
+
+@pytest.fixture
+def users(make_user, make_project):
+    company = make_user('acme', role='company')
+    developer = make_user('dev')
+    return company, developer, make_project(company)
+
+
+def summary(user, partner):
+    db.session.expire_all()
+    return Conversation.query.filter_by(user_id=user.id, partner_id=partner.id).one()
+
+
+def test_first_message_creates_both_summaries(users):
+    company, developer, project = users
+    message = MessageService.send_message(company.id, developer.id, 'Hello', project.id)
+
+    assert Conversation.query.count() == 2
+    sent, received = summary(company, developer), summary(developer, company)
+    assert sent.last_message_id == received.last_message_id == message.id
+    assert sent.last_sent_at == received.last_sent_at == message.sent_at
+    assert (sent.unread_count, received.unread_count) == (0, 1)
+
+
+def test_summaries_follow_the_latest_message(users):
+    company, developer, project = users
+    MessageService.send_message(company.id, developer.id, 'Hello', project.id)
+    MessageService.send_message(company.id, developer.id, 'Are you there?', project.id)
+    assert summary(developer, company).unread_count == 2
+
+    reply = MessageService.send_message(developer.id, company.id, 'Yes', project.id)
+    assert Conversation.query.count() == 2
+    for user, partner in ((company, developer), (developer, company)):
+        assert summary(user, partner).last_message_id == reply.id
+        assert summary(user, partner).last_message.content == 'Yes'
+    assert summary(company, developer).unread_count == 1
+    assert summary(developer, company).unread_count == 2
+
+
+def test_reading_lowers_the_unread_count(users):
+    company, developer, project = users
+    for content in ('One', 'Two', 'Three'):
+        MessageService.send_message(company.id, developer.id, content, project.id)
+    messages = Message.query.order_by(Message.id).all()
+
+    assert MessageService.mark_messages_read(developer.id, company.id, messages[:2]) == 2
+    assert summary(developer, company).unread_count == 1
+    # Already read, so nothing changes
+    assert MessageService.mark_messages_read(developer.id, company.id, messages[:2]) == 0
+    assert summary(developer, company).unread_count == 1
+    # The sender can't mark its own messages read
+    assert MessageService.mark_messages_read(company.id, developer.id, messages) == 0
+
+    assert MessageService.mark_messages_read(developer.id, company.id, messages) == 1
+    assert summary(developer, company).unread_count == 0
+    assert MessageService.get_unread_count(developer.id) == 0
+
+
+def test_unread_count_never_goes_below_zero(users):
+    company, developer, project = users
+    messages = [MessageService.send_message(company.id, developer.id, 'Hello', project.id)
+                for _ in range(2)]
+    # Out of step with the messages, e.g. after a manual fix
+    Conversation.query.filter_by(user_id=developer.id).update({'unread_count': 1})
+    db.session.commit()
+
+    assert MessageService.mark_messages_read(developer.id, company.id, messages) == 2
+    assert summary(developer, company).unread_count == 0
+
+
+@pytest.fixture
+def thread(users, make_user):
+    """Seven messages from the company to the developer, oldest first, with
+    a message to someone else in between"""
+    company, developer, project = users
+    messages = [MessageService.send_message(company.id, developer.id, f'Message {i}', project.id)
+                for i in range(4)]
+    MessageService.send_message(company.id, make_user('bystander').id, 'Elsewhere', project.id)
+    messages += [MessageService.send_message(company.id, developer.id, f'Message {i}', project.id)
+                 for i in range(4, 7)]
+    return [m.id for m in messages]
+
+
+def page(user, partner, **cursor):
+    messages, has_more = MessageService.get_thread(user.id, partner.id, limit=3, **cursor)
+    return [m.id for m in messages], has_more
+
+
+def test_thread_pages_back_from_the_latest(users, thread):
+    company, developer, _ = users
+    assert page(developer, company) == (thread[4:], True)
+    assert page(developer, company, before_id=thread[4]) == (thread[1:4], True)
+    assert page(developer, company, before_id=thread[1]) == (thread[:1], False)
+    assert page(developer, company, before_id=thread[0]) == ([], False)
+    # The same thread from the sender's side
+    assert page(company, developer) == (thread[4:], True)
+
+
+def test_thread_pages_forward_from_a_message(users, thread):
+    company, developer, _ = users
+    assert page(developer, company, after_id=thread[0]) == (thread[1:4], True)
+    assert page(developer, company, after_id=thread[3]) == (thread[4:], False)
+    assert page(developer, company, after_id=thread[-1]) == ([], False)
+
+
+def test_only_the_returned_page_is_marked_read(users, thread, login):
+    company, developer, _ = users
+    client = login(developer)
+
+    data = client.get(f'/api/messages/{company.id}?limit=3').get_json()
+    assert [m['id'] for m in data['messages']] == thread[4:]
+    assert all(m['is_read'] for m in data['messages'])
+    assert (data['has_more'], data['oldest_id'], data['newest_id']) == (True, thread[4], thread[-1])
+    db.session.expire_all()
+    unread = [m.id for m in Message.query.filter_by(recipient_id=developer.id, is_read=False)]
+    assert unread == thread[:4]
+    assert summary(developer, company).unread_count == 4
+
+    data = client.get(f'/api/messages/{company.id}?limit=3&before_id={thread[4]}').get_json()
+    assert [m['id'] for m in data['messages']] == thread[1:4]
+    db.session.expire_all()
+    assert [m.id for m in Message.query.filter_by(recipient_id=developer.id, is_read=False)] == thread[:1]
+    assert summary(developer, company).unread_count == 1
+
+    # The sender reading the thread leaves the recipient's messages unread
+    login(company).get(f'/api/messages/{developer.id}')
+    assert summary(developer, company).unread_count == 1
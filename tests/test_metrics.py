@@ -0,0 +1,41 @@
+import pytest
+from app import create_app
+from tests.conftest import TestConfig
+
+
+class MetricsConfig(TestConfig):
+    QUERY_METRICS_ENABLED = True
+
+
+def metrics_app(**config):
+    app = create_app(MetricsConfig)
+    app.config.update(config)
+    return app
+
+
+def test_metrics_need_a_token_outside_debug():
+    assert metrics_app().test_client().get('/metrics').status_code == 404
+
+    client = metrics_app(QUERY_METRICS_TOKEN='secret').test_client()
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 403
+    response = client.get('/metrics', headers={'Authorization': 'Bearer secret'})
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+
+
+def test_metrics_are_open_in_debug_without_a_token():
+    app = metrics_app()
+    app.debug = True
+    assert app.test_client().get('/metrics').status_code == 200
+
+
+@pytest.mark.parametrize('apps', [1, 3])
+def test_each_metric_is_described_once(apps):
+    for _ in range(apps):
+        app = metrics_app(QUERY_METRICS_TOKEN='secret')
+    body = app.test_client().get('/metrics', headers={'Authorization': 'Bearer secret'}).get_data(as_text=True)
+    help_lines = [line.split()[2] for line in body.splitlines() if line.startswith('# HELP')]
+    assert {'collab_request_queries', 'collab_db_pool_checkouts_total',
+            'collab_page_cache_total'} <= set(help_lines)
+    assert len(help_lines) == len(set(help_lines))
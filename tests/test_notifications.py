@@ -0,0 +1,56 @@
+import pytest
+from app import db
+from app.models import Notification
+from app.services.notification_service import NotificationService
+
+
+@pytest.fixture
+def user(make_user):
+    user = make_user('reader')
+    NotificationService.create_many([(user.id, 'Hello', 'Welcome', 'system')] * 3)
+    # Cache the count, so later changes adjust it instead of recounting
+    assert NotificationService.get_unread_count(user.id) == 3
+    return user
+
+
+def ids(user):
+    return [n.id for n in Notification.query.filter_by(user_id=user.id).order_by(Notification.id)]
+
+
+def test_marking_read_twice_lowers_the_count_once(user):
+    first = ids(user)[0]
+    assert NotificationService.mark_as_read(first, user.id)
+    assert NotificationService.mark_as_read(first, user.id)
+    assert NotificationService.get_unread_count(user.id) == 2
+
+
+def test_a_notification_read_meanwhile_is_not_counted_again(user):
+    first = ids(user)[0]
+    # Another request marks it read after this one's count was cached
+    Notification.query.filter_by(id=first).update({'is_read': True})
+    db.session.commit()
+    NotificationService.mark_as_read(first, user.id)
+    NotificationService.delete_notification(first, user.id)
+    # Still the cached value: the other request adjusts it itself
+    assert NotificationService.get_unread_count(user.id) == 3
+
+
+def test_deleting_lowers_the_count_only_for_unread(user):
+    read, unread, _ = ids(user)
+    NotificationService.mark_as_read(read, user.id)
+    assert NotificationService.delete_notification(read, user.id)
+    assert NotificationService.get_unread_count(user.id) == 2
+    assert NotificationService.delete_notification(unread, user.id)
+    assert NotificationService.get_unread_count(user.id) == 1
+    assert db.session.get(Notification, read) is None
+    assert db.session.get(Notification, unread) is None
+
+
+def test_other_users_notifications_are_left_alone(user, make_user):
+    first = ids(user)[0]
+    other = make_user('other')
+    assert not NotificationService.mark_as_read(first, other.id)
+    assert not NotificationService.delete_notification(first, other.id)
+    assert not NotificationService.mark_as_read(9999, user.id)
+    assert not db.session.get(Notification, first).is_read
+    assert NotificationService.get_unread_count(user.id) == 3
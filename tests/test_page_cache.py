@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.services.lifecycle_service import ProjectLifecycle
+from app.services.page_cache import PageCache
+
+
+@pytest.fixture
+def projects(app, make_user, make_project):
+    app.config['PAGE_CACHE_ENABLED'] = True
+    company = make_user('acme', role='company')
+    return make_project(company, title='First'), make_project(company, title='Second')
+
+
+def cache_status(client, *urls):
+    return [client.get(url).headers.get('X-Cache') for url in urls]
+
+
+def test_pages_are_served_from_the_cache(app, projects):
+    client = app.test_client()
+    first = client.get('/projects')
+    assert first.headers['X-Cache'] == 'MISS'
+    again = client.get('/projects')
+    assert again.headers['X-Cache'] == 'HIT'
+    assert again.data == first.data
+    assert client.get('/projects', headers={'If-None-Match': again.headers['ETag']}).status_code == 304
+    # Other query arguments are other pages
+    assert cache_status(client, '/projects?status=completed') == ['MISS']
+
+
+def test_an_application_only_invalidates_its_project(app, projects, make_user, make_application):
+    first, second = projects
+    urls = ('/', '/projects', f'/project/{first.id}', f'/project/{second.id}')
+    client = app.test_client()
+    assert cache_status(client, *urls) == ['MISS'] * 4
+
+    make_application(first, make_user('dev'))
+    assert cache_status(client, *urls) == ['HIT', 'HIT', 'MISS', 'HIT']
+
+
+def test_a_project_change_invalidates_listings_and_its_page(app, projects):
+    first, second = projects
+    urls = ('/', '/projects', '/api/projects', f'/project/{first.id}', f'/project/{second.id}')
+    client = app.test_client()
+    cache_status(client, *urls)
+
+    first.title = 'Renamed'
+    db.session.commit()
+    assert cache_status(client, *urls) == ['MISS', 'MISS', 'MISS', 'MISS', 'HIT']
+    assert b'Renamed' in client.get(f'/project/{first.id}').data
+
+
+def test_bulk_project_changes_invalidate_every_page(app, projects):
+    first, second = projects
+    urls = ('/projects', f'/project/{first.id}', f'/project/{second.id}')
+    client = app.test_client()
+    cache_status(client, *urls)
+
+    assert ProjectLifecycle.expire_projects(datetime.utcnow() + timedelta(days=8)) == 2
+    assert cache_status(client, *urls) == ['MISS'] * 3
+
+
+def test_fragments_follow_their_project(app, projects, make_user, make_application, login):
+    first, second = projects
+    client = login(make_user('dev'))
+
+    def fragment_results():
+        before = PageCache.stats.snapshot()
+        client.get(f'/project/{first.id}')
+        after = PageCache.stats.snapshot()
+        return {result for (kind, result), count in after.items()
+                if kind == 'fragment' and count > before.get((kind, result), 0)}
+
+    assert fragment_results() == {'miss'}
+    assert fragment_results() == {'hit'}
+    make_application(second, make_user('other'))
+    assert fragment_results() == {'hit'}
+    first.description = 'Build a better landing page'
+    db.session.commit()
+    assert fragment_results() == {'miss'}
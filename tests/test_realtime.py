@@ -0,0 +1,31 @@
+from app import db
+from app.services.notification_service import NotificationService
+from app.services.realtime import get_broker
+
+
+def test_a_commit_publishes_its_notifications_together(app, make_user, monkeypatch):
+    users = [make_user(f'dev{i}') for i in range(3)]
+    broker = get_broker()
+    subscriptions = [broker.subscribe(user.id) for user in users]
+    batches = []
+    publish_many = broker.publish_many
+    monkeypatch.setattr(broker, 'publish_many', lambda events: batches.append(events) or publish_many(events))
+
+    NotificationService.create_notifications([u.id for u in users], 'Hello', 'Welcome', 'system')
+    assert len(batches) == 1
+    assert [user_id for user_id, _ in batches[0]] == [u.id for u in users]
+
+    for user, subscription in zip(users, subscriptions):
+        event = subscription.get_nowait()
+        assert event['type'] == 'notification'
+        assert event['notification']['user_id'] == user.id
+        assert subscription.empty()
+
+
+def test_nothing_is_published_for_a_rolled_back_transaction(app, make_user):
+    user = make_user('dev')
+    subscription = get_broker().subscribe(user.id)
+
+    NotificationService.create_notification(user.id, 'Hello', 'Welcome', 'system', commit=False)
+    db.session.rollback()
+    assert subscription.empty()
@@ -0,0 +1,115 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Application, Notification, Project
+from app.services.project_service import ProjectService, MAX_REVIEW_BATCH
+
+
+@pytest.fixture
+def company(make_user):
+    return make_user('acme', role='company')
+
+
+@pytest.fixture
+def developers(make_user):
+    return [make_user(f'dev{i}') for i in range(5)]
+
+
+def review(client, project, action, application_ids):
+    return client.post(f'/api/projects/{project.id}/applications/review',
+                       json={'action': action, 'application_ids': application_ids})
+
+
+def test_shortlist_stops_at_max_shortlist(company, developers, make_project, make_application, login):
+    project = make_project(company, max_shortlist=3)
+    make_application(project, developers[0], status='shortlisted')
+    pending = [make_application(project, developer) for developer in developers[1:]]
+
+    response = review(login(company), project, 'shortlist', [a.id for a in pending])
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['changed'] == 2
+    assert [r['ok'] for r in data['results']] == [True, True, False, False]
+    assert data['results'][2]['error'] == 'Maximum shortlist limit reached'
+    assert data['results'][2]['status'] == 'pending'
+
+    assert Application.query.filter_by(project_id=project.id, status='shortlisted').count() == 3
+    assert db.session.get(Project, project.id).status == 'shortlisting'
+    shortlisted = Application.query.filter(Application.id.in_([a.id for a in pending[:2]])).all()
+    assert all(a.status == 'shortlisted' and a.shortlisted_at for a in shortlisted)
+
+
+def test_results_for_each_item(company, developers, make_user, make_project, make_application):
+    project = make_project(company)
+    other_project = make_project(make_user('globex', role='company'), title='Other')
+    pending = make_application(project, developers[0])
+    shortlisted = make_application(project, developers[1], status='shortlisted')
+    rejected = make_application(project, developers[2], status='rejected')
+    elsewhere = make_application(other_project, developers[3])
+
+    results = ProjectService.review_applications(
+        project.id, [pending.id, shortlisted.id, rejected.id, elsewhere.id, 9999, pending.id], 'reject')
+    assert results == [
+        {'id': pending.id, 'ok': True, 'status': 'rejected'},
+        {'id': shortlisted.id, 'ok': False, 'status': 'shortlisted',
+         'error': 'Shortlisted applications cannot be rejected'},
+        {'id': rejected.id, 'ok': False, 'status': 'rejected', 'error': 'Already rejected'},
+        {'id': elsewhere.id, 'ok': False, 'status': None, 'error': 'Application not found'},
+        {'id': 9999, 'ok': False, 'status': None, 'error': 'Application not found'},
+    ]
+    assert db.session.get(Application, elsewhere.id).status == 'pending'
+    assert db.session.get(Application, shortlisted.id).status == 'shortlisted'
+
+
+def test_closed_projects_are_not_reviewed(company, developers, make_project, make_application):
+    project = make_project(company, status='completed')
+    application = make_application(project, developers[0])
+
+    result, = ProjectService.review_applications(project.id, [application.id], 'shortlist')
+    assert result == {'id': application.id, 'ok': False, 'status': 'pending',
+                      'error': 'The project is completed'}
+
+
+def test_invalid_requests_are_rejected(company, developers, make_user, make_project,
+                                       make_application, login):
+    project = make_project(company)
+    application = make_application(project, developers[0])
+    client = login(company)
+
+    assert review(client, project, 'promote', [application.id]).status_code == 400
+    assert review(client, project, 'shortlist', []).status_code == 400
+    assert review(client, project, 'shortlist', [str(application.id)]).status_code == 400
+    response = review(client, project, 'shortlist', list(range(1, MAX_REVIEW_BATCH + 2)))
+    assert response.status_code == 400
+    assert str(MAX_REVIEW_BATCH) in response.get_json()['error']
+
+    outsider = login(make_user('globex', role='company'))
+    assert review(outsider, project, 'shortlist', [application.id]).status_code == 403
+    assert db.session.get(Application, application.id).status == 'pending'
+
+
+def test_notifications_are_created_in_one_batch(company, developers, make_project, make_application):
+    project = make_project(company)
+    applications = [make_application(project, developer) for developer in developers]
+    Notification.query.delete()
+    db.session.commit()
+
+    inserts = []
+
+    def record(orm_execute_state):
+        mapper = orm_execute_state.bind_mapper
+        if orm_execute_state.is_insert and mapper is not None and mapper.class_ is Notification:
+            inserts.append(orm_execute_state.parameters)
+
+    event.listen(Session, 'do_orm_execute', record)
+    try:
+        ProjectService.review_applications(project.id, [a.id for a in applications[:3]], 'shortlist')
+    finally:
+        event.remove(Session, 'do_orm_execute', record)
+
+    assert len(inserts) == 1
+    assert len(inserts[0]) == 3
+    notifications = Notification.query.all()
+    assert sorted(n.user_id for n in notifications) == sorted(d.id for d in developers[:3])
+    assert {n.type for n in notifications} == {'shortlist'}
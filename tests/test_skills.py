@@ -0,0 +1,62 @@
+from app import db
+from app.models import DeveloperProfile, Project, Skill, SkillAlias
+from app.services.skill_service import SkillService, DEFAULT_ALIASES
+
+
+def names(skills):
+    return [skill.name for skill in skills]
+
+
+def test_new_databases_have_the_default_aliases(app):
+    assert SkillAlias.query.count() == sum(len(aliases) for aliases in DEFAULT_ALIASES.values())
+    assert names(SkillService.resolve(['golang', 'JS', ' Node  JS ', 'k8s'])) == \
+        ['Go', 'JavaScript', 'Node.js', 'Kubernetes']
+
+
+def test_seeding_again_adds_nothing(app):
+    skills, aliases = Skill.query.count(), SkillAlias.query.count()
+    SkillService.seed_aliases()
+    db.session.commit()
+    assert (Skill.query.count(), SkillAlias.query.count()) == (skills, aliases)
+
+
+def test_resolve_skips_or_creates_unknown_skills(app):
+    assert names(SkillService.resolve(['Go', 'Elixir', 'golang'])) == ['Go']
+    assert names(SkillService.resolve(['Go', 'Elixir'], create=True)) == ['Go', 'Elixir']
+    assert Skill.query.filter_by(slug='elixir').count() == 1
+
+
+def test_added_alias_resolves(app):
+    SkillService.add_alias('JavaScript', 'ECMAScript')
+    db.session.commit()
+    assert names(SkillService.resolve(['ecmascript'])) == ['JavaScript']
+
+
+def test_tags_follow_the_skill_strings(make_user, make_project):
+    project = make_project(make_user('acme', role='company'), required_skills='golang, Postgres, Go')
+    assert names(project.skill_tags) == ['Go', 'PostgreSQL']
+
+    project.required_skills = 'py; React JS'
+    db.session.commit()
+    assert names(project.skill_tags) == ['Python', 'React']
+
+    developer = make_user('dev')
+    profile = DeveloperProfile(user_id=developer.id, full_name='Dev', skills='TS, nodejs')
+    db.session.add(profile)
+    db.session.commit()
+    assert names(profile.skill_tags) == ['Node.js', 'TypeScript']
+
+
+def test_filters_match_aliases(make_user, make_project):
+    company = make_user('acme', role='company')
+    api = make_project(company, title='API', required_skills='Go, PostgreSQL')
+    make_project(company, title='Site', required_skills='HTML, Go')
+
+    def titles(skills, match_all=True):
+        query = SkillService.filter_projects(Project.query, skills, match_all)
+        return sorted(project.title for project in query)
+
+    assert titles(['golang']) == ['API', 'Site']
+    assert titles(['golang', 'postgres']) == [api.title]
+    assert titles(['golang', 'elixir']) == []
+    assert titles(['golang', 'elixir'], match_all=False) == ['API', 'Site']
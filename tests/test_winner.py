@@ -0,0 +1,98 @@
+import pytest
+from app import db
+from app.models import DeveloperProfile, Job, Notification, Submission
+from app.services.jobs import JobQueue
+from app.services.project_service import ProjectService
+
+
+@pytest.fixture
+def make_developer(make_user):
+    def make_developer(username):
+        developer = make_user(username)
+        db.session.add(DeveloperProfile(user_id=developer.id, full_name=username, reputation_score=5))
+        db.session.commit()
+        return developer
+    return make_developer
+
+
+@pytest.fixture
+def contest(make_user, make_developer, make_project, make_application):
+    """A project with a winner, a runner-up who submitted, a shortlisted
+    developer who didn't and ``others`` pending or rejected applicants"""
+    def contest(name, others=2):
+        project = make_project(make_user(name, role='company'))
+        developers = {role: make_developer(f'{name}-{role}')
+                      for role in ('winner', 'submitter', 'shortlisted')}
+        developers['others'] = [make_developer(f'{name}-other{i}') for i in range(others)]
+
+        submissions = {}
+        for role in ('winner', 'submitter'):
+            application = make_application(project, developers[role], status='shortlisted')
+            submissions[role] = Submission(application_id=application.id, project_id=project.id,
+                                           github_url='https://github.com/example/site',
+                                           description='Done')
+            db.session.add(submissions[role])
+        make_application(project, developers['shortlisted'], status='shortlisted')
+        for i, developer in enumerate(developers['others']):
+            make_application(project, developer, status='rejected' if i % 2 else 'pending')
+        db.session.commit()
+        return project, submissions['winner'], developers
+    return contest
+
+
+def reputation(user):
+    return DeveloperProfile.query.filter_by(user_id=user.id).one().reputation_score
+
+
+def test_reputation_is_awarded_as_before(contest):
+    project, submission, developers = contest('acme')
+
+    ProjectService.declare_winner(project, submission)
+    assert project.status == 'completed'
+    assert submission.is_winner
+
+    # The winner earns the participation points on top of the win
+    assert reputation(developers['winner']) == 5 + 12
+    assert reputation(developers['submitter']) == 5 + 2
+    assert reputation(developers['shortlisted']) == 5
+    assert [reputation(d) for d in developers['others']] == [5, 5]
+
+
+def test_announcement_reaches_each_applicant_once(contest):
+    project, submission, developers = contest('acme')
+    Notification.query.delete()
+    db.session.commit()
+
+    ProjectService.declare_winner(project, submission)
+    assert Job.query.one().name == 'projects.announce_winner'
+    assert Notification.query.count() == 0
+
+    assert JobQueue.run_pending() == 1
+    received = {n.user_id: (n.title, n.type) for n in Notification.query}
+    assert Notification.query.count() == len(received) == 5
+    assert received == {
+        developers['winner'].id: ('Congratulations! You Won!', 'winner'),
+        developers['submitter'].id: ('Winner Announced', 'winner'),
+        developers['shortlisted'].id: ('Winner Announced', 'winner'),
+        developers['others'][0].id: ('Project Closed', 'project'),
+        developers['others'][1].id: ('Project Closed', 'project'),
+    }
+    earned = Notification.query.filter_by(user_id=developers['submitter'].id).one()
+    assert 'reputation points' in earned.message
+
+    assert JobQueue.run_pending() == 0
+    assert Notification.query.count() == 5
+
+
+def test_queries_do_not_grow_with_applicants(contest, queries):
+    def count_queries(name, others):
+        project, submission, _ = contest(name, others)
+        del queries[:]
+        ProjectService.declare_winner(project, submission)
+        JobQueue.run_pending()
+        # SQLite has no ordered multi-row INSERT ... RETURNING, so
+        # SQLAlchemy runs those batches a row at a time
+        return len([q for q in queries if not (db.engine.dialect.name == 'sqlite'
+                                               and q.startswith('INSERT INTO notification'))])
+
+    assert count_queries('small', 2) == count_queries('large', 20)